@@ -12,6 +12,8 @@ from tqdm import tqdm
 from typing import Dict, List, Optional, Union
 import traceback
 from datetime import datetime
+from review_similarity import write_similarity_index
+from results_store import record_fragment, record_results, start_live_run
 
 # Ollama model
 ollama_model_name = "gemma3:12b"
@@ -812,6 +814,13 @@ def process_reviews_step_by_step(df: pd.DataFrame, model_name: str, batch_size:
     
     logging.info(f"Starting step-by-step analysis from batch {start_batch}/{total_batches}")
     
+    # Publish finished batches for the dashboard's live mode, starting with those of a resumed run
+    start_live_run(RESULTS_DIR)
+    for batch_num in range(1, start_batch):
+        checkpoint_filename = os.path.join(CHECKPOINT_DIR, f"batch_{batch_num}_of_{total_batches}.csv")
+        if os.path.exists(checkpoint_filename):
+            record_fragment(checkpoint_filename, batch_num, results_dir=RESULTS_DIR)
+    
     # Keep track of checkpoint filenames
     checkpoint_files = []
     
@@ -853,8 +862,11 @@ def process_reviews_step_by_step(df: pd.DataFrame, model_name: str, batch_size:
         # Save checkpoint after each batch
         checkpoint_filename = os.path.join(CHECKPOINT_DIR, f"batch_{batch_num}_of_{total_batches}.csv")
         batch_df = result_df.iloc[start_idx:end_idx].copy()
-        batch_df.to_csv(checkpoint_filename, index=False)
+        # Written to a temporary file first so the live dashboard never reads a partial checkpoint
+        batch_df.to_csv(checkpoint_filename + ".tmp", index=False)
+        os.replace(checkpoint_filename + ".tmp", checkpoint_filename)
         checkpoint_files.append(checkpoint_filename)
+        record_fragment(checkpoint_filename, batch_num, rows=len(batch_df), results_dir=RESULTS_DIR)
         logging.info(f"Saved checkpoint to {checkpoint_filename}")
         
         # Save progress information
@@ -915,6 +927,16 @@ def merge_checkpoints():
     merged_df.to_csv(consolidated_filename, index=False)
     logging.info(f"Saved consolidated results with {len(merged_df)} reviews to {consolidated_filename}")
     
+    # Build the similar-review index used by the dashboard
+    try:
+        similarity_filename = write_similarity_index(consolidated_filename)
+        logging.info(f"Saved similar-review index to {similarity_filename}")
+    except Exception as e:
+        logging.error(f"Error building similar-review index: {e}")
+    
+    # Make the new results the latest ones for the dashboard
+    record_results(consolidated_filename, rows=len(merged_df))
+    
     # Print quick summary
     print(f"\n=== Classification Summary ({len(merged_df)} reviews) ===")
     for col in ['sentiment', 'vehicle_type', 'user_experience', 'usage_profile', 
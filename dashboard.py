@@ -1,13 +1,39 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-import re
-import plotly.express as px
-import plotly.graph_objects as go
 from PIL import Image
 import os
+import tempfile
+import uuid
+from dashboard_data import (
+    AGGREGATE_CACHE, BROWSE_COLUMNS, BROWSE_SORT_COLUMNS, EXPORT_FORMATS, add_derived_columns, build_competitor_table, build_review_cube,
+    competitor_counts, competitor_sentiment, count_by, dataset_version, export_reviews, feature_request_growth, feature_request_timeline, filter_mask,
+    fix_effectiveness, language_topic_ratings, mean_review_length, mean_score, normalize_reviews,
+    rating_distribution, review_page, sentiment_by_rating, topic_competitor_rates, topic_feature_request_rates,
+    rows_of, topic_polarity_change, topic_review_lengths, topic_sentiment_counts, topic_version_counts,
+    topic_version_polarity
+)
+from dashboard_figures import (
+    competitor_counts_figure, competitor_sentiment_figure, feature_request_figure, feature_request_timeline_figure,
+    fix_effectiveness_figure, language_rating_figure, language_topic_ratings_figure, language_topics_figure,
+    polarity_change_figure, rating_distribution_figure, sentiment_by_rating_figure, sentiment_distribution_figure,
+    sentiment_timeline_figure, topic_competitor_figure, topic_counts_figure, topic_length_figure, topic_polarity_figure,
+    topic_sentiment_figure, version_trends_figure
+)
+from dashboard_profiling import PROFILE_LOG, RerunProfile, frame_memory, log_profile, section_table
+from dashboard_report import FILTER_PRESETS, describe_filters, load_snapshot, overview_metrics, preset_filters, snapshot_entries, snapshot_path
+from dashboard_sql import ReviewStore, has_parquet_copy, use_sql_backend, with_texts
+from review_sample import (
+    SAMPLE_SIZE, count_polarity_margins, describe_margins, draw_sample, estimate_counts, polarity_change_margins,
+    polarity_direction, sample_thresholds, share_margins, topic_margins
+)
+from review_search import build_search_index, parse_query, search_results
+from review_similarity import SimilarityIndex, similar_reviews, similarity_index_path
+from results_store import RESULTS_DIR, LiveDataset, ResultsDataset, fragments_version, latest_results_file, live_fragment_files
+
+# Filtered frames share memory with the cached dataset until they are written to
+pd.set_option('mode.copy_on_write', True)
 
 # Set page configuration
 st.set_page_config(
@@ -250,18 +276,6 @@ st.markdown(f"""
 </style>
 """, unsafe_allow_html=True)
 
-# Define plot style based on theme
-def get_plot_settings():
-    return {
-        'plot_bgcolor': 'rgba(14, 17, 23, 0)',  # Transparent with dark theme base
-        'paper_bgcolor': 'rgba(14, 17, 23, 0)',  # Transparent with dark theme base
-        'font_color': '#FFFFFF',
-        'grid_color': 'rgba(255, 255, 255, 0.1)',
-        'color_scale': ['#EF5350', '#A9A9A9', '#81C784']  # Red, Grey, Green - Changing orange to grey for neutral
-    }
-
-plot_settings = get_plot_settings()
-
 # Update the main header
 st.markdown("""
 <div style="text-align: center; padding: 20px 0; margin-bottom: 10px;">
@@ -406,88 +420,300 @@ additional_css = """
         background-color: var(--card-bg-color);
         width: 100%;
     }
+    
+    /* Center the section selector that replaces the tabs */
+    .st-key-selected_tab div[role="radiogroup"] {
+        justify-content: center;
+    }
 </style>
 """
 st.markdown(additional_css, unsafe_allow_html=True)
 
+# Opt-in profiling of this session's reruns: open the dashboard with ?profile=1
+profile = RerunProfile(AGGREGATE_CACHE) if st.query_params.get("profile") == "1" else None
+if profile:
+    profile.mark("Data loading")
+
 # Load Data
-@st.cache_data
-def load_data():
-    try:
-        df = pd.read_csv('bmw_app_analysis/results/bmw_reviews_consolidated_20250504_155236.csv')
-        return df
-    except FileNotFoundError:
-        st.error("Data file not found. Please check the path to the CSV file.")
+# Newest consolidated results, as recorded in the results manifest by classification.py
+DATA_FILE = latest_results_file(RESULTS_DIR)
+
+# Seconds between checks for new batches of a classification run in live mode
+LIVE_POLL_SECONDS = 30
+
+# Batches finished so far by a classification run that is still in progress
+live_files = live_fragment_files(RESULTS_DIR)
+live_mode = bool(live_files) and st.sidebar.toggle(
+    "Live results",
+    key="live_mode",
+    help="Show the batches of the running classification as they are saved"
+)
+
+if live_mode:
+    # Rerun the whole app when the run saves a batch or is merged; the aggregates are
+    # cached per dataset version, so only the new rows are processed
+    @st.fragment(run_every=LIVE_POLL_SECONDS)
+    def poll_live_run(shown_version):
+        current_files = live_fragment_files(RESULTS_DIR)
+        if not current_files or fragments_version(current_files) != shown_version:
+            st.rerun()
+        st.caption(f"Live: {len(current_files):,} batches saved, checked at {pd.Timestamp.now():%H:%M:%S}")
+
+    with st.sidebar:
+        poll_live_run(fragments_version(live_files))
+elif DATA_FILE is None:
+    st.error("No consolidated results found. Please run classification.py first.")
+    st.stop()
+
+# Parquet copy of DATA_FILE written by `python dashboard_sql.py <csv>`
+PARQUET_FILE = os.path.splitext(DATA_FILE)[0] + '.parquet' if DATA_FILE else None
+
+# 'pandas', 'duckdb' or 'auto' (DuckDB for large results that have a Parquet copy)
+DATA_BACKEND = 'auto'
+
+# With the pandas backend, keep review texts out of memory when the Parquet copy
+# exists; they are then read by review id for the reviews on screen
+LAZY_TEXTS = True
+
+# Similar-review index written after classification (or by `python review_similarity.py <csv>`)
+SIMILARITY_FILE = similarity_index_path(DATA_FILE) if DATA_FILE else None
+
+# Preset snapshot written by `python dashboard_report.py`
+SNAPSHOT_FILE = snapshot_path(DATA_FILE) if DATA_FILE else None
+
+# Largest export offered for download; the prepared file is held in the session
+# (one copy per user) until it is downloaded
+MAX_EXPORT_MB = 200
+
+# cache_resource keeps a single read-only copy per process instead of one copy per session;
+# loaders that take a file version are rerun (and the previous copy dropped) when the file changes
+
+# Parquet copy queried with DuckDB
+@st.cache_resource(max_entries=1)
+def load_store(path, version):
+    return ReviewStore(path)
+
+# Labels and metadata of the Parquet copy, when the review texts are left on disk
+@st.cache_resource(max_entries=1)
+def load_metadata(path, version):
+    store = load_store(path, version)
+    df = add_derived_columns(normalize_reviews(store.metadata()))
+    # Aggregates are cached per dataset version and filter selection
+    df.attrs['dataset_version'] = store.attrs['dataset_version']
+    return df
+
+# Results CSV loaded into memory; when the latest file only grew, just the new rows are parsed
+@st.cache_resource
+def load_results():
+    return ResultsDataset()
+
+# Batches of the running classification loaded into memory; new batches are appended
+@st.cache_resource
+def load_live_results():
+    return LiveDataset()
+
+# Pre-aggregated counts, built once per dataset (the frame argument is not hashed)
+@st.cache_resource(max_entries=1)
+def load_cube(_df, version):
+    return build_review_cube(_df)
+
+# Parsed competitor mentions (one row per review and competitor), built once per dataset
+@st.cache_resource(max_entries=1)
+def load_competitors(_df, version):
+    return build_competitor_table(_df)
+
+# Full-text search index, built once per dataset on the first search
+@st.cache_resource(max_entries=1)
+def load_search_index(_source, version):
+    return build_search_index(_source)
+
+# Similar-review index, reloaded when the index file is rebuilt
+@st.cache_resource
+def load_similarity_index(path, version):
+    return SimilarityIndex.load(path)
+
+# Aggregates precomputed for the filter presets by dashboard_report.py, pinned in the
+# aggregate cache (never evicted) once per dataset version when they were computed from
+# DATA_FILE as it is now
+@st.cache_resource(max_entries=1)
+def load_preset_snapshot(path, version, source_version, dataset_version):
+    snapshot = load_snapshot(path)
+    if snapshot['source_version'] != source_version:
+        AGGREGATE_CACHE.pin([])
         return None
+    AGGREGATE_CACHE.pin(snapshot_entries(snapshot, dataset_version))
+    return snapshot
 
-# Load the data
-df = load_data()
+# Stratified sample for approximate mode, drawn once per dataset (in SQL for the DuckDB backend)
+@st.cache_resource(max_entries=1)
+def load_review_sample(_df, _cube, version):
+    return draw_sample(_df, _cube)
+
+# Memory of the loaded reviews including their strings, measured once per dataset when profiling
+@st.cache_resource(max_entries=1)
+def dataset_memory(_df, version):
+    return frame_memory(_df, deep=True)
 
-if df is None:
+# Load the data
+# text_store is the source of review texts that are not in memory, and results the
+# in-memory results with their incrementally maintained indexes
+results = dataset = None
+try:
+    if live_mode:
+        # Batches of a running classification only exist as checkpoint CSVs
+        text_store = None
+        dataset = load_live_results()
+        results = dataset.refresh(live_files)
+        df = results.df
+    elif use_sql_backend(PARQUET_FILE, DATA_BACKEND):
+        # Large results are queried in place with DuckDB; only aggregates are loaded
+        df = text_store = load_store(PARQUET_FILE, dataset_version(PARQUET_FILE))
+    elif LAZY_TEXTS and has_parquet_copy(PARQUET_FILE):
+        text_store = load_store(PARQUET_FILE, dataset_version(PARQUET_FILE))
+        df = load_metadata(PARQUET_FILE, dataset_version(PARQUET_FILE))
+    else:
+        text_store = None
+        dataset = load_results()
+        results = dataset.refresh(DATA_FILE)
+        df = results.df
+except FileNotFoundError as e:
+    if e.filename == PARQUET_FILE:
+        st.error("Parquet file not found. Please run dashboard_sql.py on the CSV file first.")
+    else:
+        st.error("Data file not found. Please check the path to the CSV file.")
     st.stop()
 
+if results is not None:
+    cube, topic_cube = results.cube, results.topic_cube
+    # Parsed competitor mentions (one row per review and competitor)
+    competitor_table = results.competitor_table
+else:
+    cube, topic_cube = load_cube(df, df.attrs['dataset_version'])
+    # The DuckDB backend keeps the competitor mentions in its Parquet file
+    competitor_table = None if isinstance(df, ReviewStore) else load_competitors(df, df.attrs['dataset_version'])
+
+# Serve the filter presets from the snapshot while it matches the results
+preset_snapshot = None
+if not live_mode and SNAPSHOT_FILE is not None and os.path.exists(SNAPSHOT_FILE):
+    preset_snapshot = load_preset_snapshot(
+        SNAPSHOT_FILE, dataset_version(SNAPSHOT_FILE), dataset_version(DATA_FILE), df.attrs['dataset_version']
+    )
+
 # Sidebar filters section
+if profile:
+    profile.mark("Filters")
 st.sidebar.title("Filters")
 
-# Filter by date range if date column exists
-if 'date' in df.columns:
-    df['date'] = pd.to_datetime(df['date'], errors='coerce')
-    min_date = df['date'].min().date()
-    max_date = df['date'].max().date()
-    
-    date_range = st.sidebar.date_input(
-        "Select Date Range",
-        [min_date, max_date],
-        min_value=min_date,
-        max_value=max_date
-    )
-    
-    if len(date_range) == 2:
-        start_date, end_date = date_range
-        filtered_df = df[(df['date'] >= pd.Timestamp(start_date)) & 
-                         (df['date'] <= pd.Timestamp(end_date))]
-    else:
-        filtered_df = df
-else:
-    filtered_df = df
+# Filter options are looked up in the cube; review rows are only masked once all filters are chosen
+filters = {}
 
-# Filter by language
-if 'language' in df.columns:
-    languages = ['All'] + sorted(df['language'].unique().tolist())
-    selected_language = st.sidebar.selectbox("Select Language", languages)
-    
-    if selected_language != 'All':
-        filtered_df = filtered_df[filtered_df['language'] == selected_language]
+# Presets (see dashboard_report.py) replace the filter widgets; their aggregates may be precomputed
+preset_name = st.sidebar.selectbox(
+    "Filter Preset",
+    ['Custom'] + list(FILTER_PRESETS),
+    format_func=lambda name: FILTER_PRESETS[name]['label'] if name in FILTER_PRESETS else name
+)
 
-# Filter by star rating
-if 'score' in df.columns:
-    min_rating = int(filtered_df['score'].min())
-    max_rating = int(filtered_df['score'].max())
-    
-    selected_ratings = st.sidebar.slider(
-        "Select Rating Range",
-        min_rating, max_rating, (min_rating, max_rating)
-    )
+if preset_name != 'Custom':
+    filters = preset_filters(FILTER_PRESETS[preset_name], cube)
+    st.sidebar.caption(f"Showing {describe_filters(filters)}")
+else:
+    # Filter by date range if date column exists
+    if 'date' in df.columns:
+        min_date = cube['date'].min().date()
+        max_date = cube['date'].max().date()
     
-    filtered_df = filtered_df[(filtered_df['score'] >= selected_ratings[0]) & 
-                              (filtered_df['score'] <= selected_ratings[1])]
-
-# Filter by app version if it exists
-if 'appVersion' in df.columns:
-    # Extract major.minor version
-    df['version_str'] = df['appVersion'].apply(
-        lambda x: re.match(r'(\d+\.\d+)', str(x)).group(1) if re.match(r'(\d+\.\d+)', str(x)) else np.nan
-    )
-    filtered_df['version_str'] = filtered_df['appVersion'].apply(
-        lambda x: re.match(r'(\d+\.\d+)', str(x)).group(1) if re.match(r'(\d+\.\d+)', str(x)) else np.nan
-    )
+        date_range = st.sidebar.date_input(
+            "Select Date Range",
+            [min_date, max_date],
+            min_value=min_date,
+            max_value=max_date
+        )
     
-    versions = ['All'] + sorted(filtered_df['version_str'].dropna().unique().tolist(), 
-                                key=lambda v: [int(n) for n in v.split('.')])
-    selected_version = st.sidebar.selectbox("Select App Version", versions)
+        if len(date_range) == 2:
+            filters['date_range'] = tuple(date_range)
+
+    # Filter by language
+    if 'language' in df.columns:
+        languages = ['All'] + sorted(cube['language'].dropna().unique().tolist())
+        selected_language = st.sidebar.selectbox("Select Language", languages)
+        filters['language'] = selected_language
+
+    # Filter by star rating
+    if 'score' in df.columns:
+        available_scores = cube.loc[filter_mask(cube, **filters), 'score']
+        min_rating = int(available_scores.min())
+        max_rating = int(available_scores.max())
     
-    if selected_version != 'All':
-        filtered_df = filtered_df[filtered_df['version_str'] == selected_version]
+        selected_ratings = st.sidebar.slider(
+            "Select Rating Range",
+            min_rating, max_rating, (min_rating, max_rating)
+        )
+        filters['rating_range'] = selected_ratings
+
+    # Filter by app version if it exists
+    if 'appVersion' in df.columns:
+        # Versions present in the current selection, in version order
+        available_versions = cube.loc[filter_mask(cube, **filters), 'version_str']
+        versions = ['All'] + available_versions.cat.remove_unused_categories().cat.categories.tolist()
+        selected_version = st.sidebar.selectbox("Select App Version", versions)
+        filters['version'] = selected_version
+
+# Cube slices answer the summary metrics and count charts
+cube_view = cube[filter_mask(cube, **filters)]
+topic_cube_view = topic_cube[filter_mask(topic_cube, **filters)]
+
+# Rows for the current selection, used for drill-down sections and export
+# (the full dataset is shared as-is when nothing is filtered out; with DuckDB
+# this is a query selection and the sections push their aggregates down to SQL)
+if isinstance(df, ReviewStore):
+    filtered_df = df.select(**filters)
+else:
+    mask = filter_mask(df, **filters)
+    filtered_df = df if mask.all() else df[mask]
+
+# Cache key for the section aggregates of this selection
+filter_key = (df.attrs['dataset_version'], tuple(sorted(filters.items())))
+
+# Approximate mode: sections that aggregate review rows use a stratified sample of the
+# selection (see review_sample.py), unless a section is switched to exact results
+selected_reviews = int(cube_view['review_count'].sum())
+approximate = cube['review_count'].sum() > SAMPLE_SIZE and st.sidebar.toggle(
+    "Approximate mode",
+    key="approximate",
+    help=f"Compute topic, language, version and feature request sections on a sample of {SAMPLE_SIZE:,} reviews"
+)
+sample_view = None
+if approximate:
+    review_sample = (results.review_sample() if results is not None
+                     else load_review_sample(df, cube, df.attrs['dataset_version']))
+    sample_view = review_sample.select(**filters)
+    sample_key = filter_key + ('sample',)
+    # Number of selected reviews each sampled review stands for
+    sample_factor = selected_reviews / len(sample_view) if len(sample_view) else 1.0
+
+
+def section_reviews(section):
+    """
+    Reviews, cache key and whether they are sampled, for the aggregates of a section.
+
+    In approximate mode the section gets a toggle to compute it exactly instead.
+    """
+    if sample_view is None or st.toggle("Exact results", key=f"exact_{section}",
+                                        help="Compute this section on all selected reviews"):
+        return filtered_df, filter_key, False
+    return sample_view, sample_key, True
+
+
+def section_thresholds(aggregate, sampled):
+    """Keyword arguments scaling the review thresholds of an aggregate to the sample (none for exact results)"""
+    return sample_thresholds(aggregate, sample_factor) if sampled else {}
+
+
+def approximate_caption(margins, quantity, digits=2, unit=""):
+    """Note under an approximate chart with its sample and confidence intervals"""
+    st.caption(f"Approximate: estimated from {len(sample_view):,} sampled of {selected_reviews:,} selected reviews. "
+               f"{describe_margins(margins, quantity, digits, unit)}.")
 
 # Add author information in the sidebar
 st.sidebar.markdown("""
@@ -499,6 +725,8 @@ st.sidebar.markdown("""
 """, unsafe_allow_html=True)
 
 # Overview metrics section
+if profile:
+    profile.mark("Overview")
 # Removing the section divider above Overview
 # st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
 
@@ -508,9 +736,12 @@ st.markdown('<div class="sub-header">Overview</div>', unsafe_allow_html=True)
 # Create metrics using a direct approach
 col1, col2, col3, col4 = st.columns(4)
 
+# Metrics of the selection, shared with the headless reports
+metrics = overview_metrics(filtered_df, cube_view)
+
 with col1:
     # Total Reviews
-    value = f"{len(filtered_df):,}"
+    value = f"{metrics['total_reviews']:,}"
     st.markdown(f"""
     <div class="metrics-card">
         <div class="metrics-value">{value}</div>
@@ -520,11 +751,7 @@ with col1:
 
 with col2:
     # Average Rating
-    if 'score' in filtered_df.columns:
-        avg_rating = filtered_df['score'].mean()
-        value = f"{avg_rating:.2f}/5"
-    else:
-        value = "N/A"
+    value = f"{metrics['average_rating']:.2f}/5" if metrics['average_rating'] is not None else "N/A"
     
     st.markdown(f"""
     <div class="metrics-card">
@@ -535,11 +762,7 @@ with col2:
 
 with col3:
     # Positive Sentiment
-    if 'sentiment' in filtered_df.columns:
-        positive_pct = (filtered_df['sentiment'] == 'positive').mean() * 100
-        value = f"{positive_pct:.1f}%"
-    else:
-        value = "N/A"
+    value = f"{metrics['positive_pct']:.1f}%" if metrics['positive_pct'] is not None else "N/A"
     
     st.markdown(f"""
     <div class="metrics-card">
@@ -549,54 +772,22 @@ with col3:
     """, unsafe_allow_html=True)
 
 with col4:
-    # Improvement Index
-    if 'sentiment' in filtered_df.columns and 'appVersion' in filtered_df.columns and 'version_str' in filtered_df.columns:
-        # If version_str doesn't exist, create it
-        if 'version_str' not in filtered_df.columns:
-            filtered_df['version_str'] = filtered_df['appVersion'].apply(
-                lambda x: re.match(r'(\d+\.\d+)', str(x)).group(1) if re.match(r'(\d+\.\d+)', str(x)) else np.nan
-            )
-        
-        # Convert version strings to numeric for sorting
-        filtered_df['version_num'] = pd.to_numeric(filtered_df['version_str'], errors='coerce')
-        
-        # Drop rows with missing version
-        version_df = filtered_df.dropna(subset=['version_num'])
-        
-        if len(version_df) > 0:
-            # Get the median version to split into "newer" and "older"
-            median_version = version_df['version_num'].median()
-            
-            # Create period column
-            version_df['period'] = np.where(version_df['version_num'] >= median_version, 'recent', 'earlier')
-            
-            # Calculate sentiment score for each period
-            newer_score = (version_df[version_df['period'] == 'recent']['sentiment'] == 'positive').mean()
-            older_score = (version_df[version_df['period'] == 'earlier']['sentiment'] == 'positive').mean()
-            
-            # Calculate the improvement (percent change)
-            if older_score > 0:
-                improvement = ((newer_score - older_score) / older_score) * 100
-                
-                # Format the value with a + or - sign
-                if improvement > 0:
-                    value = f"+{improvement:.1f}%"
-                    color = "green"
-                elif improvement < 0:
-                    value = f"{improvement:.1f}%"
-                    color = "red"
-                else:
-                    value = "0%"
-                    color = "white"
-            else:
-                value = "N/A"
-                color = "white"
-        else:
-            value = "N/A"
-            color = "white"
-    else:
+    # Improvement Index: share of positive reviews in recent vs earlier versions
+    improvement = metrics['improvement_index']
+    
+    # Format the value with a + or - sign
+    if improvement is None:
         value = "N/A"
         color = "white"
+    elif improvement > 0:
+        value = f"+{improvement:.1f}%"
+        color = "green"
+    elif improvement < 0:
+        value = f"{improvement:.1f}%"
+        color = "red"
+    else:
+        value = "0%"
+        color = "white"
     
     st.markdown(f"""
     <div class="metrics-card">
@@ -609,31 +800,8 @@ with col4:
 # Removing the section divider above Key Insights
 # st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
 
-# Define the function here before it's first used
-def format_plotly_fig(fig):
-    """Apply consistent styling to any plotly figure"""
-    fig.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        margin=dict(l=10, r=10, t=10, b=10),
-    )
-    
-    # Set transparent background for all subplots
-    for axis in fig.layout:
-        if axis.startswith('xaxis') or axis.startswith('yaxis'):
-            fig.layout[axis].gridcolor = plot_settings['grid_color']
-            
-    # Add transparent configuration
-    fig.update_layout(
-        template="plotly_dark" if is_dark_theme else "plotly_white",
-        modebar=dict(bgcolor='rgba(0,0,0,0)', color=plot_settings['font_color']),
-    )
-    
-    # Set transparent config
-    fig.update_xaxes(showgrid=True, gridcolor=plot_settings['grid_color'])
-    fig.update_yaxes(showgrid=True, gridcolor=plot_settings['grid_color'])
-    
-    return fig
+if profile:
+    profile.mark("Key Insights")
 
 # Use plain section header
 st.markdown('<div class="sub-header">Key Insights</div>', unsafe_allow_html=True)
@@ -646,64 +814,15 @@ with insight_col1:
         st.subheader("Rating Distribution")
         
         if 'score' in filtered_df.columns:
-            # Round ratings to nearest integer for histogram
-            filtered_df['star_rating'] = filtered_df['score'].round().clip(1, 5).astype(int)
-            rating_counts = filtered_df['star_rating'].value_counts().sort_index()
-            
-            # Create star rating labels
-            star_labels = {1: "★", 2: "★★", 3: "★★★", 4: "★★★★", 5: "★★★★★"}
+            # Count reviews per star rating
+            rating_counts = rating_distribution(cube_view, cache_key=filter_key)
             
-            # Prepare data for plotting
-            ratings_df = pd.DataFrame({
-                'Rating': [star_labels[i] for i in rating_counts.index],
-                'Count': rating_counts.values,
-                'Rating_Num': rating_counts.index
-            })
-            
-            # Define colors for ratings
-            rating_colors = {
-                1: '#EF5350',  # Red for 1-star
-                2: '#FF7043',  # Orange-Red for 2-star
-                3: '#FFB74D',  # Orange for 3-star
-                4: '#AED581',  # Light Green for 4-star 
-                5: '#66BB6A'   # Green for 5-star
-            }
-            
-            # Create bar chart
-            fig = px.bar(
-                ratings_df,
-                x='Rating',
-                y='Count',
-                color='Rating_Num', 
-                color_discrete_map={1: rating_colors[1], 2: rating_colors[2], 
-                                    3: rating_colors[3], 4: rating_colors[4], 
-                                    5: rating_colors[5]},
-                height=300
-            )
-            
-            # Apply consistent formatting
-            fig = format_plotly_fig(fig)
-            
-            # Add count labels above bars
-            fig.update_traces(
-                texttemplate='%{y:,}',
-                textposition='outside',
-                cliponaxis=False,
-                hovertemplate='%{x}: %{y:,} reviews<extra></extra>'
-            )
-            
-            # Customize layout
-            fig.update_layout(
-                xaxis_title=None,
-                yaxis_title='Number of Reviews',
-                showlegend=False
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(rating_distribution_figure(rating_counts), use_container_width=True)
             
             # Add context
-            pct_high = ((filtered_df['star_rating'] >= 4).sum() / len(filtered_df) * 100)
-            pct_low = ((filtered_df['star_rating'] <= 2).sum() / len(filtered_df) * 100)
+            total_reviews = rating_counts.sum()
+            pct_high = (rating_counts[rating_counts.index >= 4].sum() / total_reviews * 100)
+            pct_low = (rating_counts[rating_counts.index <= 2].sum() / total_reviews * 100)
             
             st.markdown(f"""
             <div style="font-size: 0.9rem; opacity: 0.8; margin-top: 0.5rem;">
@@ -719,105 +838,24 @@ with insight_col2:
         st.subheader("Topic Sentiment by Version")
         
         if 'topics' in filtered_df.columns and 'sentiment' in filtered_df.columns and 'version_str' in filtered_df.columns:
-            # Create version groups for comparison (newer vs older versions)
-            if 'version_str' not in filtered_df.columns:
-                filtered_df['version_str'] = filtered_df['appVersion'].apply(
-                    lambda x: re.match(r'(\d+\.\d+)', str(x)).group(1) if re.match(r'(\d+\.\d+)', str(x)) else np.nan
-                )
-            
-            # Filter out rows with missing version
-            version_df = filtered_df.dropna(subset=['version_str'])
-            
-            # Convert version strings to numeric for sorting
-            version_df['version_num'] = pd.to_numeric(version_df['version_str'], errors='coerce')
-            
-            # Find the median version to split into "newer" and "older"
-            median_version = version_df['version_num'].median()
-            
-            # Create period column
-            version_df['period'] = np.where(version_df['version_num'] >= median_version, 'recent', 'earlier')
-            
-            # Function to calculate sentiment polarity
-            def get_polarity(df_subset):
-                positive = (df_subset['sentiment'] == 'positive').sum()
-                negative = (df_subset['sentiment'] == 'negative').sum()
-                total = len(df_subset)
-                if total > 0:
-                    return (positive - negative) / total
-                else:
-                    return 0
-            
-            # Get top topics
-            all_topics = []
-            for topics_str in version_df['topics'].dropna():
-                all_topics.extend([topic.strip() for topic in topics_str.split(',')])
-            
-            top_topics = pd.Series(all_topics).value_counts().head(10).index.tolist()
-            
-            # Calculate sentiment polarity for each topic and period
-            polarity_data = []
-            for topic in top_topics:
-                # Get reviews for this topic
-                topic_reviews = version_df[version_df['topics'].str.contains(topic, na=False)]
-                
-                # Skip topics with too few reviews
-                if len(topic_reviews) < 20:
-                    continue
-                    
-                # Calculate polarity for each period
-                recent_polarity = get_polarity(topic_reviews[topic_reviews['period'] == 'recent'])
-                earlier_polarity = get_polarity(topic_reviews[topic_reviews['period'] == 'earlier'])
-                
-                # Calculate the change
-                change = recent_polarity - earlier_polarity
-                
-                polarity_data.append({
-                    'topic': topic,
-                    'recent_polarity': recent_polarity,
-                    'earlier_polarity': earlier_polarity,
-                    'change': change,
-                    'review_count': len(topic_reviews)
-                })
+            insight_reviews, insight_key, sampled = section_reviews("key_insights")
+            # Polarity change per top topic between earlier and recent versions
+            polarity_df = topic_polarity_change(
+                insight_reviews, cache_key=insight_key, **section_thresholds(topic_polarity_change, sampled)
+            )
             
-            if polarity_data:
-                # Convert to DataFrame and sort by absolute change
-                polarity_df = pd.DataFrame(polarity_data)
-                polarity_df['abs_change'] = polarity_df['change'].abs()
-                polarity_df = polarity_df.sort_values('abs_change', ascending=False).head(8)
-                
-                # Create horizontal bar chart of changes
-                fig = go.Figure()
-                
-                # Add bars for change values
-                fig.add_trace(go.Bar(
-                    y=polarity_df['topic'],
-                    x=polarity_df['change'],
-                    orientation='h',
-                    marker_color=np.where(polarity_df['change'] >= 0, '#66BB6A', '#EF5350'),
-                    hovertemplate='Change: %{x:.2f}<br>Reviews: %{customdata:,}<extra></extra>',
-                    customdata=polarity_df['review_count']
-                ))
-                
-                # Apply consistent styling
-                fig = format_plotly_fig(fig)
-                
-                # Add a vertical line at x=0
-                fig.add_shape(
-                    type='line',
-                    x0=0, y0=-0.5,
-                    x1=0, y1=len(polarity_df)-0.5,
-                    line=dict(color=plot_settings['font_color'], width=1)
-                )
+            if len(polarity_df) > 0:
+                # Keep the topics with the largest absolute change
+                polarity_df = polarity_df.head(8)
+                if sampled:
+                    polarity_df = estimate_counts(polarity_df, ['review_count'], sample_factor)
+                    polarity_df['change_margin'] = polarity_change_margins(
+                        insight_reviews, polarity_df['topic'], review_sample.fraction
+                    ).reindex(polarity_df['topic']).to_numpy()
                 
-                # Customize layout
-                fig.update_layout(
-                    xaxis_title='Sentiment Change (Newer - Older Versions)',
-                    xaxis=dict(range=[-1, 1]),
-                    yaxis_title=None,
-                    height=300
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(polarity_change_figure(polarity_df), use_container_width=True)
+                if sampled:
+                    approximate_caption(polarity_df['change_margin'], "polarity changes")
                 
                 # Add interpretation text
                 improving_topics = polarity_df[polarity_df['change'] > 0.2]['topic'].tolist()
@@ -848,17 +886,24 @@ with insight_col2:
 
 st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
 
-tabs = st.tabs([
+tabs = [
     "📊 Sentiment Analysis", 
     "🏷️ Topic Distribution", 
     "🌍 Language Analysis",
     "📱 Version Trends", 
     "🚗 Competitors",
-    "💡 Feature Requests"
-])
+    "💡 Feature Requests",
+    "🔎 Review Search",
+    "📝 Review Browser"
+]
+
+# Only the selected section is computed on a rerun (st.tabs would run every tab body)
+selected_tab = st.radio("Section", tabs, horizontal=True, label_visibility="collapsed", key="selected_tab")
+if profile:
+    profile.mark(selected_tab)
 
 # TAB 1: SENTIMENT ANALYSIS
-with tabs[0]:
+if selected_tab == tabs[0]:
     # Use plain category header
     st.markdown('<div class="category-header">Sentiment Distribution & Trends</div>', unsafe_allow_html=True)
     
@@ -870,66 +915,11 @@ with tabs[0]:
             st.subheader("Sentiment Distribution")
             
             if 'sentiment' in filtered_df.columns:
-                # Calculate sentiment distribution
-                sentiment_counts = filtered_df['sentiment'].value_counts()
-                total_reviews = len(filtered_df)
-                
-                # Define the order we want
-                ordered_sentiments = ['negative', 'neutral', 'positive']
-                
-                # Prepare percentages with consistent order
-                percentages = []
-                for sentiment in ordered_sentiments:
-                    if sentiment in sentiment_counts:
-                        count = sentiment_counts[sentiment]
-                    else:
-                        count = 0
-                    percentages.append((count / total_reviews * 100))
-                
-                # Create a DataFrame for plotting
-                sentiment_df = pd.DataFrame({
-                    'Sentiment': [s.capitalize() for s in ordered_sentiments],
-                    'Percentage': percentages
-                })
-                
-                # Define colors for sentiment
-                sentiment_colors = {
-                    'Negative': plot_settings['color_scale'][0],
-                    'Neutral': plot_settings['color_scale'][1],
-                    'Positive': plot_settings['color_scale'][2]
-                }
-                
-                # Create the plotly bar chart
-                fig = px.bar(
-                    sentiment_df, 
-                    x='Sentiment', 
-                    y='Percentage',
-                    text=[f"{p:.1f}%" for p in percentages],
-                    color='Sentiment',
-                    color_discrete_map=sentiment_colors,
-                    height=400
-                )
-                
-                # Apply the formatting function
-                fig = format_plotly_fig(fig)
-                
-                # Additional layout options specific to this chart
-                fig.update_layout(
-                    xaxis_title=None,
-                    yaxis_title='Percentage of Reviews',
-                    yaxis=dict(range=[0, max(percentages) * 1.1]),
-                    showlegend=False
-                )
-                
-                # Text positioning
-                fig.update_traces(
-                    textposition='outside',
-                    textfont=dict(size=12, color=plot_settings['font_color']),
-                    marker_line_color='rgba(0,0,0,0)',
-                    marker_line_width=0
-                )
+                # Share of each sentiment among the selected reviews
+                sentiment_counts = count_by(cube_view, 'sentiment')
+                total_reviews = cube_view['review_count'].sum()
                 
-                st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(sentiment_distribution_figure(sentiment_counts, total_reviews), use_container_width=True)
             else:
                 st.info("Sentiment data not available")
     
@@ -938,61 +928,10 @@ with tabs[0]:
             st.subheader("Sentiment by Star Rating")
             
             if 'sentiment' in filtered_df.columns and 'score' in filtered_df.columns:
-                # Round scores into the 1-to-5 range and count reviews by rating × sentiment
-                filtered_df['star_rating'] = filtered_df['score'].round().clip(1, 5).astype(int)
-                grouped = (
-                    filtered_df.groupby(['star_rating', 'sentiment'])
-                        .size()
-                        .unstack(fill_value=0)
-                        .reindex(columns=['positive', 'neutral', 'negative'], fill_value=0)  # ensure consistent order
-                )
-                
-                # Create stacked bar chart using plotly
-                fig = go.Figure()
-                
-                sentiment_colors = {
-                    'negative': plot_settings['color_scale'][0],
-                    'neutral': plot_settings['color_scale'][1],
-                    'positive': plot_settings['color_scale'][2]
-                }
+                # Count reviews by rating × sentiment
+                grouped = sentiment_by_rating(cube_view, cache_key=filter_key)
                 
-                # Add traces for each sentiment (in reverse order so negative is at bottom)
-                for sentiment in ['positive', 'neutral', 'negative']:
-                    fig.add_trace(go.Bar(
-                        x=grouped.index,
-                        y=grouped[sentiment],
-                        name=sentiment.capitalize(),
-                        marker_color=sentiment_colors[sentiment],
-                        hovertemplate='%{y:,} reviews<extra></extra>'
-                    ))
-                
-                # Apply the formatting function
-                fig = format_plotly_fig(fig)
-                
-                # Additional layout options specific to this chart
-                fig.update_layout(
-                    barmode='stack',
-                    xaxis=dict(
-                        title='Star Rating',
-                        tickmode='array',
-                        tickvals=list(range(1, 6)),
-                        ticktext=['1', '2', '3', '4', '5']
-                    ),
-                    yaxis=dict(
-                        title='Number of Reviews'
-                    ),
-                    legend=dict(
-                        title='Sentiment',
-                        orientation='h',
-                        yanchor='bottom',
-                        y=1.02,
-                        xanchor='right',
-                        x=1
-                    ),
-                    height=400
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(sentiment_by_rating_figure(grouped), use_container_width=True)
             else:
                 st.info("Sentiment or rating data not available")
                 
@@ -1001,87 +940,11 @@ with tabs[0]:
         st.subheader("Sentiment Timeline")
         
         if 'sentiment' in filtered_df.columns and 'appVersion' in filtered_df.columns:
-            # Make sure we have version information
-            if 'version_str' not in filtered_df.columns:
-                filtered_df['version_str'] = filtered_df['appVersion'].apply(
-                    lambda x: re.match(r'(\d+\.\d+)', str(x)).group(1) if re.match(r'(\d+\.\d+)', str(x)) else np.nan
-                )
-            
-            # Convert version strings to numeric for sorting
-            filtered_df['version_num'] = pd.to_numeric(filtered_df['version_str'], errors='coerce')
+            # Review counts by version and sentiment (reviews without a version are left out)
+            version_sentiment = count_by(cube_view, ['version_str', 'sentiment']).unstack(fill_value=0)
             
-            # Drop rows with missing versions
-            version_df = filtered_df.dropna(subset=['version_num'])
-            
-            if len(version_df) > 0:
-                # Group by version and calculate sentiment percentages
-                version_sentiment = version_df.groupby(['version_str', 'sentiment']).size().unstack(fill_value=0)
-                
-                # Calculate percentages
-                version_total = version_sentiment.sum(axis=1)
-                version_pct = version_sentiment.div(version_total, axis=0) * 100
-                
-                # Reset index to use version as a column
-                version_pct = version_pct.reset_index()
-                
-                # Sort by version number for proper timeline
-                version_pct['version_num'] = pd.to_numeric(version_pct['version_str'], errors='coerce')
-                version_pct = version_pct.sort_values('version_num')
-                
-                # Ensure we have all sentiments
-                for sentiment in ['positive', 'neutral', 'negative']:
-                    if sentiment not in version_pct.columns:
-                        version_pct[sentiment] = 0
-                
-                # Create a plotly line chart
-                fig = go.Figure()
-                
-                # Define colors for sentiment
-                sentiment_colors = {
-                    'negative': plot_settings['color_scale'][0],
-                    'neutral': plot_settings['color_scale'][1],
-                    'positive': plot_settings['color_scale'][2]
-                }
-                
-                # Add a line for each sentiment
-                for sentiment in ['positive', 'neutral', 'negative']:
-                    fig.add_trace(go.Scatter(
-                        x=version_pct['version_str'],
-                        y=version_pct[sentiment],
-                        mode='lines+markers',
-                        name=sentiment.capitalize(),
-                        line=dict(color=sentiment_colors[sentiment], width=3),
-                        marker=dict(size=8),
-                        hovertemplate='%{y:.1f}%<extra></extra>'
-                    ))
-                
-                # Apply consistent formatting
-                fig = format_plotly_fig(fig)
-                
-                # Update layout
-                fig.update_layout(
-                    xaxis=dict(
-                        title='App Version',
-                        tickangle=45,
-                        categoryorder='array',
-                        categoryarray=version_pct['version_str']
-                    ),
-                    yaxis=dict(
-                        title='Percentage of Reviews',
-                        range=[0, 100]
-                    ),
-                    legend=dict(
-                        title='Sentiment',
-                        orientation='h',
-                        yanchor='bottom',
-                        y=1.02,
-                        xanchor='right',
-                        x=1
-                    ),
-                    height=500
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
+            if len(version_sentiment) > 0:
+                st.plotly_chart(sentiment_timeline_figure(version_sentiment), use_container_width=True)
                 
                 # Add explanation
                 st.markdown("""
@@ -1095,7 +958,7 @@ with tabs[0]:
             st.info("Sentiment or app version data not available for timeline analysis")
 
 # TAB 2: TOPIC ANALYSIS
-with tabs[1]:
+if selected_tab == tabs[1]:
     # Use plain category header
     st.markdown('<div class="category-header">Topic Distribution & Sentiment</div>', unsafe_allow_html=True)
     
@@ -1104,258 +967,73 @@ with tabs[1]:
         with st.container():
             st.subheader("Most Common Topics in Reviews")
             
-            # Extract and count all topics (handling comma-separated topics)
-            all_topics = []
-            for topics_str in filtered_df['topics'].dropna():
-                all_topics.extend([topic.strip() for topic in topics_str.split(',')])
+            # Count topic mentions (handling comma-separated topics)
+            topic_counts = count_by(topic_cube_view, 'topic')
             
-            # Count topics and get top 15
-            topic_counts = pd.Series(all_topics).value_counts().head(15)
-            
-            # Create a DataFrame for plotting
-            topic_df = pd.DataFrame({
-                'Topic': topic_counts.index,
-                'Count': topic_counts.values
-            })
-            
-            # Create the plotly bar chart
-            fig = px.bar(
-                topic_df, 
-                x='Count', 
-                y='Topic',
-                orientation='h',
-                color='Count',
-                color_continuous_scale='Blues',
-                height=600
-            )
-            
-            # Apply consistent formatting
-            fig = format_plotly_fig(fig)
-            
-            # Add count labels
-            fig.update_traces(
-                texttemplate='%{x:,}',
-                textposition='outside',
-                cliponaxis=False,
-                hovertemplate='%{y}: %{x:,} reviews<extra></extra>'
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(topic_counts_figure(topic_counts), use_container_width=True)
             
             # Topic Sentiment Analysis
             if 'sentiment' in filtered_df.columns:
                 st.subheader("Topic Sentiment Analysis")
                 
-                # Create a dictionary to store sentiment breakdown for each topic
-                topic_sentiment = {}
-                
-                # For each topic, calculate the sentiment distribution
-                for topic in filtered_df['topics'].dropna().str.split(',').explode().str.strip().unique():
-                    # Get reviews with this topic
-                    topic_reviews = filtered_df[filtered_df['topics'].str.contains(topic, na=False)]
-                    
-                    # Only include topics with a minimum number of reviews
-                    if len(topic_reviews) >= 20:  # Threshold can be adjusted
-                        # Count reviews by sentiment
-                        sentiment_counts = topic_reviews['sentiment'].value_counts()
-                        topic_sentiment[topic] = sentiment_counts
-                
-                # Convert to DataFrame
-                topic_sentiment_df = pd.DataFrame(topic_sentiment).fillna(0).T
-                
-                # Ensure all sentiments are present
-                for sentiment in ['positive', 'neutral', 'negative']:
-                    if sentiment not in topic_sentiment_df.columns:
-                        topic_sentiment_df[sentiment] = 0
-                
-                # Calculate total reviews per topic for sorting
-                topic_sentiment_df['total'] = topic_sentiment_df.sum(axis=1)
-                
-                # Sort by total and take top 15
-                topic_sentiment_df = topic_sentiment_df.sort_values('total', ascending=False).head(15)
-                
-                # Calculate percentages for plotting
-                for sentiment in ['positive', 'neutral', 'negative']:
-                    topic_sentiment_df[f'{sentiment}_pct'] = (topic_sentiment_df[sentiment] / topic_sentiment_df['total'] * 100).round(1)
-                
-                # Create stacked bar chart using plotly
-                fig = go.Figure()
-                
-                sentiment_colors = {
-                    'positive': plot_settings['color_scale'][2],
-                    'neutral': plot_settings['color_scale'][1],
-                    'negative': plot_settings['color_scale'][0]
-                }
-                
-                # Add traces for each sentiment
-                for sentiment in ['positive', 'neutral', 'negative']:
-                    fig.add_trace(go.Bar(
-                        y=topic_sentiment_df.index,
-                        x=topic_sentiment_df[f'{sentiment}_pct'],
-                        name=sentiment.capitalize(),
-                        orientation='h',
-                        marker_color=sentiment_colors[sentiment],
-                        hovertemplate='%{x:.1f}%<extra></extra>'
-                    ))
-                
-                # Apply consistent formatting
-                fig = format_plotly_fig(fig)
-                
-                # Update layout
-                fig.update_layout(
-                    barmode='stack',
-                    xaxis=dict(
-                        title='Percentage of Reviews',
-                        range=[0, 100],
-                    ),
-                    yaxis=dict(
-                        title=None,
-                        autorange="reversed",  # Reverse to match the topic distribution chart
-                    ),
-                    legend=dict(
-                        title='Sentiment',
-                        orientation='h',
-                        yanchor='bottom',
-                        y=1.02,
-                        xanchor='right',
-                        x=1
-                    ),
-                    height=600
+                topic_reviews, topic_key, sampled = section_reviews("topics")
+                # Sentiment breakdown for each topic with enough reviews
+                topic_sentiment_df = topic_sentiment_counts(
+                    topic_reviews, cache_key=topic_key, **section_thresholds(topic_sentiment_counts, sampled)
                 )
-                
-                st.plotly_chart(fig, use_container_width=True)
+                polarity_margins = None
+                if sampled:
+                    # Margins of the 15 topics with the most reviews, which the charts show
+                    sentiment_totals = topic_sentiment_df.sum(axis=1).sort_values(ascending=False).head(15)
+                    shown_counts = topic_sentiment_df.loc[sentiment_totals.index]
+                    polarity_margins = count_polarity_margins(shown_counts, review_sample.fraction)
+                    shares_margins = pd.concat([
+                        share_margins(shown_counts[sentiment] / sentiment_totals, sentiment_totals, review_sample.fraction)
+                        for sentiment in ['positive', 'neutral', 'negative']
+                    ]) * 100
+                    topic_sentiment_df = estimate_counts(topic_sentiment_df, topic_sentiment_df.columns, sample_factor)
+                
+                st.plotly_chart(topic_sentiment_figure(topic_sentiment_df), use_container_width=True)
+                if sampled:
+                    approximate_caption(shares_margins, "sentiment shares", 1, " points")
                 
                 # Add a sentiment polarity index chart
                 st.subheader("Sentiment Polarity by Topic")
                 
-                # Calculate sentiment polarity
-                topic_sentiment_df['polarity'] = (topic_sentiment_df['positive'] - topic_sentiment_df['negative']) / topic_sentiment_df['total']
-                
-                # Sort by polarity
-                polarity_df = topic_sentiment_df.sort_values('polarity', ascending=False)
-                
-                # Create a DataFrame for plotting
-                plot_df = pd.DataFrame({
-                    'Topic': polarity_df.index,
-                    'Polarity': polarity_df['polarity'],
-                    'Total Reviews': polarity_df['total']
-                })
-                
-                # Create the plotly bar chart
-                fig = px.bar(
-                    plot_df, 
-                    x='Polarity', 
-                    y='Topic',
-                    orientation='h',
-                    color='Polarity',
-                    color_continuous_scale=['#F44336', '#FFFFFF', '#4CAF50'],  # Red to White to Green
-                    range_color=[-1, 1],
-                    height=600,
-                    hover_data=['Total Reviews']
-                )
-                
-                # Apply consistent formatting
-                fig = format_plotly_fig(fig)
-                
-                # Add a vertical line at x=0
-                fig.add_shape(
-                    type='line',
-                    x0=0, y0=-0.5,
-                    x1=0, y1=len(plot_df)-0.5,
-                    line=dict(color=plot_settings['font_color'], width=1)
-                )
-                
-                # Update layout
-                fig.update_layout(
-                    xaxis_title='Sentiment Polarity (positive-negative)/total',
-                    xaxis=dict(range=[-1, 1]),
-                    yaxis_title=None,
-                    yaxis=dict(autorange="reversed"),
-                    coloraxis_showscale=False
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(topic_polarity_figure(topic_sentiment_df, polarity_margins), use_container_width=True)
+                if sampled:
+                    approximate_caption(polarity_margins, "polarity")
                 
         # Add Topic Complexity analysis
         with st.container():
             st.subheader("Topic Complexity (Review Length Analysis)")
             
-            if 'topics' in filtered_df.columns and 'content' in filtered_df.columns:
-                # Add character count to each review
-                filtered_df['review_length'] = filtered_df['content'].astype(str).apply(len)
-                
+            if 'topics' in filtered_df.columns and 'review_length' in filtered_df.columns:
+                length_reviews, length_key, sampled = section_reviews("topic_lengths")
                 # Calculate average length by topic
-                topic_length_data = []
-                
-                for topic in filtered_df['topics'].dropna().str.split(',').explode().str.strip().unique():
-                    # Get reviews with this topic
-                    topic_reviews = filtered_df[filtered_df['topics'].str.contains(topic, na=False)]
-                    
-                    # Only include topics with a minimum number of reviews
-                    if len(topic_reviews) >= 20:  # Threshold can be adjusted
-                        # Calculate average length
-                        avg_length = topic_reviews['review_length'].mean()
-                        median_length = topic_reviews['review_length'].median()
-                        review_count = len(topic_reviews)
-                        
-                        topic_length_data.append({
-                            'topic': topic,
-                            'avg_length': avg_length,
-                            'median_length': median_length,
-                            'review_count': review_count
-                        })
+                length_df = topic_review_lengths(
+                    length_reviews, cache_key=length_key, **section_thresholds(topic_review_lengths, sampled)
+                )
                 
-                # Convert to DataFrame and sort
-                if topic_length_data:
-                    length_df = pd.DataFrame(topic_length_data)
-                    length_df = length_df.sort_values('avg_length', ascending=False).head(15)
-                    
-                    # Create the plotly bar chart
-                    fig = px.bar(
-                        length_df,
-                        y='topic',
-                        x='avg_length',
-                        orientation='h',
-                        color='avg_length',
-                        color_continuous_scale='Viridis',
-                        hover_data=['review_count', 'median_length'],
-                        height=500,
-                        labels={
-                            'avg_length': 'Average Review Length (characters)',
-                            'topic': 'Topic',
-                            'review_count': 'Number of Reviews',
-                            'median_length': 'Median Length'
-                        }
-                    )
-                    
-                    # Apply consistent formatting
-                    fig = format_plotly_fig(fig)
-                    
-                    # Add count labels
-                    fig.update_traces(
-                        texttemplate='%{x:.0f}',
-                        textposition='outside',
-                        cliponaxis=False,
-                        hovertemplate='%{y}: %{x:.0f} chars<br>Reviews: %{customdata[0]}<br>Median: %{customdata[1]:.0f} chars<extra></extra>'
-                    )
-                    
-                    # Update layout
-                    fig.update_layout(
-                        xaxis=dict(title='Average Review Length (characters)'),
-                        yaxis=dict(title=None, autorange="reversed"),
-                        coloraxis_showscale=False
-                    )
-                    
-                    st.plotly_chart(fig, use_container_width=True)
+                if len(length_df) > 0:
+                    if sampled:
+                        length_df = estimate_counts(length_df, ['review_count'], sample_factor)
+                    st.plotly_chart(topic_length_figure(length_df), use_container_width=True)
+                    if sampled:
+                        approximate_caption(
+                            topic_margins(length_reviews, length_reviews['review_length'], review_sample.fraction),
+                            "average lengths", 0, " characters"
+                        )
                     
-                    # Calculate the overall average for comparison
-                    overall_avg = filtered_df['review_length'].mean()
+                    # Topics with the longest reviews, and the overall average for comparison
+                    longest_topics = length_df.sort_values('avg_length', ascending=False)['topic']
+                    overall_avg = mean_review_length(length_reviews, cache_key=length_key)
                     
                     # Add explanation
                     st.markdown(f"""
                     <div style="background-color: var(--card-bg-color); padding: 15px; border-radius: 5px; margin-top: 20px; border: 1px solid var(--card-border-color);">
                         <p><strong>💡 Insight:</strong> Topics with longer average review lengths often represent more complex issues or features that users feel compelled to explain in detail. The overall average review length is <strong>{overall_avg:.0f}</strong> characters.</p>
-                        <p>Topics like <strong>{length_df.iloc[0]['topic']}</strong> and <strong>{length_df.iloc[1]['topic']}</strong> have significantly longer reviews, which may indicate areas where users are experiencing complex issues or have detailed feedback.</p>
+                        <p>Topics like <strong>{longest_topics.iloc[0]}</strong> and <strong>{longest_topics.iloc[1]}</strong> have significantly longer reviews, which may indicate areas where users are experiencing complex issues or have detailed feedback.</p>
                     </div>
                     """, unsafe_allow_html=True)
                 else:
@@ -1366,7 +1044,7 @@ with tabs[1]:
         st.info("Topic data not available")
 
 # TAB 3: LANGUAGE ANALYSIS
-with tabs[2]:
+if selected_tab == tabs[2]:
     # Use plain category header
     st.markdown('<div class="category-header">Ratings by Language and Topic</div>', unsafe_allow_html=True)
     
@@ -1375,50 +1053,10 @@ with tabs[2]:
         with st.container():
             st.subheader("Average Rating by Language")
             
-            # Calculate average rating by language
-            lang_ratings = filtered_df.groupby('language')['score'].agg(['mean', 'count']).reset_index()
-            lang_ratings = lang_ratings.rename(columns={'mean': 'avg_rating'})
-            
-            # Sort by average rating
-            lang_ratings = lang_ratings.sort_values('avg_rating', ascending=False)
-            
-            # Filter to languages with enough reviews
-            min_reviews = 10
-            lang_ratings = lang_ratings[lang_ratings['count'] >= min_reviews]
+            # Average rating of the languages with enough reviews
+            fig = language_rating_figure(mean_score(cube_view, by='language'))
             
-            if len(lang_ratings) > 0:
-                # Create the bar chart
-                fig = px.bar(
-                    lang_ratings,
-                    x='language',
-                    y='avg_rating',
-                    color='avg_rating',
-                    color_continuous_scale='RdYlGn',
-                    range_color=[1, 5],
-                    labels={'language': 'Language', 'avg_rating': 'Average Rating', 'count': 'Number of Reviews'},
-                    hover_data=['count'],
-                    height=400
-                )
-                
-                # Apply consistent formatting
-                fig = format_plotly_fig(fig)
-                
-                # Add rating labels
-                fig.update_traces(
-                    texttemplate='%{y:.2f}',
-                    textposition='outside',
-                    cliponaxis=False,
-                    hovertemplate='%{x}: %{y:.2f} avg rating<br>Based on %{customdata[0]:,} reviews<extra></extra>'
-                )
-                
-                # Update layout
-                fig.update_layout(
-                    xaxis_title='Language',
-                    yaxis_title='Average Rating',
-                    yaxis=dict(range=[0, 5.5]),
-                    coloraxis_showscale=False
-                )
-                
+            if fig is not None:
                 st.plotly_chart(fig, use_container_width=True)
                 
                 # Add explanation
@@ -1435,73 +1073,10 @@ with tabs[2]:
         with st.container():
             st.subheader("Most Discussed Topics per Language")
             
-            # Get top languages
-            top_languages = filtered_df['language'].value_counts().head(5).index.tolist()
-            
-            # Process topics by language
-            language_topics = {}
-            
-            for language in top_languages:
-                # Get reviews for this language
-                lang_reviews = filtered_df[filtered_df['language'] == language]
-                
-                # Extract topics
-                all_topics = []
-                for topics_str in lang_reviews['topics'].dropna():
-                    all_topics.extend([topic.strip() for topic in topics_str.split(',')])
-                
-                # Count topics
-                topic_counts = pd.Series(all_topics).value_counts()
-                
-                # Get top 5 topics
-                top_topics = topic_counts.head(5)
-                
-                # Store in dictionary
-                language_topics[language] = top_topics
-            
-            # Create a DataFrame for plotting
-            plot_data = []
-            
-            for language, topics in language_topics.items():
-                for topic, count in topics.items():
-                    plot_data.append({
-                        'language': language,
-                        'topic': topic,
-                        'count': count
-                    })
+            # Top topics of the top languages, from the topic cube
+            fig = language_topics_figure(count_by(cube_view, 'language'), count_by(topic_cube_view, ['language', 'topic']))
             
-            # Convert to DataFrame
-            if plot_data:
-                topics_df = pd.DataFrame(plot_data)
-                
-                # Create grouped bar chart
-                fig = px.bar(
-                    topics_df,
-                    x='language',
-                    y='count',
-                    color='topic',
-                    barmode='group',
-                    height=500,
-                    labels={'language': 'Language', 'count': 'Number of Reviews', 'topic': 'Topic'}
-                )
-                
-                # Apply consistent formatting
-                fig = format_plotly_fig(fig)
-                
-                # Update layout
-                fig.update_layout(
-                    xaxis_title='Language',
-                    yaxis_title='Number of Reviews',
-                    legend=dict(
-                        title='Topic',
-                        orientation='h',
-                        yanchor='bottom',
-                        y=1.02,
-                        xanchor='right',
-                        x=1
-                    )
-                )
-                
+            if fig is not None:
                 st.plotly_chart(fig, use_container_width=True)
                 
                 # Add explanation
@@ -1517,79 +1092,16 @@ with tabs[2]:
         with st.container():
             st.subheader("Rating by Language and Topic")
             
-            # Identify the top 10 languages
-            language_counts = filtered_df['language'].value_counts().head(10)
-            top_languages = language_counts.index.tolist()
-            
-            # Get the top 10 topics
-            all_topics = []
-            for topics_str in filtered_df['topics'].dropna():
-                all_topics.extend([topic.strip() for topic in topics_str.split(',')])
-            
-            top_topics = pd.Series(all_topics).value_counts().head(10).index.tolist()
-            
-            # Create a DataFrame to store average ratings
-            ratings_matrix = pd.DataFrame(index=top_topics, columns=top_languages)
-            
-            # Fill the matrix with average ratings
-            for topic in top_topics:
-                for language in top_languages:
-                    # Filter reviews for this topic and language
-                    mask = (filtered_df['topics'].str.contains(topic, na=False)) & (filtered_df['language'] == language)
-                    reviews = filtered_df[mask]
-                    
-                    # Calculate average rating if there are reviews
-                    if len(reviews) > 0:
-                        avg_rating = reviews['score'].mean().round(1)
-                        ratings_matrix.loc[topic, language] = float(avg_rating)
-                    else:
-                        # Leave as NaN
-                        pass
-            
-            # Convert to numeric values explicitly
-            ratings_matrix = ratings_matrix.apply(pd.to_numeric, errors='coerce')
-            
-            # Create the heatmap using plotly
-            fig = px.imshow(
-                ratings_matrix,
-                labels=dict(x="Language", y="Topic", color="Average Rating"),
-                x=ratings_matrix.columns,
-                y=ratings_matrix.index,
-                color_continuous_scale="RdYlGn",
-                range_color=[1, 5],
-                height=600,
-                aspect="auto"
-            )
-            
-            # Add text annotations
-            annotations = []
-            for i, topic in enumerate(ratings_matrix.index):
-                for j, language in enumerate(ratings_matrix.columns):
-                    if not pd.isna(ratings_matrix.iloc[i, j]):
-                        annotations.append(
-                            dict(
-                                x=j,
-                                y=i,
-                                text=str(ratings_matrix.iloc[i, j]),
-                                showarrow=False,
-                                font=dict(color="black")
-                            )
-                        )
+            rating_reviews, rating_key, sampled = section_reviews("language_ratings")
+            # Average rating for the top 10 topics across the top 10 languages
+            ratings_matrix = language_topic_ratings(rating_reviews, cache_key=rating_key)
             
-            # Apply consistent formatting
-            fig = format_plotly_fig(fig)
-            
-            fig.update_layout(annotations=annotations)
-            fig.update_layout(
-                xaxis=dict(tickangle=45),
-                coloraxis_colorbar=dict(
-                    title="Avg. Rating",
-                    tickvals=[1, 2, 3, 4, 5],
-                    ticktext=["1", "2", "3", "4", "5"]
-                )
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(language_topic_ratings_figure(ratings_matrix), use_container_width=True)
+            if sampled:
+                rating_margins = topic_margins(rating_reviews, rating_reviews['score'], review_sample.fraction, by='language')
+                # Only the cells shown in the heatmap
+                shown_cells = ratings_matrix.stack().index
+                approximate_caption(rating_margins.reindex(shown_cells), "average ratings")
             
             # Add explanation
             st.markdown("""
@@ -1602,168 +1114,37 @@ with tabs[2]:
         st.info("Language, topic, or rating data not available for language analysis")
 
 # TAB 4: VERSION TRENDS
-with tabs[3]:
+if selected_tab == tabs[3]:
     # Use plain category header
     st.markdown('<div class="category-header">Sentiment Trends Across App Versions</div>', unsafe_allow_html=True)
     
     if 'appVersion' in filtered_df.columns and 'topics' in filtered_df.columns and 'sentiment' in filtered_df.columns:
+        version_reviews, version_key, sampled = section_reviews("versions")
+        
         with st.container():
             st.subheader("Sentiment Trends by Topic Across App Versions")
             
-            # Extract version information if not already done
-            if 'version_str' not in filtered_df.columns:
-                filtered_df['version_str'] = filtered_df['appVersion'].apply(
-                    lambda x: re.match(r'(\d+\.\d+)', str(x)).group(1) if re.match(r'(\d+\.\d+)', str(x)) else np.nan
-                )
-            
-            # Identify significant topics
-            significant_topics = []
-            topic_counts = {}
-            
-            for topics_str in filtered_df['topics'].dropna():
-                topics = [topic.strip() for topic in topics_str.split(',')]
-                for topic in topics:
-                    topic_counts[topic] = topic_counts.get(topic, 0) + 1
-            
-            # Take top 10 topics with at least 50 reviews
-            significant_topics = [topic for topic, count in 
-                                sorted(topic_counts.items(), key=lambda x: x[1], reverse=True) 
-                                if count >= 50][:10]
-            
             # Get unique versions ordered chronologically
-            filtered_df['version_num'] = pd.to_numeric(filtered_df['version_str'], errors='coerce')
-            unique_versions = filtered_df.dropna(subset=['version_num']).sort_values('version_num')['version_str'].unique()
+            unique_versions = cube_view['version_str'].dropna().cat.remove_unused_categories().cat.categories.tolist()
             
             if len(unique_versions) >= 2:  # Need at least 2 versions for trend analysis
-                # Process data for each topic and version
-                polarity_data = {}
-                
-                for topic in significant_topics:
-                    polarity_by_version = []
-                    
-                    for version in unique_versions:
-                        # Get reviews for this topic and version
-                        topic_version_mask = (filtered_df['version_str'] == version) & (filtered_df['topics'].str.contains(topic, na=False))
-                        topic_version_reviews = filtered_df[topic_version_mask]
-                        
-                        # Calculate polarity if enough reviews
-                        if len(topic_version_reviews) >= 10:
-                            pos = (topic_version_reviews['sentiment'] == 'positive').sum()
-                            neg = (topic_version_reviews['sentiment'] == 'negative').sum()
-                            total = len(topic_version_reviews)
-                            polarity = (pos - neg) / total
-                            polarity_by_version.append((version, polarity))
-                    
-                    # Only include topics with data for at least 3 versions
-                    if len(polarity_by_version) >= 3:
-                        polarity_data[topic] = polarity_by_version
+                # Polarity per significant topic and version
+                version_polarity = topic_version_polarity(
+                    version_reviews, cache_key=version_key, **section_thresholds(topic_version_polarity, sampled)
+                )
+                fig = version_trends_figure(version_polarity, unique_versions)
                 
-                if polarity_data:  # Only proceed if we have data to show
-                    # Calculate average sentiment to sort topics
-                    topic_avg_sentiment = {}
-                    for topic, data in polarity_data.items():
-                        values = [p for _, p in data]
-                        if values:
-                            topic_avg_sentiment[topic] = sum(values) / len(values)
-                    
-                    # Sort topics by average sentiment
-                    sorted_topics = sorted(topic_avg_sentiment.items(), key=lambda x: x[1])
-                    topics_to_plot = [t for t, _ in sorted_topics]
-                    
-                    # Create mapping from version string to x position for equal spacing
-                    version_positions = {v: i for i, v in enumerate(unique_versions)}
-                    
-                    # Create plotly line chart
-                    fig = go.Figure()
-                    
-                    # Use a distinct color palette
-                    colors = px.colors.qualitative.Plotly[:len(topics_to_plot)]
-                    line_styles = ['solid', 'dash', 'dot', 'dashdot'] * 10  # Reuse line styles as needed
-                    
-                    # Plot each topic
-                    for i, topic in enumerate(topics_to_plot):
-                        # Extract data points and map versions to positions
-                        data_points = polarity_data[topic]
-                        
-                        # Map version strings to x positions and sort by position
-                        x_versions = [v for v, p in data_points]
-                        x_pos = [version_positions[v] for v in x_versions]
-                        y_vals = [p for _, p in data_points]
-                        
-                        # Sort by x position
-                        points = sorted(zip(x_pos, y_vals, x_versions))
-                        x_pos = [p[0] for p in points]
-                        y_vals = [p[1] for p in points]
-                        x_versions = [p[2] for p in points]
-                        
-                        fig.add_trace(go.Scatter(
-                            x=x_versions,
-                            y=y_vals,
-                            mode='lines+markers',
-                            name=topic,
-                            line=dict(
-                                color=colors[i % len(colors)],
-                                dash=line_styles[i % len(line_styles)],
-                                width=2
-                            ),
-                            marker=dict(size=8)
-                        ))
-                    
-                    # Add horizontal line at y=0
-                    fig.add_shape(
-                        type="line",
-                        x0=unique_versions[0],
-                        y0=0,
-                        x1=unique_versions[-1],
-                        y1=0,
-                        line=dict(color=plot_settings['font_color'], width=1, dash="dash")
-                    )
-                    
-                    # Shade regions for positive and negative sentiment
-                    # This is done by adding filled area traces
-                    x_range = list(unique_versions)
-                    
-                    # Add positive region (green)
-                    fig.add_trace(go.Scatter(
-                        x=x_range + x_range[::-1],
-                        y=[0] * len(x_range) + [1] * len(x_range),
-                        fill="toself",
-                        fillcolor="rgba(76, 175, 80, 0.1)",
-                        line=dict(width=0),
-                        showlegend=False,
-                        hoverinfo="skip"
-                    ))
-                    
-                    # Add negative region (red)
-                    fig.add_trace(go.Scatter(
-                        x=x_range + x_range[::-1],
-                        y=[0] * len(x_range) + [-1] * len(x_range),
-                        fill="toself",
-                        fillcolor="rgba(244, 67, 54, 0.1)",
-                        line=dict(width=0),
-                        showlegend=False,
-                        hoverinfo="skip"
-                    ))
-                    
-                    # Apply consistent formatting
-                    fig = format_plotly_fig(fig)
-                    
-                    # Update layout
-                    fig.update_layout(
-                        title=None,
-                        xaxis_title="App Version",
-                        yaxis_title="Sentiment Polarity (positive-negative)/total",
-                        legend=dict(
-                            title="Topics",
-                            yanchor="top",
-                            y=0.99,
-                            xanchor="left",
-                            x=1.01
-                        ),
-                        height=600
-                    )
-                    
+                if fig is not None:  # Only proceed if we have data to show
                     st.plotly_chart(fig, use_container_width=True)
+                    if sampled:
+                        version_margins = topic_margins(
+                            version_reviews, polarity_direction(version_reviews['sentiment']), review_sample.fraction,
+                            by='version_str'
+                        )
+                        # Only the points shown in the chart (their versions are strings there)
+                        shown_points = pd.MultiIndex.from_frame(version_polarity[['topic', 'version_str']])
+                        version_margins = version_margins.rename(index=str, level=1)
+                        approximate_caption(version_margins.reindex(shown_points), "polarity per version")
                     
                     # Add explanation
                     st.markdown("""
@@ -1784,7 +1165,7 @@ with tabs[3]:
             # Make sure we have version information
             if 'version_str' in filtered_df.columns and 'version_num' in filtered_df.columns:
                 # Get unique versions ordered chronologically
-                versions_ordered = filtered_df.dropna(subset=['version_num']).sort_values('version_num')['version_str'].unique()
+                versions_ordered = cube_view['version_str'].dropna().cat.remove_unused_categories().cat.categories.tolist()
                 
                 if len(versions_ordered) >= 2:  # Need at least 2 versions for comparison
                     # Find only the latest version transition
@@ -1792,107 +1173,32 @@ with tabs[3]:
                     previous_version = versions_ordered[-2]
                     
                     # Calculate how sentiment changed for each topic during this version transition
-                    topic_improvements = []
+                    counts = topic_version_counts(version_reviews, cache_key=version_key)
+                    improvements_df = fix_effectiveness(
+                        counts, previous_version, latest_version, cache_key=version_key,
+                        **section_thresholds(fix_effectiveness, sampled)
+                    )
                     
-                    for topic in filtered_df['topics'].dropna().str.split(',').explode().str.strip().unique():
-                        # Get reviews for this topic in each version
-                        prev_reviews = filtered_df[(filtered_df['version_str'] == previous_version) & 
-                                                (filtered_df['topics'].str.contains(topic, na=False))]
-                        latest_reviews = filtered_df[(filtered_df['version_str'] == latest_version) & 
-                                                  (filtered_df['topics'].str.contains(topic, na=False))]
-                        
-                        # Only analyze if we have enough reviews
-                        if len(prev_reviews) >= 15 and len(latest_reviews) >= 15:
-                            # Calculate negative sentiment percentage for each version
-                            prev_neg_pct = (prev_reviews['sentiment'] == 'negative').mean() * 100
-                            latest_neg_pct = (latest_reviews['sentiment'] == 'negative').mean() * 100
-                            
-                            # Calculate improvement
-                            if prev_neg_pct > 20:  # Only consider topics that had a significant problem
-                                reduction = prev_neg_pct - latest_neg_pct
-                                reduction_pct = (reduction / prev_neg_pct) * 100 if prev_neg_pct > 0 else 0
-                                
-                                if reduction > 0:  # Only include improvements
-                                    topic_improvements.append({
-                                        'topic': topic,
-                                        'from_version': previous_version,
-                                        'to_version': latest_version,
-                                        'from_neg_pct': prev_neg_pct,
-                                        'to_neg_pct': latest_neg_pct,
-                                        'reduction': reduction,
-                                        'reduction_pct': reduction_pct,
-                                        'from_reviews': len(prev_reviews),
-                                        'to_reviews': len(latest_reviews)
-                                    })
-                
-                    # Convert to DataFrame and find the top improvements
-                    if topic_improvements:
-                        improvements_df = pd.DataFrame(topic_improvements)
-                        top_improvements = improvements_df.sort_values('reduction_pct', ascending=False).head(10)
-                        
-                        # Create a DataFrame for plotting
-                        plot_data = []
-                        for _, row in top_improvements.iterrows():
-                            plot_data.append({
-                                'topic': row['topic'],
-                                'version_transition': f"{row['from_version']} → {row['to_version']}",
-                                'reduction_pct': row['reduction_pct'],
-                                'from_neg_pct': row['from_neg_pct'],
-                                'to_neg_pct': row['to_neg_pct'],
-                                'from_reviews': row['from_reviews'],
-                                'to_reviews': row['to_reviews']
-                            })
-                        
-                        plot_df = pd.DataFrame(plot_data)
-                        
-                        # Create the plotly bar chart
-                        fig = px.bar(
-                            plot_df,
-                            x='reduction_pct',
-                            y='topic',
-                            color='reduction_pct',
-                            color_continuous_scale='Greens',
-                            hover_data=['version_transition', 'from_neg_pct', 'to_neg_pct', 'from_reviews', 'to_reviews'],
-                            height=500,
-                            labels={
-                                'reduction_pct': 'Negative Sentiment Reduction (%)',
-                                'topic': 'Topic',
-                                'version_transition': 'Version Transition',
-                                'from_neg_pct': 'Initial Negative %',
-                                'to_neg_pct': 'Final Negative %',
-                                'from_reviews': 'Initial Reviews',
-                                'to_reviews': 'Final Reviews'
-                            }
-                        )
-                        
-                        # Apply consistent formatting
-                        fig = format_plotly_fig(fig)
-                        
-                        # Add labels
-                        fig.update_traces(
-                            texttemplate='%{x:.1f}%',
-                            textposition='outside',
-                            cliponaxis=False,
-                            hovertemplate='%{y}<br>%{customdata[0]}<br>Initial: %{customdata[1]:.1f}% → Final: %{customdata[2]:.1f}%<br>Reviews: %{customdata[3]} → %{customdata[4]}<extra></extra>'
-                        )
-                        
-                        # Update layout
-                        fig.update_layout(
-                            xaxis_title='Negative Sentiment Reduction (%)',
-                            yaxis_title=None,
-                            coloraxis_showscale=False
-                        )
-                        
-                        st.plotly_chart(fig, use_container_width=True)
+                    # Find the top improvements
+                    if len(improvements_df) > 0:
+                        if sampled:
+                            # The two negative shares are independent estimates
+                            reduction_margins = (
+                                share_margins(improvements_df['from_neg_pct'] / 100, improvements_df['from_reviews'], review_sample.fraction) ** 2
+                                + share_margins(improvements_df['to_neg_pct'] / 100, improvements_df['to_reviews'], review_sample.fraction) ** 2
+                            ) ** 0.5 * 100
+                            improvements_df = estimate_counts(improvements_df, ['from_reviews', 'to_reviews'], sample_factor)
+                        st.plotly_chart(fix_effectiveness_figure(improvements_df), use_container_width=True)
+                        if sampled:
+                            approximate_caption(reduction_margins, "negative share reductions", 1, " points")
                         
                         # Add explanation
-                        reduction_pct_text = f"{plot_df.iloc[0]['reduction_pct']:.1f}%" if len(plot_df) > 0 else "N/A"
-                        topic_text = plot_df.iloc[0]['topic'] if len(plot_df) > 0 else "N/A"
+                        top_improvement = improvements_df.iloc[0]
                         
                         st.markdown(f"""
                         <div style="background-color: var(--card-bg-color); padding: 15px; border-radius: 5px; margin-top: 20px; border: 1px solid var(--card-border-color);">
                             <p><strong>💡 Insight:</strong> This chart shows which topics saw the greatest reduction in negative sentiment in the most recent update from version <strong>{previous_version}</strong> to <strong>{latest_version}</strong>, indicating effective fixes.</p>
-                            <p>The greatest improvement was seen for the topic <strong>{topic_text}</strong>, with a <strong>{reduction_pct_text}</strong> reduction in negative sentiment.</p>
+                            <p>The greatest improvement was seen for the topic <strong>{top_improvement['topic']}</strong>, with a <strong>{top_improvement['reduction_pct']:.1f}%</strong> reduction in negative sentiment.</p>
                         </div>
                         """, unsafe_allow_html=True)
                     else:
@@ -1905,7 +1211,7 @@ with tabs[3]:
         st.info("App version, topic, or sentiment data not available for version trend analysis")
 
 # TAB 5: COMPETITOR ANALYSIS
-with tabs[4]:
+if selected_tab == tabs[4]:
     # Use plain category header
     st.markdown('<div class="category-header">Competitor Mentions in App Reviews</div>', unsafe_allow_html=True)
     
@@ -1913,200 +1219,30 @@ with tabs[4]:
         with st.container():
             st.subheader("Most Frequently Mentioned Competitors")
             
-            # Define allowed competitors (automobile manufacturers only)
-            allowed_competitors = [
-                'mercedes', 'tesla', 'audi', 'volvo', 'volkswagen', 'dacia', 'peugeot', 
-                'škoda', 'mini', 'kia', 'renault', 'ford', 'land rover', 'toyota', 
-                'citroën', 'jaguar', 'porsche', 'seat', 'fiat', 'lexus', 'cupra', 
-                'smart', 'opel', 'chevrolet', 'mazda', 'polestar', 'yugo', 'hyundai', 
-                'nissan', 'alpina'
-            ]
-            
-            # Define mapping for variant names
-            variant_mapping = {
-                'vw': 'volkswagen',
-                'skoda': 'škoda',
-                'citroen': 'citroën'
-            }
-            
-            # Function to parse and extract competitors
-            def extract_competitors(competitor_str):
-                if pd.isna(competitor_str) or str(competitor_str).lower() == 'none':
-                    return []
-                
-                # Convert to lowercase for consistency
-                competitor_str = str(competitor_str).lower()
-                
-                # Handle compound mentions by splitting on common separators
-                competitors = re.split(r'\s+and\s+|\s*,\s*|\s*&\s*|\s+plus\s+|\s+with\s+', competitor_str)
-                
-                # Clean up and filter to allowed competitors only
-                filtered_competitors = []
-                
-                for comp in competitors:
-                    comp = comp.strip()
-                    if comp:
-                        # Apply mapping for variants
-                        if comp in variant_mapping:
-                            comp = variant_mapping[comp]
-                        
-                        # Only keep allowed competitors
-                        if comp in allowed_competitors:
-                            filtered_competitors.append(comp)
-                
-                return filtered_competitors
-            
-            # Apply the extraction function to count individual competitor mentions
-            competitor_mentions = []
-            
-            for comp_str in filtered_df['competitor_mentioned'].dropna():
-                competitors = extract_competitors(comp_str)
-                competitor_mentions.extend(competitors)
+            # Competitor mentions in the selected reviews (a DuckDB selection reads them itself)
+            mentions = rows_of(competitor_table, filtered_df) if competitor_table is not None else filtered_df
             
             # Count mentions of each competitor
-            competitor_counts = pd.Series(competitor_mentions).value_counts()
+            mention_counts = competitor_counts(mentions, cache_key=filter_key)
             
-            if len(competitor_counts) > 0:
-                # Define how many top competitors to show
-                top_n_to_show = min(8, len(competitor_counts))
-                
-                # Split into top competitors and others
-                top_competitors = competitor_counts.head(top_n_to_show)
-                other_competitors_count = competitor_counts[top_n_to_show:].sum()
-                
-                # Prepare data for plotting
-                if other_competitors_count > 0:
-                    display_data = pd.concat([
-                        top_competitors,
-                        pd.Series([other_competitors_count], index=["Others"])
-                    ])
-                else:
-                    display_data = top_competitors
-                
-                # Create the plotly bar chart - capitalize competitor names for display
-                display_data.index = [name.title() if name != "Others" else name for name in display_data.index]
-                
-                fig = px.bar(
-                    x=display_data.index,
-                    y=display_data.values,
-                    labels={'x': 'Competitor', 'y': 'Number of Mentions'},
-                    color=display_data.index,
-                    color_discrete_sequence=px.colors.qualitative.Bold,
-                    height=500
-                )
-                
-                # Apply consistent formatting
-                fig = format_plotly_fig(fig)
-                
-                # Update layout
-                fig.update_layout(
-                    xaxis=dict(
-                        tickangle=45
-                    ),
-                    yaxis=dict(
-                        title="Number of Mentions"
-                    ),
-                    showlegend=False
-                )
-                
-                # Add count labels
-                fig.update_traces(
-                    texttemplate='%{y:,}',
-                    textposition='outside',
-                    cliponaxis=False
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
-                
+            if len(mention_counts) > 0:
+                st.plotly_chart(competitor_counts_figure(mention_counts), use_container_width=True)
+
+                # Sentiment of the reviews mentioning each competitor
+                if 'sentiment' in filtered_df.columns:
+                    st.subheader("Sentiment of Reviews Mentioning Competitors")
+
+                    sentiment_counts = competitor_sentiment(filtered_df, mentions, cache_key=filter_key)
+                    st.plotly_chart(competitor_sentiment_figure(sentiment_counts), use_container_width=True)
+
                 # Topic-competitor association
                 st.subheader("Topics Associated with Competitor Mentions")
                 
-                # Add a column to indicate if the review mentions an allowed competitor
-                filtered_df['has_allowed_competitor'] = filtered_df['competitor_mentioned'].apply(
-                    lambda x: len(extract_competitors(x)) > 0
-                )
-                
                 # Calculate competitor mention rate for significant topics
-                topic_competitor_data = []
-                
-                for topic in filtered_df['topics'].dropna().str.split(',').explode().str.strip().unique():
-                    # Get reviews with this topic
-                    topic_reviews = filtered_df[filtered_df['topics'].str.contains(topic, na=False)]
-                    
-                    # Only include topics with enough reviews
-                    if len(topic_reviews) >= 30:
-                        competitor_pct = topic_reviews['has_allowed_competitor'].mean() * 100
-                        
-                        # Get top competitor for this topic
-                        if competitor_pct > 0:
-                            comp_reviews = topic_reviews[topic_reviews['has_allowed_competitor']]
-                            top_competitor = None
-                            
-                            if len(comp_reviews) > 0:
-                                comp_mentions = []
-                                for comp_str in comp_reviews['competitor_mentioned'].dropna():
-                                    comps = extract_competitors(comp_str)
-                                    comp_mentions.extend(comps)
-                                
-                                if comp_mentions:
-                                    top_competitor = pd.Series(comp_mentions).value_counts().index[0].title()
-                            
-                            topic_competitor_data.append({
-                                'topic': topic,
-                                'competitor_mention_rate': competitor_pct,
-                                'review_count': len(topic_reviews),
-                                'top_competitor': top_competitor
-                            })
+                topic_comp_df = topic_competitor_rates(filtered_df, mentions, cache_key=filter_key)
                 
-                # Convert to DataFrame and sort
-                if topic_competitor_data:
-                    topic_comp_df = pd.DataFrame(topic_competitor_data)
-                    topic_comp_df = topic_comp_df.sort_values('competitor_mention_rate', ascending=False).head(15)
-                    
-                    # Create plotly bar chart
-                    fig = px.bar(
-                        topic_comp_df,
-                        x='competitor_mention_rate',
-                        y='topic',
-                        orientation='h',
-                        color='competitor_mention_rate',
-                        color_continuous_scale='Oranges',
-                        hover_data=['review_count', 'top_competitor'],
-                        height=600
-                    )
-                    
-                    # Apply consistent formatting
-                    fig = format_plotly_fig(fig)
-                    
-                    # Add competitor labels
-                    annotations = []
-                    for i, row in enumerate(topic_comp_df.itertuples()):
-                        if row.top_competitor:
-                            annotations.append(
-                                dict(
-                                    x=row.competitor_mention_rate + 0.1,
-                                    y=i,
-                                    text=f"({row.top_competitor})",
-                                    showarrow=False,
-                                    font=dict(color="black", size=10)
-                                )
-                            )
-                    
-                    fig.update_layout(annotations=annotations)
-                    
-                    # Update layout
-                    fig.update_layout(
-                        xaxis=dict(
-                            title="Percentage of Reviews Mentioning Competitors"
-                        ),
-                        yaxis=dict(
-                            title=None,
-                            autorange="reversed"  # Highest at top
-                        ),
-                        coloraxis_showscale=False
-                    )
-                    
-                    st.plotly_chart(fig, use_container_width=True)
+                if len(topic_comp_df) > 0:
+                    st.plotly_chart(topic_competitor_figure(topic_comp_df), use_container_width=True)
                     
                     # Add explanation
                     st.markdown("""
@@ -2123,7 +1259,7 @@ with tabs[4]:
         st.info("Competitor data not available")
 
 # TAB 6: FEATURE REQUESTS
-with tabs[5]:
+if selected_tab == tabs[5]:
     # Use plain category header
     st.markdown('<div class="category-header">Feature Request Analysis</div>', unsafe_allow_html=True)
     
@@ -2131,79 +1267,25 @@ with tabs[5]:
         with st.container():
             st.subheader("Topics Most Associated with Feature Requests")
             
+            request_reviews, request_key, sampled = section_reviews("feature_requests")
             # Calculate feature request prevalence for each topic
-            topic_feature_requests = []
-            
-            for topic in filtered_df['topics'].dropna().str.split(',').explode().str.strip().unique():
-                # Get reviews with this topic
-                topic_reviews = filtered_df[filtered_df['topics'].str.contains(topic, na=False)]
-                
-                # Only include topics with enough reviews
-                if len(topic_reviews) >= 30:
-                    # Calculate percentage of feature requests
-                    if topic_reviews['is_feature_request'].dtype == 'object':
-                        # If values are strings ('yes'/'no')
-                        feature_count = (topic_reviews['is_feature_request'].str.lower() == 'yes').sum()
-                        feature_pct = (feature_count / len(topic_reviews)) * 100
-                    else:
-                        # If values are boolean
-                        feature_pct = topic_reviews['is_feature_request'].mean() * 100
-                    
-                    topic_feature_requests.append({
-                        'topic': topic,
-                        'feature_request_pct': feature_pct,
-                        'review_count': len(topic_reviews)
-                    })
+            counts = topic_version_counts(request_reviews, cache_key=request_key)
+            fr_df = topic_feature_request_rates(
+                counts, cache_key=request_key, **section_thresholds(topic_feature_request_rates, sampled)
+            )
             
-            # Convert to DataFrame and sort
-            if topic_feature_requests:
-                fr_df = pd.DataFrame(topic_feature_requests)
-                fr_df = fr_df.sort_values('feature_request_pct', ascending=False).head(15)
-                
-                # Create plotly bar chart
-                fig = px.bar(
-                    fr_df,
-                    x='feature_request_pct',
-                    y='topic',
-                    orientation='h',
-                    color='feature_request_pct',
-                    color_continuous_scale='Purples',
-                    hover_data=['review_count'],
-                    height=600
-                )
-                
-                # Apply consistent formatting
-                fig = format_plotly_fig(fig)
-                
-                # Update layout
-                fig.update_layout(
-                    xaxis=dict(
-                        title="Percentage of Reviews Containing Feature Requests",
-                        range=[0, 100]
-                    ),
-                    yaxis=dict(
-                        title=None,
-                        autorange="reversed"  # Highest at top
-                    ),
-                    coloraxis_showscale=False
-                )
-                
-                # Add count and percentage labels
-                fig.update_traces(
-                    texttemplate='%{x:.1f}%<br>(%{customdata[0]:,})',
-                    textposition='outside',
-                    hovertemplate='%{y}: %{x:.1f}% feature requests<br>Based on %{customdata[0]:,} reviews<extra></extra>'
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
+            if len(fr_df) > 0:
+                if sampled:
+                    request_margins = share_margins(fr_df['feature_request_pct'] / 100, fr_df['review_count'],
+                                                    review_sample.fraction) * 100
+                    fr_df = estimate_counts(fr_df, ['review_count'], sample_factor)
+                st.plotly_chart(feature_request_figure(fr_df), use_container_width=True)
+                if sampled:
+                    approximate_caption(request_margins, "feature request shares", 1, " points")
                 
                 # Add insights and recommendations section
                 st.subheader("Insights & Recommendations")
                 
-                # Get the top 3 feature request topics
-                top_topics = fr_df.head(3)['topic'].tolist()
-                top_topics_str = ", ".join(f"'{t}'" for t in top_topics)
-                
                 st.markdown(f"""
                 <div style="background-color: var(--card-bg-color); padding: 15px; border-radius: 5px; margin-top: 20px; border: 1px solid var(--card-border-color);">
                     <p><strong>📊 Key Insight:</strong> Topics with a high percentage of feature requests represent areas where users
@@ -2218,179 +1300,38 @@ with tabs[5]:
             st.subheader("Feature Request Timeline")
             
             if 'is_feature_request' in filtered_df.columns and 'topics' in filtered_df.columns and 'appVersion' in filtered_df.columns:
-                # Make sure we have version information
-                if 'version_str' not in filtered_df.columns:
-                    filtered_df['version_str'] = filtered_df['appVersion'].apply(
-                        lambda x: re.match(r'(\d+\.\d+)', str(x)).group(1) if re.match(r'(\d+\.\d+)', str(x)) else np.nan
-                    )
-                
-                # Convert version strings to numeric for sorting
-                filtered_df['version_num'] = pd.to_numeric(filtered_df['version_str'], errors='coerce')
+                # Reviews with a known version
+                versioned_reviews = cube_view.loc[cube_view['version_num'].notna(), 'review_count'].sum()
                 
-                # Drop rows with missing versions
-                version_df = filtered_df.dropna(subset=['version_num'])
-                
-                if len(version_df) > 0:
-                    # Get top feature request topics
-                    feature_topics = []
-                    
-                    if topic_feature_requests:
-                        # Use topics already identified in the analysis above
-                        top_fr_topics = fr_df.head(5)['topic'].tolist()
-                        feature_topics = top_fr_topics
-                    else:
-                        # Identify top feature request topics
-                        for topic in version_df['topics'].dropna().str.split(',').explode().str.strip().unique():
-                            # Get reviews with this topic
-                            topic_reviews = version_df[version_df['topics'].str.contains(topic, na=False)]
-                            
-                            # Only include topics with enough reviews
-                            if len(topic_reviews) >= 30:
-                                # Calculate percentage of feature requests
-                                if topic_reviews['is_feature_request'].dtype == 'object':
-                                    # If values are strings ('yes'/'no')
-                                    feature_count = (topic_reviews['is_feature_request'].str.lower() == 'yes').sum()
-                                    feature_pct = (feature_count / len(topic_reviews)) * 100
-                                else:
-                                    # If values are boolean
-                                    feature_pct = topic_reviews['is_feature_request'].mean() * 100
-                                
-                                if feature_pct >= 25:  # Only include topics with significant feature request rate
-                                    feature_topics.append(topic)
-                    
-                    # Limit to top 5 topics
-                    feature_topics = feature_topics[:5]
+                if versioned_reviews > 0:
+                    # Top feature request topics from the analysis above (a topic without
+                    # enough reviews overall cannot have enough reviews with a version)
+                    feature_topics = fr_df.sort_values('feature_request_pct', ascending=False).head(5)['topic'].tolist()
                     
                     if feature_topics:
-                        # Create a DataFrame for the timeline analysis
-                        timeline_data = []
-                        
-                        for topic in feature_topics:
-                            # Get reviews for this topic
-                            topic_reviews = version_df[version_df['topics'].str.contains(topic, na=False)]
-                            
-                            # Group by version and calculate feature request percentage
-                            version_data = topic_reviews.groupby('version_str').apply(
-                                lambda x: pd.Series({
-                                    'total': len(x),
-                                    'fr_count': (x['is_feature_request'].str.lower() == 'yes').sum() if x['is_feature_request'].dtype == 'object' else x['is_feature_request'].sum(),
-                                    'fr_pct': ((x['is_feature_request'].str.lower() == 'yes').sum() / len(x) * 100) if x['is_feature_request'].dtype == 'object' else (x['is_feature_request'].mean() * 100)
-                                })
-                            )
-                            
-                            # Only include versions with enough data
-                            version_data = version_data[version_data['total'] >= 10]
-                            
-                            # Convert to records
-                            for version, row in version_data.iterrows():
-                                timeline_data.append({
-                                    'version': version,
-                                    'topic': topic,
-                                    'fr_pct': row['fr_pct'],
-                                    'total': row['total'],
-                                    'fr_count': row['fr_count']
-                                })
+                        # Feature request share per version for these topics
+                        timeline_df = feature_request_timeline(
+                            counts, tuple(feature_topics), cache_key=request_key,
+                            **section_thresholds(feature_request_timeline, sampled)
+                        )
                         
-                        # Convert to DataFrame
-                        if timeline_data:
-                            timeline_df = pd.DataFrame(timeline_data)
-                            
-                            # Add version_num for sorting
-                            timeline_df['version_num'] = pd.to_numeric(timeline_df['version'], errors='coerce')
-                            timeline_df = timeline_df.sort_values('version_num')
-                            
-                            # Create a plotly line chart
-                            fig = go.Figure()
-                            
-                            # Use a nice color palette
-                            colors = px.colors.qualitative.Plotly[:len(feature_topics)]
-                            line_styles = ['solid', 'dash', 'dot', 'dashdot', 'longdash']
-                            
-                            # Add a line for each topic
-                            for i, topic in enumerate(feature_topics):
-                                topic_data = timeline_df[timeline_df['topic'] == topic]
-                                
-                                if len(topic_data) >= 3:  # Only plot if we have enough data points
-                                    fig.add_trace(go.Scatter(
-                                        x=topic_data['version'],
-                                        y=topic_data['fr_pct'],
-                                        mode='lines+markers',
-                                        name=topic,
-                                        line=dict(
-                                            color=colors[i % len(colors)],
-                                            dash=line_styles[i % len(line_styles)],
-                                            width=3
-                                        ),
-                                        marker=dict(size=8),
-                                        customdata=np.stack((
-                                            topic_data['total'],
-                                            topic_data['fr_count']
-                                        ), axis=-1),
-                                        hovertemplate='%{y:.1f}% of reviews<br>%{customdata[1]} out of %{customdata[0]} reviews<extra></extra>'
-                                    ))
-                            
-                            # Apply consistent formatting
-                            fig = format_plotly_fig(fig)
-                            
-                            # Update layout
-                            fig.update_layout(
-                                xaxis=dict(
-                                    title='App Version',
-                                    tickangle=45,
-                                    categoryorder='array',
-                                    categoryarray=sorted(timeline_df['version'].unique(), key=lambda x: pd.to_numeric(x, errors='coerce'))
-                                ),
-                                yaxis=dict(
-                                    title='Feature Request Percentage',
-                                    range=[0, max(timeline_df['fr_pct']) * 1.1]
-                                ),
-                                legend=dict(
-                                    title='Topics',
-                                    orientation='h',
-                                    yanchor='bottom',
-                                    y=1.02,
-                                    xanchor='right',
-                                    x=1
-                                ),
-                                height=500
-                            )
-                            
+                        if len(timeline_df) > 0:
+                            if sampled:
+                                timeline_margins = share_margins(timeline_df['fr_pct'] / 100, timeline_df['total'],
+                                                                 review_sample.fraction) * 100
+                                timeline_df = estimate_counts(timeline_df, ['total', 'fr_count'], sample_factor)
+                            fig = feature_request_timeline_figure(timeline_df, feature_topics, cube['version_str'].cat.categories)
                             st.plotly_chart(fig, use_container_width=True)
+                            if sampled:
+                                approximate_caption(timeline_margins, "feature request shares per version", 1, " points")
                             
-                            # Identify topics with significant increases
-                            growing_requests = []
-                            
-                            for topic in feature_topics:
-                                topic_data = timeline_df[timeline_df['topic'] == topic]
-                                
-                                if len(topic_data) >= 3:
-                                    # Calculate slope using simple linear regression
-                                    x = np.arange(len(topic_data))
-                                    y = topic_data['fr_pct'].values
-                                    slope, _ = np.polyfit(x, y, 1)
-                                    
-                                    # Identify significant positive slopes
-                                    if slope > 1:  # More than 1 percentage point increase per version on average
-                                        earliest = topic_data.iloc[0]['fr_pct']
-                                        latest = topic_data.iloc[-1]['fr_pct']
-                                        percent_increase = ((latest - earliest) / earliest) * 100 if earliest > 0 else 0
-                                        
-                                        growing_requests.append({
-                                            'topic': topic,
-                                            'slope': slope,
-                                            'percent_increase': percent_increase,
-                                            'earliest': earliest,
-                                            'latest': latest,
-                                            'versions': len(topic_data),
-                                            'earliest_version': topic_data.iloc[0]['version'],
-                                            'latest_version': topic_data.iloc[-1]['version']
-                                        })
+                            # Identify topics with significant increases (more than 1 percentage
+                            # point per version on average)
+                            growing_requests = feature_request_growth(timeline_df)
                             
                             # Add insight based on trending feature requests
-                            if growing_requests:
-                                # Sort by percent increase
-                                growing_requests.sort(key=lambda x: x['percent_increase'], reverse=True)
-                                top_growing = growing_requests[0]
+                            if len(growing_requests) > 0:
+                                top_growing = growing_requests.iloc[0]
                                 
                                 st.markdown(f"""
                                 <div style="background-color: var(--card-bg-color); padding: 15px; border-radius: 5px; margin-top: 20px; border: 1px solid var(--card-border-color);">
@@ -2415,7 +1356,108 @@ with tabs[5]:
     else:
         st.info("Feature request data not available")
 
+# TAB 7: REVIEW SEARCH
+if selected_tab == tabs[6]:
+    st.markdown('<div class="category-header">Review Search</div>', unsafe_allow_html=True)
+    
+    with st.container():
+        st.subheader("Search Review Texts")
+        
+        search_query = st.text_input(
+            "Search reviews",
+            placeholder='e.g. "digital key" connect*',
+            help='All words must match. Use quotes for exact phrases and * for prefixes (connect* finds connection, connected).'
+        )
+        
+        # Queries of punctuation only, such as "*" or "-", have no words to search for
+        if parse_query(search_query):
+            with st.spinner("Searching reviews..."):
+                search_index = (results.search_index() if results is not None
+                                else load_search_index(text_store, text_store.attrs['dataset_version']))
+                review_ids = search_index.search(search_query)
+            
+            page_size = 20
+            # The page number starts over for a new query or selection
+            page = st.session_state.get(f"search_page_{search_query}_{filter_key}", 1)
+            total_matches, results_df = search_results(filtered_df, review_ids, page - 1, page_size)
+            results_df = with_texts(results_df, text_store)
+            
+            if total_matches > 0:
+                page_count = (total_matches - 1) // page_size + 1
+                st.markdown(f"**{total_matches:,}** matching reviews in the current selection (newest first)")
+                st.dataframe(results_df, use_container_width=True, hide_index=True)
+                if page_count > 1:
+                    st.number_input(
+                        f"Page (of {page_count:,})",
+                        min_value=1,
+                        max_value=page_count,
+                        value=1,
+                        key=f"search_page_{search_query}_{filter_key}"
+                    )
+                
+                # Drill down from a result to the most similar reviews in the current selection
+                st.subheader("Similar Reviews")
+                if live_mode:
+                    st.info("Similar reviews are available once the running classification has been merged.")
+                elif not os.path.exists(SIMILARITY_FILE):
+                    st.info("Similar-review index not found. Please run review_similarity.py on the CSV file first.")
+                else:
+                    similarity_index = load_similarity_index(SIMILARITY_FILE, dataset_version(SIMILARITY_FILE))
+                    if os.path.exists(DATA_FILE) and similarity_index.source_version != dataset_version(DATA_FILE):
+                        st.warning("The similar-review index was built from an older version of the data file. Please rebuild it with review_similarity.py.")
+                    else:
+                        selected_review = st.selectbox(
+                            "Find reviews similar to",
+                            list(results_df.index),
+                            format_func=lambda review_id: str(results_df.loc[review_id, 'content_english'])[:120]
+                        )
+                        similar_df = with_texts(similar_reviews(filtered_df, similarity_index, selected_review, k=10), text_store)
+                        if len(similar_df) > 0:
+                            st.dataframe(similar_df.round({'similarity': 3}), use_container_width=True, hide_index=True)
+                        else:
+                            st.info("No similar reviews found in the current selection")
+            else:
+                st.info("No reviews match this search in the current selection")
+        else:
+            st.info("Enter words or a quoted phrase to search the review texts")
+
+# TAB 8: REVIEW BROWSER
+if selected_tab == tabs[7]:
+    st.markdown('<div class="category-header">Review Browser</div>', unsafe_allow_html=True)
+    
+    with st.container():
+        st.subheader("Browse Filtered Reviews")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            sort_label = st.selectbox("Sort by", list(BROWSE_SORT_COLUMNS))
+        with col2:
+            ascending = st.radio("Order", ["Descending", "Ascending"], horizontal=True) == "Ascending"
+        
+        page_size = 20
+        # The page number starts over for a new sort order or selection
+        page_key = f"browse_page_{sort_label}_{ascending}_{filter_key}"
+        page = st.session_state.get(page_key, 1)
+        total_reviews, page_df = review_page(
+            filtered_df, BROWSE_SORT_COLUMNS[sort_label], ascending, page - 1, page_size, cache_key=filter_key
+        )
+        
+        if total_reviews > 0:
+            # Texts are only read for the reviews on this page
+            page_df = with_texts(page_df, text_store)
+            page_count = (total_reviews - 1) // page_size + 1
+            first = (page - 1) * page_size + 1
+            st.markdown(f"Reviews **{first:,}-{first + len(page_df) - 1:,}** of **{total_reviews:,}**")
+            st.dataframe(page_df[[col for col in BROWSE_COLUMNS if col in page_df.columns]],
+                         use_container_width=True, hide_index=True)
+            if page_count > 1:
+                st.number_input(f"Page (of {page_count:,})", min_value=1, max_value=page_count, value=1, key=page_key)
+        else:
+            st.info("No reviews in the current selection")
+
 # Add a section for data download with plain header
+if profile:
+    profile.mark("Export")
 st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
 st.markdown('<div class="sub-header">Export Data</div>', unsafe_allow_html=True)
 
@@ -2425,15 +1467,52 @@ col1, col2 = st.columns(2)
 with col1:
     with st.container():
         st.subheader("Download Filtered Data")
-        st.markdown("Export the current filtered dataset as CSV for further analysis.")
+        st.markdown("Export the current filtered dataset for further analysis.")
         
-        # Allow downloading the filtered dataset
-        st.download_button(
-            label="📥 Download Filtered Data as CSV",
-            data=filtered_df.to_csv(index=False).encode('utf-8'),
-            file_name='filtered_bmw_reviews.csv',
-            mime='text/csv',
+        export_format = st.selectbox(
+            "Format",
+            list(EXPORT_FORMATS),
+            format_func=lambda file_format: EXPORT_FORMATS[file_format][0]
         )
+        # Exports include the review texts, read from the Parquet copy when they are not in memory
+        export_source = text_store.select(**filters) if text_store is not None else filtered_df
+        export_columns = st.multiselect("Columns", list(export_source.columns), default=list(export_source.columns))
+        
+        # The file is only generated on request, written in chunks to a temporary file and
+        # then read back in full for the download button, so its size is capped by MAX_EXPORT_MB
+        export_request = (filter_key, export_format, tuple(export_columns))
+        if st.button("Prepare Export", disabled=not export_columns):
+            st.session_state.pop('export', None)
+            with st.spinner("Preparing export..."):
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    export_path = os.path.join(tmp_dir, 'export' + EXPORT_FORMATS[export_format][1])
+                    try:
+                        export_reviews(export_source, export_path, export_format, export_columns)
+                        export_mb = os.path.getsize(export_path) / 1024 / 1024
+                        if export_mb > MAX_EXPORT_MB:
+                            st.warning(f"The export is {export_mb:,.0f} MB, above the {MAX_EXPORT_MB} MB limit. "
+                                       "Narrow the filters, select fewer columns or choose Parquet.")
+                        else:
+                            with open(export_path, 'rb') as f:
+                                st.session_state['export'] = (export_request, f.read())
+                    except ImportError as e:
+                        st.error(str(e))
+        
+        # Offer the prepared file while the selection and options are unchanged
+        prepared_export = st.session_state.get('export')
+        if prepared_export is not None and prepared_export[0] == export_request:
+            _, extension, mime = EXPORT_FORMATS[export_format]
+            st.download_button(
+                label=f"📥 Download Filtered Data ({len(prepared_export[1]) / 1024 / 1024:.1f} MB)",
+                data=prepared_export[1],
+                file_name='filtered_bmw_reviews' + extension,
+                mime=mime,
+                # Once downloaded, the file no longer needs to be held in the session
+                on_click=lambda: st.session_state.pop('export', None),
+            )
+        elif prepared_export is not None:
+            # Drop an export made for another selection
+            del st.session_state['export']
 
 with col2:
     with st.container():
@@ -2442,25 +1521,41 @@ with col2:
         # Create a summary of current filters
         st.markdown("### Current Filters Applied")
         
+        selected_reviews = cube_view['review_count'].sum()
+        total_reviews = cube['review_count'].sum()
         filter_info = [
-            f"**Total Reviews**: {len(filtered_df):,} out of {len(df):,} ({len(filtered_df)/len(df)*100:.1f}%)"
+            f"**Total Reviews**: {selected_reviews:,} out of {total_reviews:,} ({selected_reviews/total_reviews*100:.1f}%)"
         ]
         
-        if 'date' in df.columns and len(date_range) == 2:
-            filter_info.append(f"**Date Range**: {date_range[0]} to {date_range[1]}")
+        if 'date_range' in filters:
+            filter_info.append(f"**Date Range**: {filters['date_range'][0]} to {filters['date_range'][1]}")
         
-        if 'language' in df.columns and selected_language != 'All':
-            filter_info.append(f"**Language**: {selected_language}")
+        if filters.get('language', 'All') != 'All':
+            filter_info.append(f"**Language**: {filters['language']}")
         
-        if 'score' in df.columns:
-            filter_info.append(f"**Rating Range**: {selected_ratings[0]} to {selected_ratings[1]} stars")
+        if 'rating_range' in filters:
+            filter_info.append(f"**Rating Range**: {filters['rating_range'][0]} to {filters['rating_range'][1]} stars")
         
-        if 'appVersion' in df.columns and selected_version != 'All':
-            filter_info.append(f"**App Version**: {selected_version}")
+        if 'appVersion' in df.columns and filters.get('version', 'All') != 'All':
+            filter_info.append(f"**App Version**: {filters['version']}")
         
         for info in filter_info:
             st.markdown(info)
 
+if profile:
+    # Session-owned frames are counted without the strings they share with the cached dataset
+    profile_record = profile.finish(
+        session=st.session_state.setdefault('profile_session', uuid.uuid4().hex[:8]),
+        dataset_version=df.attrs['dataset_version'],
+        filters=describe_filters(filters),
+        memory={
+            'dataset_bytes': dataset_memory(df, df.attrs['dataset_version']),
+            'session_bytes': ((frame_memory(filtered_df) if filtered_df is not df else 0)
+                              + frame_memory(cube_view) + frame_memory(topic_cube_view)),
+        }
+    )
+    log_profile(profile_record)
+
 # Add footer
 st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
 st.markdown("""
@@ -2468,4 +1563,29 @@ st.markdown("""
     <p>MyBMW App Review Text Mining Dashboard | Created with Streamlit</p>
     <p>This dashboard provides insights derived from text mining and sentiment analysis of user reviews.</p>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+# Debug panel with aggregate cache statistics (rendered last so it includes this run)
+with st.sidebar.expander("Debug"):
+    cache_stats = AGGREGATE_CACHE.stats()
+    lookups = cache_stats['hits'] + cache_stats['misses']
+    st.markdown(f"**Dataset version**: `{df.attrs['dataset_version']}`")
+    if dataset is not None:
+        st.markdown(f"**Last update**: {dataset.last_change}")
+    if preset_snapshot is not None:
+        st.markdown(f"**Preset snapshot**: {cache_stats['pinned']:,} aggregates pinned for {len(preset_snapshot['presets'])} presets")
+    elif SNAPSHOT_FILE is not None and os.path.exists(SNAPSHOT_FILE) and not live_mode:
+        st.markdown("**Preset snapshot**: outdated, rerun dashboard_report.py")
+    st.markdown(f"**Aggregate cache**: {cache_stats['size']} / {cache_stats['maxsize']} entries")
+    st.markdown(f"**Hits / misses**: {cache_stats['hits']:,} / {cache_stats['misses']:,}"
+                + (f" ({cache_stats['hits'] / lookups * 100:.0f}% hit rate)" if lookups else ""))
+
+# Profiling panel (see dashboard_profiling.py); the rerun is timed up to the footer
+if profile:
+    with st.sidebar.expander("Profiling"):
+        cache_run = profile_record['cache']
+        st.markdown(f"**Rerun**: {profile_record['total_seconds'] * 1000:,.0f} ms")
+        st.dataframe(section_table(profile_record).round(1), use_container_width=True)
+        st.markdown(f"**Aggregate cache this rerun**: {cache_run['hits']:,} hits / {cache_run['misses']:,} misses")
+        st.markdown(f"**Dataset memory**: {profile_record['memory']['dataset_bytes'] / 1e6:,.1f} MB (shared)")
+        st.markdown(f"**Session frames**: {profile_record['memory']['session_bytes'] / 1e6:,.1f} MB")
+        st.caption(f"Logged to {PROFILE_LOG}; summarise with `python dashboard_profiling.py`")
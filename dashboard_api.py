@@ -0,0 +1,382 @@
+"""
+Read-only JSON API for the aggregates of the BMW app review dashboard.
+
+Serves the dashboard's numbers to other tools over HTTP, computed with the
+aggregation functions of dashboard_data on the latest consolidated results (see
+results_store). Aggregates are cached per dataset version and filter selection and
+seeded from the preset snapshot of dashboard_report.py; response bodies are cached
+as well. Every response carries an ETag derived from the dataset version and the
+request, so clients revalidating with If-None-Match get a 304 without anything
+being computed.
+
+Endpoints (GET):
+    /api/version                Dataset version, number of reviews and filter presets
+    /api/metrics                Overview metrics
+    /api/sentiment-by-version   Review counts and sentiment shares per app version
+    /api/pain-points            Topics with the most pain-point reviews (limit=10)
+    /api/competitors            Mentions and review sentiment per competitor
+
+Query parameters of the aggregate endpoints (all optional, defaults as in the sidebar):
+    preset=last_30_days  start=2024-01-01  end=2024-06-30  language=German
+    min_rating=1  max_rating=5  version=4.2
+
+Usage:
+    python dashboard_api.py [port]
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from datetime import date
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from dashboard_data import (
+    AGGREGATE_CACHE, AggregateCache, build_review_cube, competitor_counts, competitor_sentiment, count_by,
+    dataset_version, filter_mask, topic_pain_points
+)
+from dashboard_report import (
+    FILTER_PRESETS, load_snapshot, overview_metrics, preset_filters, select_reviews, snapshot_entries, snapshot_path
+)
+from dashboard_sql import ReviewStore, use_sql_backend
+from results_store import RESULTS_DIR, ResultsDataset, latest_results_file
+
+HOST = "127.0.0.1"
+DEFAULT_PORT = 8502
+
+# The results are checked for changes at most this often
+REFRESH_SECONDS = 5
+
+# Response bodies by dataset version and request, shared by all connections
+RESPONSE_CACHE = AggregateCache(maxsize=1024)
+
+FILTER_PARAMETERS = {'preset', 'start', 'end', 'language', 'min_rating', 'max_rating', 'version'}
+
+
+def _to_json(value):
+    """JSON-compatible copy of aggregate results (frames become lists of records, NaN becomes null)"""
+    if hasattr(value, 'to_json'):
+        return json.loads(value.to_json(orient='records', date_format='iso'))
+    if isinstance(value, dict):
+        return {key: _to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    if isinstance(value, date):
+        return value.isoformat()
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def parse_filters(params, cube):
+    """
+    Filter selection of the query parameters.
+
+    Filters that are not given keep the preset's value (the sidebar defaults without
+    a preset), so a request without parameters shares its cached aggregates with
+    the dashboard's default view.
+
+    Args:
+        params: Dict of query parameters
+        cube: Count cube of the full dataset
+
+    Returns:
+        Dict of filter_mask arguments
+
+    Raises:
+        ValueError: For unknown presets, languages and versions and malformed values
+    """
+    preset_name = params.get('preset', 'all_reviews')
+    if preset_name not in FILTER_PRESETS:
+        raise ValueError(f"Unknown preset '{preset_name}' (available: {', '.join(FILTER_PRESETS)})")
+    preset = dict(FILTER_PRESETS[preset_name])
+
+    # Languages and versions must occur in the results, as in the sidebar's choices
+    for param, column in [('language', 'language'), ('version', 'version_str')]:
+        if param not in params:
+            continue
+        if params[param] != 'All' and (column not in cube.columns or params[param] not in set(cube[column].dropna())):
+            raise ValueError(f"Unknown {param} '{params[param]}'")
+        preset[param] = params[param]
+    filters = preset_filters(preset, cube)
+
+    if ('start' in params or 'end' in params) and 'date_range' in filters:
+        start_date, end_date = filters['date_range']
+        try:
+            filters['date_range'] = (date.fromisoformat(params.get('start', start_date.isoformat())),
+                                     date.fromisoformat(params.get('end', end_date.isoformat())))
+        except ValueError:
+            raise ValueError("start and end must be dates in YYYY-MM-DD format")
+
+    if ('min_rating' in params or 'max_rating' in params) and 'rating_range' in filters:
+        min_rating, max_rating = filters['rating_range']
+        try:
+            filters['rating_range'] = (int(params.get('min_rating', min_rating)), int(params.get('max_rating', max_rating)))
+        except ValueError:
+            raise ValueError("min_rating and max_rating must be whole numbers")
+        if filters['rating_range'][0] > filters['rating_range'][1]:
+            raise ValueError("min_rating must not be greater than max_rating")
+    return filters
+
+
+def metrics_endpoint(data, filters, cache_key, params):
+    """Overview metrics of the selection"""
+    df, cube, topic_cube, competitor_table = data
+    # The metrics only look up the columns of the reviews, so they are not selected
+    return overview_metrics(df, cube[filter_mask(cube, **filters)])
+
+
+def sentiment_by_version_endpoint(data, filters, cache_key, params):
+    """Review counts and sentiment shares (percent) per app version"""
+    df, cube, topic_cube, competitor_table = data
+    if not {'appVersion', 'sentiment'} <= set(df.columns):
+        raise LookupError("Sentiment per version is not available in these results")
+    # Same counts as the dashboard's sentiment timeline
+    counts = (
+        count_by(cube[filter_mask(cube, **filters)], ['version_str', 'sentiment'])
+            .unstack(fill_value=0)
+            .reindex(columns=['positive', 'neutral', 'negative'], fill_value=0)
+    )
+    counts = counts[counts.sum(axis=1) > 0]
+    shares = counts.div(counts.sum(axis=1), axis=0) * 100
+    return [
+        {'version': str(version), 'review_count': int(counts.loc[version].sum()),
+         'counts': counts.loc[version].to_dict(), 'shares': shares.loc[version].to_dict()}
+        for version in counts.index
+    ]
+
+
+def pain_points_endpoint(data, filters, cache_key, params):
+    """Topics with the most pain-point reviews"""
+    df, cube, topic_cube, competitor_table = data
+    if not {'topics', 'is_pain_point'} <= set(df.columns):
+        raise LookupError("Pain points are not available in these results")
+    try:
+        limit = int(params.get('limit', 10))
+    except ValueError:
+        raise ValueError("limit must be a whole number")
+    if not 1 <= limit <= 100:
+        raise ValueError("limit must be between 1 and 100")
+    return topic_pain_points(topic_cube[filter_mask(topic_cube, **filters)], top_n=limit, cache_key=cache_key)
+
+
+def competitors_endpoint(data, filters, cache_key, params):
+    """Mentions and review sentiment per allowed competitor, most mentioned first"""
+    df, cube, topic_cube, competitor_table = data
+    if 'competitor_mentioned' not in df.columns:
+        raise LookupError("Competitor mentions are not available in these results")
+    reviews, mentions = select_reviews(df, competitor_table, filters)
+    mention_counts = competitor_counts(mentions, cache_key=cache_key)
+    sentiment = (competitor_sentiment(reviews, mentions, cache_key=cache_key)
+                 if 'sentiment' in df.columns and len(mention_counts) > 0 else None)
+    return [
+        {'competitor': competitor, 'mentions': int(count),
+         'sentiment': sentiment.loc[competitor].to_dict() if sentiment is not None and competitor in sentiment.index else None}
+        for competitor, count in mention_counts.items()
+    ]
+
+
+# Aggregate endpoints: function(data, filters, cache_key, params) and their extra parameters
+ENDPOINTS = {
+    '/api/metrics': (metrics_endpoint, set()),
+    '/api/sentiment-by-version': (sentiment_by_version_endpoint, set()),
+    '/api/pain-points': (pain_points_endpoint, {'limit'}),
+    '/api/competitors': (competitors_endpoint, set()),
+}
+
+
+class AggregatesService:
+    """Latest consolidated results and the cached API responses computed from them."""
+
+    def __init__(self, results_dir=RESULTS_DIR):
+        self.results_dir = results_dir
+        self.dataset = ResultsDataset()
+        self.data = None
+        self.data_file = None
+        self.snapshot_version = None
+        self._checked_at = 0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        data_file = latest_results_file(self.results_dir)
+        if data_file is None:
+            raise FileNotFoundError("No consolidated results found. Please run classification.py first.")
+
+        parquet_file = os.path.splitext(data_file)[0] + '.parquet'
+        if use_sql_backend(parquet_file):
+            # Large results are queried in place, as in the dashboard
+            if self.data is None or self.data[0].attrs['dataset_version'] != dataset_version(parquet_file):
+                store = ReviewStore(parquet_file)
+                cube, topic_cube = build_review_cube(store)
+                self.data = (store, cube, topic_cube, None)
+        else:
+            results = self.dataset.refresh(data_file)
+            self.data = (results.df, results.cube, results.topic_cube, results.competitor_table)
+        self.data_file = data_file
+        self._seed_snapshot()
+
+    def _seed_snapshot(self):
+        """Add the preset aggregates of dashboard_report.py when they match the current results"""
+        version = self.data[0].attrs['dataset_version']
+        snapshot_file = snapshot_path(self.data_file)
+        if version == self.snapshot_version or not os.path.exists(snapshot_file):
+            return
+        snapshot = load_snapshot(snapshot_file)
+        if snapshot['source_version'] == dataset_version(self.data_file):
+            # Pinned, so the presets stay precomputed however many other selections are requested
+            AGGREGATE_CACHE.pin(snapshot_entries(snapshot, version))
+            self.snapshot_version = version
+        else:
+            AGGREGATE_CACHE.pin([])
+
+    def current(self):
+        """
+        Results to answer a request from, checked for changes at most every REFRESH_SECONDS.
+
+        Returns:
+            Tuple of (reviews or ReviewStore, cube, topic cube, competitor table or None)
+        """
+        with self._lock:
+            if self.data is None or time.monotonic() - self._checked_at >= REFRESH_SECONDS:
+                self._load()
+                self._checked_at = time.monotonic()
+            return self.data
+
+    def version_info(self, data):
+        df, cube = data[0], data[1]
+        return {
+            'dataset_version': df.attrs['dataset_version'],
+            'reviews': int(cube['review_count'].sum()),
+            'presets': {name: preset['label'] for name, preset in FILTER_PRESETS.items()},
+        }
+
+    def respond(self, data, path, params):
+        """
+        Body of a GET request as JSON-compatible data.
+
+        Args:
+            data: Results returned by current()
+            path: Endpoint path
+            params: Dict of query parameters
+
+        Raises:
+            KeyError: For unknown paths
+            LookupError: When the results lack the columns of an endpoint
+            ValueError: For invalid query parameters
+        """
+        if path == '/api/version':
+            return self.version_info(data)
+
+        endpoint, extra_parameters = ENDPOINTS[path]
+        unknown = set(params) - FILTER_PARAMETERS - extra_parameters
+        if unknown:
+            raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+        filters = parse_filters(params, data[1])
+        # Same key as the dashboard's aggregates of this selection
+        cache_key = (data[0].attrs['dataset_version'], tuple(sorted(filters.items())))
+        return {
+            'dataset_version': data[0].attrs['dataset_version'],
+            'filters': filters,
+            'data': endpoint(data, filters, cache_key, params),
+        }
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """Answers GET and HEAD requests from the server's AggregatesService."""
+
+    server_version = "BMWReviewAPI/1.0"
+
+    def do_GET(self):
+        self._handle(send_body=True)
+
+    def do_HEAD(self):
+        self._handle(send_body=False)
+
+    def _handle(self, send_body):
+        service = self.server.service
+        url = urlsplit(self.path)
+        path = url.path.rstrip('/') or '/'
+        if path != '/api/version' and path not in ENDPOINTS:
+            self._send_json(HTTPStatus.NOT_FOUND, {'error': f"Unknown endpoint {path}", 'endpoints': ['/api/version', *ENDPOINTS]},
+                            send_body=send_body)
+            return
+
+        try:
+            data = service.current()
+        except FileNotFoundError as e:
+            self._send_json(HTTPStatus.SERVICE_UNAVAILABLE, {'error': str(e)}, send_body=send_body)
+            return
+
+        # Responses only change with the dataset, so version and request identify them
+        query = tuple(sorted(parse_qsl(url.query)))
+        request_key = (data[0].attrs['dataset_version'], path, query)
+        etag = '"' + hashlib.sha1(repr(request_key).encode('utf-8')).hexdigest()[:24] + '"'
+        if etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        try:
+            body = RESPONSE_CACHE.get_or_compute(
+                request_key,
+                lambda: json.dumps(_to_json(service.respond(data, path, dict(query)))).encode('utf-8')
+            )
+        except ValueError as e:
+            self._send_json(HTTPStatus.BAD_REQUEST, {'error': str(e)}, send_body=send_body)
+            return
+        except LookupError as e:
+            self._send_json(HTTPStatus.NOT_FOUND, {'error': str(e)}, send_body=send_body)
+            return
+        except Exception as e:
+            self.log_error("Error answering %s: %s", self.path, e)
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': "Internal error"}, send_body=send_body)
+            return
+        self._send_body(HTTPStatus.OK, body, etag, send_body)
+
+    def _send_json(self, status, payload, send_body=True):
+        self._send_body(status, json.dumps(payload).encode('utf-8'), None, send_body)
+
+    def _send_body(self, status, body, etag, send_body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if etag is not None:
+            self.send_header('ETag', etag)
+            # Clients may keep responses but should revalidate them
+            self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_request(self, code='-', size='-'):
+        # Successful requests are not logged, clients may poll at high rates
+        if not str(code).startswith(('2', '3')):
+            super().log_request(code, size)
+
+
+def serve(port=DEFAULT_PORT, host=HOST, results_dir=RESULTS_DIR):
+    """Run the API until interrupted"""
+    server = ThreadingHTTPServer((host, port), ApiRequestHandler)
+    server.daemon_threads = True
+    server.service = AggregatesService(results_dir)
+    print(f"Serving the review aggregates on http://{host}:{port}/api/version")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 or (len(sys.argv) == 2 and not sys.argv[1].isdigit()):
+        print(__doc__)
+        sys.exit(1)
+    serve(int(sys.argv[1]) if len(sys.argv) == 2 else DEFAULT_PORT)
@@ -0,0 +1,211 @@
+"""
+Scaling benchmark of the dashboard aggregations on synthetic results.
+
+For each size, a synthetic dataset (see synthetic_reviews.py) is generated once and
+loaded the way the dashboard loads it (dashboard_report.load_dataset: DuckDB on the
+Parquet copy for large files when duckdb is installed, pandas otherwise). The filter
+selection, the Overview metrics and the charts of every dashboard section
+(dashboard_report.REPORT_SECTIONS) are then computed headlessly and without the
+aggregate cache, for the default view and for the last 30 days. Every step is timed
+(the fastest of BENCHMARK_REPEATS runs), split into aggregate computation and
+figure construction (see dashboard_profiling), and run once more under tracemalloc
+for its peak memory (memory allocated by DuckDB itself is not included).
+
+With --approximate, the sections are also computed on the stratified sample of
+approximate mode (see review_sample.py), as selections named '<preset> (approximate)'
+after a "Sample" step that draws it.
+
+The results are printed and saved as JSON next to the logs. Given a baseline from an
+earlier run, steps that became more than BENCHMARK_TOLERANCE times slower are listed
+and the script exits with status 1, so it can gate performance changes.
+
+Usage:
+    python dashboard_benchmark.py [--baseline <results json>] [--approximate] [rows ...]
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+from dashboard_data import filter_mask
+from dashboard_profiling import RerunProfile
+from dashboard_report import (
+    FILTER_PRESETS, REPORT_SECTIONS, load_dataset, overview_metrics, preset_filters, report_selection, select_reviews
+)
+from dashboard_sql import ReviewStore, duckdb, write_parquet
+from review_sample import draw_sample
+from synthetic_reviews import synthetic_results_path, write_synthetic_results
+
+BENCHMARK_DIR = os.path.join("bmw_app_analysis", "logs")
+
+# Dataset sizes benchmarked by default
+BENCHMARK_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+
+# Filter presets each size is benchmarked with
+BENCHMARK_PRESETS = ['all_reviews', 'last_30_days']
+
+# Timed runs per step; the fastest counts, which keeps one-off delays out of the comparison
+BENCHMARK_REPEATS = 3
+
+# Steps slower than this factor of the baseline count as regressions
+BENCHMARK_TOLERANCE = 1.5
+
+# Differences below this many seconds are treated as noise
+BENCHMARK_MIN_SECONDS = 0.1
+
+
+def run_step(func, trace_memory=True, repeat=BENCHMARK_REPEATS):
+    """
+    Run `func` `repeat` times timed and, with `trace_memory`, once more under tracemalloc.
+
+    Returns:
+        Tuple of (result of the last timed run, dict with seconds, compute_seconds and
+        figures_seconds of the fastest run and peak_mb)
+    """
+    step = None
+    for _ in range(repeat):
+        profile = RerunProfile()
+        profile.mark("step")
+        result = func()
+        section = profile.finish()['sections'][0]
+        if step is None or section['seconds'] < step['seconds']:
+            step = {'seconds': section['seconds'], 'compute_seconds': section['compute'],
+                    'figures_seconds': section['figures'], 'peak_mb': None}
+
+    if trace_memory:
+        tracemalloc.start()
+        try:
+            func()
+            step['peak_mb'] = tracemalloc.get_traced_memory()[1] / 1e6
+        finally:
+            tracemalloc.stop()
+    return result, step
+
+
+def prepare_dataset(n_rows, seed=0):
+    """Synthetic results of `n_rows` reviews (and their Parquet copy with duckdb), generated once"""
+    csv_path = synthetic_results_path(n_rows)
+    if not os.path.exists(csv_path):
+        print(f"Generating {n_rows:,} synthetic reviews...")
+        write_synthetic_results(csv_path, n_rows, seed=seed)
+    parquet_path = os.path.splitext(csv_path)[0] + '.parquet'
+    if duckdb is not None and not os.path.exists(parquet_path):
+        write_parquet(csv_path, parquet_path)
+    return csv_path
+
+
+def benchmark_size(n_rows, trace_memory=True, approximate=False):
+    """
+    Benchmark loading and every dashboard section on a synthetic dataset.
+
+    With `approximate`, every preset is benchmarked once more on the review sample.
+
+    Returns:
+        List of records with rows, backend, selection, step, seconds, compute_seconds,
+        figures_seconds and peak_mb
+    """
+    csv_path = prepare_dataset(n_rows)
+    (df, cube, topic_cube, competitor_table), load_step = run_step(lambda: load_dataset(csv_path), trace_memory, repeat=1)
+    backend = 'duckdb' if isinstance(df, ReviewStore) else 'pandas'
+    records = [{'rows': n_rows, 'backend': backend, 'selection': None, 'step': "Load", **load_step}]
+
+    selections = [(preset_name, None) for preset_name in BENCHMARK_PRESETS]
+    if approximate:
+        review_sample, sample_step = run_step(lambda: draw_sample(df, cube), trace_memory, repeat=1)
+        records.append({'rows': n_rows, 'backend': backend, 'selection': None, 'step': "Sample", **sample_step})
+        selections += [(preset_name, review_sample) for preset_name in BENCHMARK_PRESETS]
+
+    for preset_name, review_sample in selections:
+        def select():
+            filters = preset_filters(FILTER_PRESETS[preset_name], cube)
+            reviews, mentions = select_reviews(df, competitor_table, filters)
+            if review_sample is not None:
+                reviews = review_sample.select(**filters)
+            return report_selection(reviews, mentions, cube, cube[filter_mask(cube, **filters)],
+                                    topic_cube[filter_mask(topic_cube, **filters)])
+
+        sel, step = run_step(select, trace_memory)
+        steps = [("Filters", step)]
+        steps.append(("Overview", run_step(lambda: overview_metrics(sel['reviews'], sel['cube_view']), trace_memory)[1]))
+        for section, section_charts in REPORT_SECTIONS.items():
+            steps.append((section, run_step(lambda: section_charts(sel), trace_memory)[1]))
+
+        selection = preset_name if review_sample is None else f"{preset_name} (approximate)"
+        records += [{'rows': n_rows, 'backend': backend, 'selection': selection, 'step': name, **step}
+                    for name, step in steps]
+    return records
+
+
+def compare_to_baseline(records, baseline, tolerance=BENCHMARK_TOLERANCE, min_seconds=BENCHMARK_MIN_SECONDS):
+    """
+    Steps that became slower than `tolerance` times their time in `baseline`.
+
+    Returns:
+        List of readable regression descriptions
+    """
+    def key(record):
+        return record['rows'], record['backend'], record['selection'], record['step']
+
+    baseline_seconds = {key(record): record['seconds'] for record in baseline}
+    regressions = []
+    for record in records:
+        previous = baseline_seconds.get(key(record))
+        if previous is None:
+            continue
+        if record['seconds'] > previous * tolerance and record['seconds'] - previous > min_seconds:
+            rows, backend, selection, step = key(record)
+            regressions.append(f"{step} ({rows:,} rows, {backend}, {selection or 'load'}): "
+                               f"{previous:.3f}s -> {record['seconds']:.3f}s")
+    return regressions
+
+
+def write_results(records, output_dir=BENCHMARK_DIR):
+    """Save benchmark records as benchmark_<timestamp>.json and return the path"""
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(records, f, indent=2)
+    return path
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    baseline_file = None
+    if args[:1] == ['--baseline']:
+        if len(args) < 2:
+            print(__doc__)
+            sys.exit(1)
+        baseline_file, args = args[1], args[2:]
+    approximate = args[:1] == ['--approximate']
+    if approximate:
+        args = args[1:]
+    if not all(arg.isdigit() for arg in args):
+        print(__doc__)
+        sys.exit(1)
+
+    all_records = []
+    for size in [int(arg) for arg in args] or BENCHMARK_SIZES:
+        started = time.perf_counter()
+        size_records = benchmark_size(size, approximate=approximate)
+        all_records += size_records
+        print(f"Benchmarked {size:,} reviews ({size_records[0]['backend']}) in {time.perf_counter() - started:.1f}s")
+
+    table = pd.DataFrame(all_records)
+    with pd.option_context('display.width', 200, 'display.max_columns', None, 'display.max_rows', None):
+        print(table.round(3).to_string(index=False))
+    print(f"Saved {write_results(all_records)}")
+
+    if baseline_file is not None:
+        with open(baseline_file, encoding='utf-8') as f:
+            regressions = compare_to_baseline(all_records, json.load(f))
+        if regressions:
+            print(f"{len(regressions)} steps slower than {BENCHMARK_TOLERANCE}x the baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("No regressions against the baseline")
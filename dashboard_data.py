@@ -0,0 +1,935 @@
+"""
+Data preparation helpers for the BMW app review dashboard.
+
+Kept free of Streamlit so the same logic can be used outside the app. Aggregates
+over review rows are single-dispatch functions: they take a pandas DataFrame here,
+and dashboard_sql registers SQL implementations for its DuckDB review selections.
+"""
+
+import functools
+import gzip
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from dashboard_profiling import timed
+
+# pyarrow is only needed for Parquet exports
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Label columns with a small, fixed set of values
+LABEL_COLUMNS = [
+    'language', 'sentiment', 'vehicle_type', 'user_experience',
+    'usage_profile', 'is_pain_point', 'is_feature_request'
+]
+
+# Free-text review columns (with a Parquet copy, only read for the reviews on screen)
+TEXT_COLUMNS = ['content_english', 'content']
+
+# Allowed competitors (automobile manufacturers only)
+ALLOWED_COMPETITORS = [
+    'mercedes', 'tesla', 'audi', 'volvo', 'volkswagen', 'dacia', 'peugeot',
+    'škoda', 'mini', 'kia', 'renault', 'ford', 'land rover', 'toyota',
+    'citroën', 'jaguar', 'porsche', 'seat', 'fiat', 'lexus', 'cupra',
+    'smart', 'opel', 'chevrolet', 'mazda', 'polestar', 'yugo', 'hyundai',
+    'nissan', 'alpina'
+]
+
+# Mapping for variant competitor names
+COMPETITOR_VARIANTS = {
+    'vw': 'volkswagen',
+    'skoda': 'škoda',
+    'citroen': 'citroën'
+}
+
+
+def version_sort_key(version):
+    """Sort key for a 'major.minor' version string (so that 4.10 comes after 4.9)"""
+    major, minor = version.split('.')
+    return int(major), int(minor)
+
+
+def yes_mask(series):
+    """Boolean mask for yes/no label columns (also accepts boolean columns)"""
+    if series.dtype == bool:
+        return series
+    return series.astype(str).str.lower() == 'yes'
+
+
+# Separators between several competitors named in one competitor_mentioned value
+COMPETITOR_SEPARATORS = r'\s+and\s+|\s*,\s*|\s*&\s*|\s+plus\s+|\s+with\s+'
+
+
+def build_competitor_table(df):
+    """
+    Long-format table of allowed competitor mentions, parsed once from 'competitor_mentioned'.
+
+    Names are lower-cased, split on compound separators ("tesla and audi"), mapped
+    from variant spellings and restricted to ALLOWED_COMPETITORS.
+
+    Returns:
+        DataFrame indexed like `df` (one row per mention) with review_id and competitor columns
+    """
+    if 'competitor_mentioned' not in df.columns:
+        return pd.DataFrame({'review_id': [], 'competitor': pd.Categorical([], categories=ALLOWED_COMPETITORS)})
+
+    names = (
+        df['competitor_mentioned'].dropna().astype(str).str.lower()
+            .str.split(COMPETITOR_SEPARATORS, regex=True)
+            .explode()
+            .str.strip()
+            .replace(COMPETITOR_VARIANTS)
+    )
+    names = names[names.isin(ALLOWED_COMPETITORS)]
+
+    review_ids = df.loc[names.index, 'reviewId'].to_numpy() if 'reviewId' in df.columns else names.index.to_numpy()
+    return pd.DataFrame({
+        'review_id': review_ids,
+        'competitor': pd.Categorical(names, categories=ALLOWED_COMPETITORS)
+    }, index=names.index)
+
+
+def rows_of(table, reviews):
+    """Rows of a review-indexed table (e.g. the competitor table) that belong to `reviews`"""
+    return table[table.index.isin(reviews.index)]
+
+
+def add_derived_columns(df):
+    """
+    Precompute the per-review columns used by several dashboard sections.
+
+    - 'star_rating': score rounded into the 1-to-5 range (missing without a score)
+    - 'review_length': number of characters in the original review
+    - 'has_allowed_competitor': whether the review names an allowed competitor
+    """
+    if 'score' in df.columns:
+        df['star_rating'] = df['score'].round().clip(1, 5).astype('Int64')
+
+    if 'content' in df.columns:
+        df['review_length'] = df['content'].astype(str).str.len()
+
+    if 'competitor_mentioned' in df.columns:
+        df['has_allowed_competitor'] = df.index.isin(build_competitor_table(df).index)
+
+    return df
+
+
+def normalize_reviews(df):
+    """
+    Normalise the consolidated results once at load time.
+
+    - 'date' is parsed to datetime
+    - 'version_str' holds the major.minor app version as an ordered categorical
+      and 'version_num' a numeric key that sorts versions correctly
+    - label columns are converted to categoricals
+    """
+    if 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date'], errors='coerce')
+
+    if 'appVersion' in df.columns:
+        # Extract major.minor version
+        version_str = df['appVersion'].astype(str).str.extract(r'^(\d+\.\d+)', expand=False)
+        versions = sorted(version_str.dropna().unique(), key=version_sort_key)
+        df['version_str'] = pd.Categorical(version_str, categories=versions, ordered=True)
+
+        # Numeric key: major + minor / 1000 keeps e.g. 4.9 < 4.10
+        parts = version_str.str.split('.', expand=True)
+        if parts.shape[1] == 2:
+            df['version_num'] = pd.to_numeric(parts[0]) + pd.to_numeric(parts[1]) / 1000
+        else:
+            df['version_num'] = np.nan
+
+    for col in LABEL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+
+    return df
+
+
+# Dimensions of the pre-aggregated review cube (dates are bucketed by day)
+CUBE_DIMENSIONS = [
+    'date', 'language', 'score', 'version_str', 'sentiment',
+    'is_pain_point', 'is_feature_request', 'has_allowed_competitor'
+]
+
+
+def split_topics(df):
+    """Explode the comma-separated 'topics' column into one row per (review, topic)"""
+    topics = df['topics'].dropna().str.split(',').explode().str.strip()
+    return df.loc[topics.index].assign(topic=topics.values)
+
+
+def _aggregate_counts(df, dimensions):
+    """Count reviews per combination of the given dimensions (missing values kept as their own group)"""
+    cube = df.groupby(dimensions, observed=True, dropna=False, sort=False).size().rename('review_count').reset_index()
+    return add_cube_keys(cube)
+
+
+def add_cube_keys(cube):
+    """Add derived keys (star_rating, version_num) so that cube rows can be filtered and grouped like review rows"""
+    if 'score' in cube.columns:
+        cube['star_rating'] = cube['score'].round().clip(1, 5).astype('Int64')
+    if 'version_str' in cube.columns:
+        version_str = cube['version_str']
+        # Parse each distinct version once when they are categories
+        values = version_str.cat.categories.to_series() if isinstance(version_str.dtype, pd.CategoricalDtype) else version_str
+        versions = values.astype(str).str.split('.', expand=True)
+        if versions.shape[1] == 2:
+            version_num = pd.to_numeric(versions[0], errors='coerce') + pd.to_numeric(versions[1], errors='coerce') / 1000
+        else:
+            version_num = pd.Series(np.nan, index=values.index)
+        if isinstance(version_str.dtype, pd.CategoricalDtype):
+            codes = version_str.cat.codes.to_numpy()
+            version_num = np.where(codes >= 0, version_num.to_numpy()[codes], np.nan)
+        cube['version_num'] = version_num
+    return cube
+
+
+@functools.singledispatch
+def build_review_cube(df):
+    """
+    Pre-aggregate the reviews into count cubes used to answer the dashboard metrics.
+
+    Args:
+        df: Normalised reviews (see normalize_reviews and add_derived_columns)
+
+    Returns:
+        Tuple of (review cube, topic cube). The review cube counts reviews per
+        day × language × score × version × sentiment × flag combination; the topic
+        cube adds a 'topic' dimension, with one entry per topic a review mentions.
+    """
+    dimensions = [col for col in CUBE_DIMENSIONS if col in df.columns]
+    keyed = df[dimensions + (['topics'] if 'topics' in df.columns else [])]
+    if 'date' in keyed.columns:
+        keyed = keyed.assign(date=keyed['date'].dt.floor('D'))
+
+    cube = _aggregate_counts(keyed, dimensions)
+
+    if 'topics' in keyed.columns:
+        topic_cube = _aggregate_counts(split_topics(keyed), dimensions + ['topic'])
+    else:
+        topic_cube = pd.DataFrame(columns=dimensions + ['topic', 'review_count'])
+
+    return cube, topic_cube
+
+
+@timed('compute')
+def filter_mask(frame, date_range=None, language='All', rating_range=None, version='All'):
+    """
+    Boolean mask for the sidebar filters; works on review rows and on cube rows alike.
+
+    Args:
+        frame: Reviews or a cube built by build_review_cube
+        date_range: (start, end) dates, both inclusive, or None for all dates
+        language: Language label or 'All'
+        rating_range: (min, max) score, both inclusive, or None for all scores
+        version: Major.minor app version or 'All'
+
+    Returns:
+        Numpy boolean array aligned with the rows of `frame`
+    """
+    mask = np.ones(len(frame), dtype=bool)
+
+    if date_range is not None and 'date' in frame.columns:
+        start_date, end_date = date_range
+        mask &= ((frame['date'] >= pd.Timestamp(start_date)) &
+                 (frame['date'] < pd.Timestamp(end_date) + pd.Timedelta(days=1))).to_numpy()
+
+    if language != 'All' and 'language' in frame.columns:
+        mask &= (frame['language'] == language).to_numpy()
+
+    if rating_range is not None and 'score' in frame.columns:
+        mask &= ((frame['score'] >= rating_range[0]) & (frame['score'] <= rating_range[1])).to_numpy()
+
+    if version != 'All' and 'version_str' in frame.columns:
+        mask &= (frame['version_str'] == version).to_numpy()
+
+    return mask
+
+
+@timed('compute')
+def count_by(cube, columns):
+    """Number of reviews per value (or combination of values) of the given cube columns"""
+    return cube.groupby(columns, observed=True)['review_count'].sum()
+
+
+@timed('compute')
+def mean_score(cube, by=None):
+    """
+    Average score from a cube, ignoring reviews without a score.
+
+    Returns a float, or a DataFrame with 'mean' and 'count' columns when grouped `by` a column.
+    """
+    scored = cube[cube['score'].notna()]
+    weighted = scored.assign(score_sum=scored['score'] * scored['review_count'])
+    if by is None:
+        total = weighted['review_count'].sum()
+        return weighted['score_sum'].sum() / total if total else np.nan
+
+    sums = weighted.groupby(by, observed=True)[['score_sum', 'review_count']].sum()
+    return pd.DataFrame({
+        'mean': sums['score_sum'] / sums['review_count'],
+        'count': sums['review_count']
+    })
+
+
+def weighted_median(values, weights):
+    """Median of `values` repeated `weights` times (same convention as pandas for even counts)"""
+    order = np.argsort(values, kind='stable')
+    values = np.asarray(values)[order]
+    cumulative = np.cumsum(np.asarray(weights)[order])
+    total = cumulative[-1] if len(cumulative) else 0
+    if total == 0:
+        return np.nan
+
+    lower = values[np.searchsorted(cumulative, (total - 1) // 2, side='right')]
+    upper = values[np.searchsorted(cumulative, total // 2, side='right')]
+    return (lower + upper) / 2
+
+
+@timed('compute')
+def improvement_index(cube):
+    """
+    Relative change in the share of positive reviews between recent and earlier versions.
+
+    Versions at or above the median version (over all reviews with a version) count
+    as recent. Returns the change in percent, or None if it cannot be computed.
+    """
+    versioned = cube[cube['version_num'].notna()]
+    if versioned['review_count'].sum() == 0:
+        return None
+
+    median_version = weighted_median(versioned['version_num'].to_numpy(), versioned['review_count'].to_numpy())
+    recent = versioned['version_num'] >= median_version
+    positive = versioned['sentiment'] == 'positive'
+
+    def positive_share(period):
+        total = versioned.loc[period, 'review_count'].sum()
+        return versioned.loc[period & positive, 'review_count'].sum() / total if total else np.nan
+
+    newer_score = positive_share(recent)
+    older_score = positive_share(~recent)
+    if not older_score > 0:
+        return None
+    return (newer_score - older_score) / older_score * 100
+
+
+def dataset_version(path):
+    """Identifier of a data file's current contents (name, size and modification time)"""
+    stat = os.stat(path)
+    return f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class AggregateCache:
+    """
+    Bounded LRU cache for aggregate results, shared by all dashboard sessions.
+
+    Pinned entries (e.g. a preset snapshot) are looked up first and never evicted.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._pinned = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._pinned:
+                self.hits += 1
+                return self._pinned[key]
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def items(self):
+        """(key, value) pairs of the pinned and then the cached results, least recently used first"""
+        with self._lock:
+            return list(self._pinned.items()) + list(self._entries.items())
+
+    def pin(self, entries):
+        """
+        Keep precomputed (key, value) pairs, e.g. from a snapshot written by dashboard_report.
+
+        They replace the previously pinned entries and do not count towards `maxsize`.
+        """
+        with self._lock:
+            self._pinned = dict(entries)
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize,
+                    'pinned': len(self._pinned)}
+
+    def clear(self):
+        with self._lock:
+            self._pinned = {}
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+AGGREGATE_CACHE = AggregateCache()
+
+
+def memoized_aggregate(func):
+    """
+    Cache an aggregate function of the form func(frame, *args, **kwargs).
+
+    Callers pass `cache_key` (dataset version and filter selection) identifying the
+    frame and any further frames derived from the same selection; the remaining
+    arguments are part of the key. Without `cache_key` the function is simply called.
+    Cached results are shared between sessions and must not be modified. Calls are
+    timed as 'compute' when the dashboard is profiled.
+    """
+    def is_frame(value):
+        return isinstance(value, (pd.DataFrame, pd.Series))
+
+    @functools.wraps(func)
+    def wrapper(frame, *args, cache_key=None, **kwargs):
+        if cache_key is None:
+            return func(frame, *args, **kwargs)
+        key = (func.__name__, cache_key,
+               tuple(arg for arg in args if not is_frame(arg)),
+               tuple(sorted((name, value) for name, value in kwargs.items() if not is_frame(value))))
+        return AGGREGATE_CACHE.get_or_compute(key, lambda: func(frame, *args, **kwargs))
+    return timed('compute')(wrapper)
+
+
+@memoized_aggregate
+def rating_distribution(cube):
+    """Number of reviews per star rating (ratings without reviews left out)"""
+    counts = count_by(cube, 'star_rating')
+    return counts[counts > 0]
+
+
+@memoized_aggregate
+def topic_pain_points(topic_cube, top_n=10):
+    """
+    Topics with the most reviews flagged as pain points.
+
+    Returns:
+        DataFrame with topic, pain_point_count, review_count and pain_point_pct
+        columns for the `top_n` topics with the most pain points
+    """
+    review_counts = count_by(topic_cube, 'topic')
+    pain_counts = count_by(topic_cube[yes_mask(topic_cube['is_pain_point']).to_numpy()], 'topic')
+    pain_counts = pain_counts[pain_counts > 0].sort_values(ascending=False, kind='stable').head(top_n)
+    return pd.DataFrame({
+        'topic': pain_counts.index.astype(str),
+        'pain_point_count': pain_counts.to_numpy(),
+        'review_count': review_counts.reindex(pain_counts.index).to_numpy(),
+        'pain_point_pct': (pain_counts / review_counts.reindex(pain_counts.index) * 100).to_numpy()
+    })
+
+
+@memoized_aggregate
+def sentiment_by_rating(cube):
+    """Review counts per star rating (rows) and sentiment (positive, neutral, negative columns)"""
+    return (
+        count_by(cube, ['star_rating', 'sentiment'])
+            .unstack(fill_value=0)
+            .reindex(columns=['positive', 'neutral', 'negative'], fill_value=0)
+    )
+
+
+@memoized_aggregate
+@functools.singledispatch
+def topic_polarity_change(reviews, top_n=10, min_reviews=20):
+    """
+    Change in sentiment polarity per topic between recent and earlier app versions.
+
+    Versions at or above the median version count as recent. Only the `top_n` most
+    mentioned topics with at least `min_reviews` reviews are included, and a review
+    counts once for each of its topics.
+
+    Returns:
+        DataFrame with topic, recent_polarity, earlier_polarity, change, review_count
+        and abs_change columns, sorted by absolute change
+    """
+    version_df = reviews.dropna(subset=['version_str'])
+    recent = version_df['version_num'] >= version_df['version_num'].median()
+    direction = (version_df['sentiment'] == 'positive').astype(int) - (version_df['sentiment'] == 'negative').astype(int)
+
+    top_topics = split_topics(version_df)['topic'].value_counts().head(top_n).index.tolist()
+
+    pairs = review_topics(version_df.assign(recent=recent, direction=direction), ['recent', 'direction'])
+    pairs = pairs[pairs['topic'].isin(top_topics)]
+    sums = pairs.assign(
+        earlier=~pairs['recent'],
+        recent_direction=pairs['direction'].where(pairs['recent'], 0),
+        earlier_direction=pairs['direction'].where(~pairs['recent'], 0)
+    ).groupby('topic')[['recent', 'earlier', 'recent_direction', 'earlier_direction']].sum()
+    sums['review_count'] = sums['recent'] + sums['earlier']
+    sums = sums.reindex(top_topics)
+    sums = sums[sums['review_count'] >= min_reviews]
+
+    # A version half without reviews of the topic has a polarity of 0
+    polarity_df = pd.DataFrame({
+        'topic': sums.index,
+        'recent_polarity': (sums['recent_direction'] / sums['recent']).fillna(0).to_numpy(),
+        'earlier_polarity': (sums['earlier_direction'] / sums['earlier']).fillna(0).to_numpy(),
+        'review_count': sums['review_count'].astype(int).to_numpy()
+    })
+    polarity_df.insert(3, 'change', polarity_df['recent_polarity'] - polarity_df['earlier_polarity'])
+    return sort_by_abs_change(polarity_df)
+
+
+def sort_by_abs_change(polarity_df):
+    """Add an 'abs_change' column and sort topics by it, largest change first"""
+    polarity_df['abs_change'] = polarity_df['change'].abs()
+    return polarity_df.sort_values('abs_change', ascending=False)
+
+
+def review_topics(reviews, columns=()):
+    """
+    One row per (review, topic) pair, with each topic counted once per review.
+
+    Args:
+        reviews: Reviews with a 'topics' column
+        columns: Review columns to carry along with each pair
+
+    Returns:
+        DataFrame indexed like `reviews` with a 'topic' column plus `columns`
+    """
+    pairs = split_topics(reviews[['topics', *columns]])
+    duplicated = pd.MultiIndex.from_arrays([pairs.index, pairs['topic']]).duplicated()
+    return pairs.loc[~duplicated].drop(columns='topics')
+
+
+@memoized_aggregate
+@functools.singledispatch
+def topic_version_polarity(reviews, top_n=10, min_topic_reviews=50, min_reviews=10, min_versions=3):
+    """
+    Sentiment polarity per topic and app version.
+
+    Covers the `top_n` most mentioned topics with at least `min_topic_reviews` reviews;
+    a topic/version pair needs `min_reviews` reviews and a topic needs `min_versions`
+    such versions to be included.
+
+    Returns:
+        DataFrame with topic, version_str and polarity columns, in version order per topic
+    """
+    topic_counts = split_topics(reviews)['topic'].value_counts()
+    significant_topics = topic_counts[topic_counts >= min_topic_reviews].head(top_n).index.tolist()
+
+    pairs = review_topics(reviews, ['version_str', 'sentiment'])
+    pairs = pairs[pairs['topic'].isin(significant_topics) & pairs['version_str'].notna()]
+
+    # +1 per positive and -1 per negative review, so the group mean is the polarity
+    direction = (pairs['sentiment'] == 'positive').astype(int) - (pairs['sentiment'] == 'negative').astype(int)
+    grouped = direction.groupby([pairs['topic'], pairs['version_str']], observed=True).agg(['mean', 'size'])
+    return version_polarity_table(grouped, significant_topics, min_reviews, min_versions)
+
+
+def version_polarity_table(grouped, significant_topics, min_reviews=10, min_versions=3):
+    """
+    Finish topic_version_polarity from per topic/version polarity.
+
+    Args:
+        grouped: DataFrame indexed by (topic, version_str) in version order per topic,
+            with 'mean' (polarity) and 'size' (number of reviews) columns
+        significant_topics: Topics to consider, in display order
+    """
+    grouped = grouped[grouped['size'] >= min_reviews]
+
+    versions_per_topic = grouped.groupby(level='topic').size()
+    kept_topics = [t for t in significant_topics if versions_per_topic.get(t, 0) >= min_versions]
+
+    polarity = grouped['mean'].rename('polarity').reset_index()
+    polarity = polarity[polarity['topic'].isin(kept_topics)]
+    polarity['version_str'] = polarity['version_str'].astype(str)
+    polarity['topic'] = pd.Categorical(polarity['topic'], categories=kept_topics)
+    polarity = polarity.sort_values('topic', kind='stable')
+    polarity['topic'] = polarity['topic'].astype(str)
+    return polarity[['topic', 'version_str', 'polarity']].reset_index(drop=True)
+
+
+@memoized_aggregate
+@functools.singledispatch
+def language_topic_ratings(reviews, top_languages=10, top_topics=10):
+    """
+    Average rating (rounded to one decimal) per topic and language.
+
+    Returns:
+        DataFrame indexed by the most mentioned topics with one column per most
+        frequent language; combinations without reviews are NaN
+    """
+    language_counts = reviews['language'].value_counts()
+    languages = language_counts[language_counts > 0].head(top_languages).index.tolist()
+    topics = split_topics(reviews)['topic'].value_counts().head(top_topics).index.tolist()
+
+    pairs = review_topics(reviews, ['language', 'score'])
+    pairs = pairs[pairs['topic'].isin(topics) & pairs['language'].isin(languages)]
+    mean_ratings = pairs.groupby(['topic', 'language'], observed=True)['score'].mean().unstack()
+    return rating_matrix(mean_ratings, topics, languages)
+
+
+def rating_matrix(mean_ratings, topics, languages):
+    """Mean ratings (topics × languages) reindexed to the given order and rounded to one decimal"""
+    mean_ratings = mean_ratings.reindex(index=topics, columns=languages).round(1)
+
+    return pd.DataFrame(mean_ratings.to_numpy(dtype=float), index=topics, columns=languages)
+
+
+@memoized_aggregate
+@functools.singledispatch
+def competitor_counts(mentions):
+    """Number of mentions per allowed competitor, most mentioned first"""
+    counts = mentions['competitor'].value_counts()
+    counts = counts[counts > 0]
+    counts.index = counts.index.astype(str)
+    return counts
+
+
+@memoized_aggregate
+@functools.singledispatch
+def topic_competitor_rates(reviews, mentions, min_reviews=30):
+    """
+    Share of reviews per topic that mention an allowed competitor.
+
+    Args:
+        reviews: Reviews of the current selection
+        mentions: Competitor table rows of the same reviews (see build_competitor_table)
+        min_reviews: Minimum number of reviews for a topic to be included
+
+    Returns:
+        DataFrame with topic, competitor_mention_rate (percent), review_count and
+        top_competitor columns
+    """
+    pairs = review_topics(reviews, ['has_allowed_competitor'])
+    per_topic = pairs.groupby('topic', sort=False)['has_allowed_competitor'].agg(['mean', 'size'])
+    per_topic = per_topic[(per_topic['size'] >= min_reviews) & (per_topic['mean'] > 0)]
+
+    # Most mentioned competitor per topic
+    topic_mentions = pairs[['topic']].join(mentions[['competitor']], how='inner')
+    top_competitor = (
+        topic_mentions.groupby(['topic', 'competitor'], observed=True).size()
+            .rename('mentions').reset_index()
+            .sort_values('mentions', ascending=False, kind='stable')
+            .drop_duplicates('topic')
+            .set_index('topic')['competitor'].astype(str).str.title()
+    )
+
+    return pd.DataFrame({
+        'topic': per_topic.index,
+        'competitor_mention_rate': (per_topic['mean'] * 100).to_numpy(),
+        'review_count': per_topic['size'].to_numpy(),
+        'top_competitor': top_competitor.reindex(per_topic.index).to_numpy()
+    })
+
+
+@memoized_aggregate
+@functools.singledispatch
+def competitor_sentiment(reviews, mentions):
+    """
+    Sentiment of the reviews mentioning each competitor.
+
+    Returns:
+        DataFrame indexed by competitor (most mentioned first) with positive, neutral
+        and negative review counts
+    """
+    mention_sentiment = mentions[['competitor']].join(reviews[['sentiment']], how='inner')
+    counts = (
+        mention_sentiment.groupby(['competitor', 'sentiment'], observed=True).size()
+            .unstack(fill_value=0)
+            .reindex(columns=['positive', 'neutral', 'negative'], fill_value=0)
+    )
+    counts.index = counts.index.astype(str)
+    return counts.loc[counts.sum(axis=1).sort_values(ascending=False, kind='stable').index]
+
+
+@memoized_aggregate
+@functools.singledispatch
+def topic_sentiment_counts(reviews, min_reviews=20):
+    """
+    Review counts per sentiment for each topic with at least `min_reviews` reviews.
+
+    A review counts once for each of its topics.
+
+    Returns:
+        DataFrame indexed by topic with one column per sentiment (at least positive,
+        neutral and negative)
+    """
+    pairs = review_topics(reviews, ['sentiment'])
+    topic_sizes = pairs['topic'].value_counts(sort=False)
+    topics = topic_sizes.index[topic_sizes >= min_reviews]
+
+    counts = (
+        pairs[pairs['topic'].isin(topics)].groupby(['topic', 'sentiment'], sort=False, observed=True).size()
+            .unstack(fill_value=0)
+            .reindex(topics, fill_value=0)
+    )
+    counts.columns = counts.columns.astype(str)
+    counts = counts.rename_axis(index=None, columns=None)
+
+    # Ensure all sentiments are present
+    for sentiment in ['positive', 'neutral', 'negative']:
+        if sentiment not in counts.columns:
+            counts[sentiment] = 0
+    return counts
+
+
+@memoized_aggregate
+@functools.singledispatch
+def topic_review_lengths(reviews, min_reviews=20):
+    """
+    Review length statistics for each topic with at least `min_reviews` reviews.
+
+    A review counts once for each of its topics.
+
+    Returns:
+        DataFrame with topic, avg_length, median_length and review_count columns
+    """
+    pairs = review_topics(reviews, ['review_length'])
+    lengths = pairs.groupby('topic', sort=False)['review_length'].agg(
+        avg_length='mean', median_length='median', review_count='size'
+    )
+    return lengths[lengths['review_count'] >= min_reviews].reset_index()
+
+
+@memoized_aggregate
+@functools.singledispatch
+def mean_review_length(reviews):
+    """Average review length in characters"""
+    return reviews['review_length'].mean()
+
+
+# Sort options of the review browser and the columns it shows
+BROWSE_SORT_COLUMNS = {'Date': 'date', 'Rating': 'score', 'Length': 'review_length'}
+BROWSE_COLUMNS = ['date', 'language', 'score', 'sentiment', 'topics', 'review_length'] + TEXT_COLUMNS
+
+
+@memoized_aggregate
+@functools.singledispatch
+def review_page(reviews, sort_by='date', ascending=False, page=0, page_size=20):
+    """
+    One page of the selected reviews sorted by `sort_by`.
+
+    Reviews without a value come last and ties keep the review id order.
+
+    Returns:
+        Tuple of (number of selected reviews, DataFrame of the page indexed by review id)
+    """
+    order = reviews[sort_by].sort_values(ascending=ascending, kind='stable', na_position='last').index
+    return len(reviews), reviews.loc[order[page * page_size:(page + 1) * page_size]]
+
+
+@memoized_aggregate
+@functools.singledispatch
+def topic_version_counts(reviews):
+    """
+    Review counts per topic and app version (reviews without a version kept as a NaN version).
+
+    Returns:
+        DataFrame indexed by (topic, version_str) with reviews, negative and
+        feature_requests columns
+    """
+    pairs = review_topics(reviews, ['version_str', 'sentiment', 'is_feature_request'])
+    flags = pd.DataFrame({
+        'topic': pairs['topic'],
+        'version_str': pairs['version_str'],
+        'reviews': 1,
+        'negative': (pairs['sentiment'] == 'negative').astype(int),
+        'feature_requests': yes_mask(pairs['is_feature_request']).astype(int)
+    })
+    return flags.groupby(['topic', 'version_str'], observed=True, dropna=False).sum()
+
+
+@memoized_aggregate
+def topic_feature_request_rates(counts, min_reviews=30):
+    """
+    Share of feature requests per topic, over all versions.
+
+    Args:
+        counts: Output of topic_version_counts
+        min_reviews: Minimum number of reviews for a topic to be included
+
+    Returns:
+        DataFrame with topic, feature_request_pct and review_count columns
+    """
+    per_topic = counts.groupby(level='topic').sum()
+    per_topic = per_topic[per_topic['reviews'] >= min_reviews]
+    return pd.DataFrame({
+        'topic': per_topic.index,
+        'feature_request_pct': (per_topic['feature_requests'] / per_topic['reviews'] * 100).to_numpy(),
+        'review_count': per_topic['reviews'].to_numpy()
+    })
+
+
+@memoized_aggregate
+def fix_effectiveness(counts, previous_version, latest_version, min_reviews=15, min_negative_pct=20):
+    """
+    Topics whose share of negative reviews dropped from one app version to the next.
+
+    Args:
+        counts: Output of topic_version_counts
+        previous_version: Version before the update
+        latest_version: Version after the update
+        min_reviews: Minimum reviews per topic in each of the two versions
+        min_negative_pct: Only topics with more negative reviews than this (in percent)
+            before the update are considered
+
+    Returns:
+        DataFrame with one row per improved topic, sorted by relative reduction
+    """
+    by_version = counts.reset_index()
+    before = by_version[by_version['version_str'] == previous_version].set_index('topic')
+    after = by_version[by_version['version_str'] == latest_version].set_index('topic')
+    joined = before.join(after, how='inner', lsuffix='_from', rsuffix='_to')
+    joined = joined[(joined['reviews_from'] >= min_reviews) & (joined['reviews_to'] >= min_reviews)]
+
+    from_neg_pct = joined['negative_from'] / joined['reviews_from'] * 100
+    to_neg_pct = joined['negative_to'] / joined['reviews_to'] * 100
+    reduction = from_neg_pct - to_neg_pct
+
+    improvements = pd.DataFrame({
+        'topic': joined.index,
+        'from_version': previous_version,
+        'to_version': latest_version,
+        'from_neg_pct': from_neg_pct.to_numpy(),
+        'to_neg_pct': to_neg_pct.to_numpy(),
+        'reduction': reduction.to_numpy(),
+        'reduction_pct': (reduction / from_neg_pct * 100).to_numpy(),
+        'from_reviews': joined['reviews_from'].to_numpy(),
+        'to_reviews': joined['reviews_to'].to_numpy()
+    })
+    improvements = improvements[(improvements['from_neg_pct'] > min_negative_pct) & (improvements['reduction'] > 0)]
+    return improvements.sort_values('reduction_pct', ascending=False).reset_index(drop=True)
+
+
+@memoized_aggregate
+def feature_request_timeline(counts, topics, min_reviews=10):
+    """
+    Share of feature requests per app version for the given topics.
+
+    Args:
+        counts: Output of topic_version_counts
+        topics: Topics to include (tuple, in display order)
+        min_reviews: Minimum reviews for a topic/version point
+
+    Returns:
+        DataFrame with version, topic, fr_pct, total and fr_count columns in version order
+    """
+    timeline = counts.reset_index()
+    timeline = timeline[timeline['topic'].isin(topics) & timeline['version_str'].notna() &
+                        (timeline['reviews'] >= min_reviews)]
+
+    timeline = pd.DataFrame({
+        'version': timeline['version_str'],
+        'topic': pd.Categorical(timeline['topic'], categories=list(topics)),
+        'fr_pct': timeline['feature_requests'] / timeline['reviews'] * 100,
+        'total': timeline['reviews'],
+        'fr_count': timeline['feature_requests']
+    }).sort_values(['version', 'topic'])
+
+    timeline['version'] = timeline['version'].astype(str)
+    timeline['topic'] = timeline['topic'].astype(str)
+    return timeline.reset_index(drop=True)
+
+
+def feature_request_growth(timeline, min_versions=3, min_slope=1):
+    """
+    Topics whose feature request share grows across versions.
+
+    The trend is the least-squares slope of the feature request percentage over the
+    version sequence of each topic with at least `min_versions` points.
+
+    Returns:
+        DataFrame with topic, slope, percent_increase, earliest, latest, versions,
+        earliest_version and latest_version columns, fastest growing first
+    """
+    grouped = timeline.groupby('topic', sort=False)
+    points = timeline.assign(x=grouped.cumcount())
+    points = points[grouped['fr_pct'].transform('size') >= min_versions]
+    grouped = points.groupby('topic', sort=False)
+
+    x_dev = points['x'] - grouped['x'].transform('mean')
+    y_dev = points['fr_pct'] - grouped['fr_pct'].transform('mean')
+    sums = pd.DataFrame({'xy': x_dev * y_dev, 'xx': x_dev ** 2, 'topic': points['topic']}).groupby('topic', sort=False).sum()
+
+    growth = pd.DataFrame({
+        'slope': sums['xy'] / sums['xx'],
+        'earliest': grouped['fr_pct'].first(),
+        'latest': grouped['fr_pct'].last(),
+        'versions': grouped.size(),
+        'earliest_version': grouped['version'].first(),
+        'latest_version': grouped['version'].last()
+    })
+    growth['percent_increase'] = np.where(
+        growth['earliest'] > 0,
+        (growth['latest'] - growth['earliest']) / growth['earliest'].where(growth['earliest'] > 0) * 100,
+        0
+    )
+
+    growth = growth[growth['slope'] > min_slope].reset_index()
+    return growth.sort_values('percent_increase', ascending=False, kind='stable')[
+        ['topic', 'slope', 'percent_increase', 'earliest', 'latest', 'versions', 'earliest_version', 'latest_version']
+    ]
+
+
+# Export formats: label, file extension and MIME type
+EXPORT_FORMATS = {
+    'csv': ('CSV (gzip)', '.csv.gz', 'application/gzip'),
+    'parquet': ('Parquet', '.parquet', 'application/vnd.apache.parquet'),
+    'jsonl': ('JSON Lines (gzip)', '.jsonl.gz', 'application/gzip')
+}
+
+
+@functools.singledispatch
+def export_reviews(reviews, path, file_format='csv', columns=None, chunk_size=50_000):
+    """
+    Write reviews to a file in chunks, so memory use stays bounded by `chunk_size` rows.
+
+    Args:
+        reviews: Reviews to export
+        path: Output file
+        file_format: Key of EXPORT_FORMATS ('csv' and 'jsonl' are gzip-compressed)
+        columns: Columns to export, in order (all columns if None)
+        chunk_size: Number of rows serialised at a time
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {file_format}")
+    if columns is not None:
+        reviews = reviews[list(columns)]
+    chunks = (reviews.iloc[start:start + chunk_size] for start in range(0, len(reviews), chunk_size))
+
+    if file_format == 'parquet':
+        if pa is None:
+            raise ImportError("pyarrow is required for Parquet exports (pip install pyarrow)")
+        schema = pa.Schema.from_pandas(reviews, preserve_index=False)
+        with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+            for chunk in chunks:
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        return
+
+    with gzip.open(path, 'wt', encoding='utf-8', newline='') as f:
+        if file_format == 'csv':
+            # Header row also for an empty selection
+            reviews.head(0).to_csv(f, index=False)
+            for chunk in chunks:
+                chunk.to_csv(f, header=False, index=False)
+        else:
+            for chunk in chunks:
+                chunk.to_json(f, orient='records', lines=True, date_format='iso', force_ascii=False)
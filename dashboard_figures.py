@@ -0,0 +1,905 @@
+"""
+Plotly figures of the BMW app review dashboard.
+
+Each function turns the result of an aggregate from dashboard_data into the figure
+shown by the dashboard, so the same charts can be rendered without Streamlit (see
+dashboard_report.py). Functions return None when there is nothing to plot, and are
+timed as 'figures' when the dashboard is profiled (see dashboard_profiling).
+"""
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from dashboard_profiling import timed
+
+# Dark theme is the only option
+PLOT_SETTINGS = {
+    'plot_bgcolor': 'rgba(14, 17, 23, 0)',  # Transparent with dark theme base
+    'paper_bgcolor': 'rgba(14, 17, 23, 0)',  # Transparent with dark theme base
+    'font_color': '#FFFFFF',
+    'grid_color': 'rgba(255, 255, 255, 0.1)',
+    'color_scale': ['#EF5350', '#A9A9A9', '#81C784']  # Red, Grey, Green - Changing orange to grey for neutral
+}
+
+SENTIMENT_COLORS = {
+    'negative': PLOT_SETTINGS['color_scale'][0],
+    'neutral': PLOT_SETTINGS['color_scale'][1],
+    'positive': PLOT_SETTINGS['color_scale'][2]
+}
+
+# Horizontal legend above the plot area
+TOP_LEGEND = dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1)
+
+
+def format_plotly_fig(fig, dark_theme=True):
+    """Apply consistent styling to any plotly figure"""
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        margin=dict(l=10, r=10, t=10, b=10),
+    )
+
+    # Set transparent background for all subplots
+    for axis in fig.layout:
+        if axis.startswith('xaxis') or axis.startswith('yaxis'):
+            fig.layout[axis].gridcolor = PLOT_SETTINGS['grid_color']
+
+    # Add transparent configuration
+    fig.update_layout(
+        template="plotly_dark" if dark_theme else "plotly_white",
+        modebar=dict(bgcolor='rgba(0,0,0,0)', color=PLOT_SETTINGS['font_color']),
+    )
+
+    # Set transparent config
+    fig.update_xaxes(showgrid=True, gridcolor=PLOT_SETTINGS['grid_color'])
+    fig.update_yaxes(showgrid=True, gridcolor=PLOT_SETTINGS['grid_color'])
+
+    return fig
+
+
+@timed('figures')
+def rating_distribution_figure(rating_counts):
+    """Bar chart of the reviews per star rating (from rating_distribution)"""
+    # Create star rating labels
+    star_labels = {1: "★", 2: "★★", 3: "★★★", 4: "★★★★", 5: "★★★★★"}
+
+    # Prepare data for plotting
+    ratings_df = pd.DataFrame({
+        'Rating': [star_labels[i] for i in rating_counts.index],
+        'Count': rating_counts.values,
+        'Rating_Num': rating_counts.index
+    })
+
+    # Define colors for ratings
+    rating_colors = {
+        1: '#EF5350',  # Red for 1-star
+        2: '#FF7043',  # Orange-Red for 2-star
+        3: '#FFB74D',  # Orange for 3-star
+        4: '#AED581',  # Light Green for 4-star
+        5: '#66BB6A'   # Green for 5-star
+    }
+
+    fig = px.bar(
+        ratings_df,
+        x='Rating',
+        y='Count',
+        color='Rating_Num',
+        color_discrete_map=rating_colors,
+        height=300
+    )
+    fig = format_plotly_fig(fig)
+
+    # Add count labels above bars
+    fig.update_traces(
+        texttemplate='%{y:,}',
+        textposition='outside',
+        cliponaxis=False,
+        hovertemplate='%{x}: %{y:,} reviews<extra></extra>'
+    )
+    fig.update_layout(
+        xaxis_title=None,
+        yaxis_title='Number of Reviews',
+        showlegend=False
+    )
+    return fig
+
+
+@timed('figures')
+def polarity_change_figure(polarity_df):
+    """
+    Horizontal bars of the polarity change per topic (from topic_polarity_change).
+
+    An optional 'change_margin' column is drawn as confidence intervals.
+    """
+    if len(polarity_df) == 0:
+        return None
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        y=polarity_df['topic'],
+        x=polarity_df['change'],
+        orientation='h',
+        marker_color=np.where(polarity_df['change'] >= 0, '#66BB6A', '#EF5350'),
+        hovertemplate='Change: %{x:.2f}<br>Reviews: %{customdata:,}<extra></extra>',
+        customdata=polarity_df['review_count'],
+        error_x=dict(type='data', array=polarity_df['change_margin']) if 'change_margin' in polarity_df else None
+    ))
+    fig = format_plotly_fig(fig)
+
+    # Add a vertical line at x=0
+    fig.add_shape(
+        type='line',
+        x0=0, y0=-0.5,
+        x1=0, y1=len(polarity_df)-0.5,
+        line=dict(color=PLOT_SETTINGS['font_color'], width=1)
+    )
+    fig.update_layout(
+        xaxis_title='Sentiment Change (Newer - Older Versions)',
+        xaxis=dict(range=[-1, 1]),
+        yaxis_title=None,
+        height=300
+    )
+    return fig
+
+
+@timed('figures')
+def sentiment_distribution_figure(sentiment_counts, total_reviews):
+    """Bar chart of the share of each sentiment (from count_by(cube, 'sentiment')) among `total_reviews`"""
+    # Percentages in a consistent order
+    ordered_sentiments = ['negative', 'neutral', 'positive']
+    percentages = [sentiment_counts.get(sentiment, 0) / total_reviews * 100 for sentiment in ordered_sentiments]
+
+    sentiment_df = pd.DataFrame({
+        'Sentiment': [s.capitalize() for s in ordered_sentiments],
+        'Percentage': percentages
+    })
+
+    fig = px.bar(
+        sentiment_df,
+        x='Sentiment',
+        y='Percentage',
+        text=[f"{p:.1f}%" for p in percentages],
+        color='Sentiment',
+        color_discrete_map={sentiment.capitalize(): color for sentiment, color in SENTIMENT_COLORS.items()},
+        height=400
+    )
+    fig = format_plotly_fig(fig)
+    fig.update_layout(
+        xaxis_title=None,
+        yaxis_title='Percentage of Reviews',
+        yaxis=dict(range=[0, max(percentages) * 1.1]),
+        showlegend=False
+    )
+    fig.update_traces(
+        textposition='outside',
+        textfont=dict(size=12, color=PLOT_SETTINGS['font_color']),
+        marker_line_color='rgba(0,0,0,0)',
+        marker_line_width=0
+    )
+    return fig
+
+
+@timed('figures')
+def sentiment_by_rating_figure(grouped):
+    """Stacked bars of the sentiments per star rating (from sentiment_by_rating)"""
+    fig = go.Figure()
+
+    # Add traces for each sentiment (in reverse order so negative is at bottom)
+    for sentiment in ['positive', 'neutral', 'negative']:
+        fig.add_trace(go.Bar(
+            x=grouped.index,
+            y=grouped[sentiment],
+            name=sentiment.capitalize(),
+            marker_color=SENTIMENT_COLORS[sentiment],
+            hovertemplate='%{y:,} reviews<extra></extra>'
+        ))
+    fig = format_plotly_fig(fig)
+    fig.update_layout(
+        barmode='stack',
+        xaxis=dict(
+            title='Star Rating',
+            tickmode='array',
+            tickvals=list(range(1, 6)),
+            ticktext=['1', '2', '3', '4', '5']
+        ),
+        yaxis=dict(
+            title='Number of Reviews'
+        ),
+        legend=dict(title='Sentiment', **TOP_LEGEND),
+        height=400
+    )
+    return fig
+
+
+@timed('figures')
+def sentiment_timeline_figure(version_sentiment):
+    """
+    Lines of the share of each sentiment per app version.
+
+    Args:
+        version_sentiment: Review counts by version (rows, in version order) and
+            sentiment (columns), e.g. count_by(cube, ['version_str', 'sentiment']).unstack()
+    """
+    if len(version_sentiment) == 0:
+        return None
+
+    # Percentages per version (versions as a column, already in version order)
+    version_pct = version_sentiment.div(version_sentiment.sum(axis=1), axis=0) * 100
+    version_pct = version_pct.reset_index()
+    version_pct['version_str'] = version_pct['version_str'].astype(str)
+    for sentiment in ['positive', 'neutral', 'negative']:
+        if sentiment not in version_pct.columns:
+            version_pct[sentiment] = 0
+
+    fig = go.Figure()
+    for sentiment in ['positive', 'neutral', 'negative']:
+        fig.add_trace(go.Scatter(
+            x=version_pct['version_str'],
+            y=version_pct[sentiment],
+            mode='lines+markers',
+            name=sentiment.capitalize(),
+            line=dict(color=SENTIMENT_COLORS[sentiment], width=3),
+            marker=dict(size=8),
+            hovertemplate='%{y:.1f}%<extra></extra>'
+        ))
+    fig = format_plotly_fig(fig)
+    fig.update_layout(
+        xaxis=dict(
+            title='App Version',
+            tickangle=45,
+            categoryorder='array',
+            categoryarray=version_pct['version_str']
+        ),
+        yaxis=dict(
+            title='Percentage of Reviews',
+            range=[0, 100]
+        ),
+        legend=dict(title='Sentiment', **TOP_LEGEND),
+        height=500
+    )
+    return fig
+
+
+@timed('figures')
+def topic_counts_figure(topic_counts):
+    """Horizontal bars of the 15 most mentioned topics (from count_by(topic_cube, 'topic'))"""
+    topic_counts = topic_counts.sort_values(ascending=False).head(15)
+    topic_df = pd.DataFrame({
+        'Topic': topic_counts.index,
+        'Count': topic_counts.values
+    })
+
+    fig = px.bar(
+        topic_df,
+        x='Count',
+        y='Topic',
+        orientation='h',
+        color='Count',
+        color_continuous_scale='Blues',
+        height=600
+    )
+    fig = format_plotly_fig(fig)
+    fig.update_traces(
+        texttemplate='%{x:,}',
+        textposition='outside',
+        cliponaxis=False,
+        hovertemplate='%{y}: %{x:,} reviews<extra></extra>'
+    )
+    return fig
+
+
+def _top_topic_sentiments(sentiment_counts):
+    """The 15 topics with the most reviews, with their total and sentiment shares"""
+    topic_sentiment_df = sentiment_counts.copy()
+    topic_sentiment_df['total'] = topic_sentiment_df.sum(axis=1)
+    topic_sentiment_df = topic_sentiment_df.sort_values('total', ascending=False).head(15)
+    for sentiment in ['positive', 'neutral', 'negative']:
+        topic_sentiment_df[f'{sentiment}_pct'] = (topic_sentiment_df[sentiment] / topic_sentiment_df['total'] * 100).round(1)
+    return topic_sentiment_df
+
+
+@timed('figures')
+def topic_sentiment_figure(sentiment_counts):
+    """Stacked bars of the sentiment shares of the main topics (from topic_sentiment_counts)"""
+    topic_sentiment_df = _top_topic_sentiments(sentiment_counts)
+
+    fig = go.Figure()
+    for sentiment in ['positive', 'neutral', 'negative']:
+        fig.add_trace(go.Bar(
+            y=topic_sentiment_df.index,
+            x=topic_sentiment_df[f'{sentiment}_pct'],
+            name=sentiment.capitalize(),
+            orientation='h',
+            marker_color=SENTIMENT_COLORS[sentiment],
+            hovertemplate='%{x:.1f}%<extra></extra>'
+        ))
+    fig = format_plotly_fig(fig)
+    fig.update_layout(
+        barmode='stack',
+        xaxis=dict(
+            title='Percentage of Reviews',
+            range=[0, 100],
+        ),
+        yaxis=dict(
+            title=None,
+            autorange="reversed",  # Reverse to match the topic distribution chart
+        ),
+        legend=dict(title='Sentiment', **TOP_LEGEND),
+        height=600
+    )
+    return fig
+
+
+@timed('figures')
+def topic_polarity_figure(sentiment_counts, margins=None):
+    """
+    Horizontal bars of the sentiment polarity of the main topics (from topic_sentiment_counts).
+
+    Args:
+        margins: Optional confidence margins of the polarity per topic, drawn as error bars
+    """
+    topic_sentiment_df = _top_topic_sentiments(sentiment_counts)
+    topic_sentiment_df['polarity'] = (topic_sentiment_df['positive'] - topic_sentiment_df['negative']) / topic_sentiment_df['total']
+    polarity_df = topic_sentiment_df.sort_values('polarity', ascending=False)
+
+    plot_df = pd.DataFrame({
+        'Topic': polarity_df.index,
+        'Polarity': polarity_df['polarity'],
+        'Total Reviews': polarity_df['total']
+    })
+    if margins is not None:
+        plot_df['Margin'] = margins.reindex(polarity_df.index)
+
+    fig = px.bar(
+        plot_df,
+        x='Polarity',
+        y='Topic',
+        orientation='h',
+        color='Polarity',
+        color_continuous_scale=['#F44336', '#FFFFFF', '#4CAF50'],  # Red to White to Green
+        range_color=[-1, 1],
+        height=600,
+        hover_data=['Total Reviews'],
+        error_x='Margin' if margins is not None else None
+    )
+    fig = format_plotly_fig(fig)
+
+    # Add a vertical line at x=0
+    fig.add_shape(
+        type='line',
+        x0=0, y0=-0.5,
+        x1=0, y1=len(plot_df)-0.5,
+        line=dict(color=PLOT_SETTINGS['font_color'], width=1)
+    )
+    fig.update_layout(
+        xaxis_title='Sentiment Polarity (positive-negative)/total',
+        xaxis=dict(range=[-1, 1]),
+        yaxis_title=None,
+        yaxis=dict(autorange="reversed"),
+        coloraxis_showscale=False
+    )
+    return fig
+
+
+@timed('figures')
+def topic_length_figure(length_df):
+    """Horizontal bars of the 15 topics with the longest reviews (from topic_review_lengths)"""
+    if len(length_df) == 0:
+        return None
+    length_df = length_df.sort_values('avg_length', ascending=False).head(15)
+
+    fig = px.bar(
+        length_df,
+        y='topic',
+        x='avg_length',
+        orientation='h',
+        color='avg_length',
+        color_continuous_scale='Viridis',
+        hover_data=['review_count', 'median_length'],
+        height=500,
+        labels={
+            'avg_length': 'Average Review Length (characters)',
+            'topic': 'Topic',
+            'review_count': 'Number of Reviews',
+            'median_length': 'Median Length'
+        }
+    )
+    fig = format_plotly_fig(fig)
+    fig.update_traces(
+        texttemplate='%{x:.0f}',
+        textposition='outside',
+        cliponaxis=False,
+        hovertemplate='%{y}: %{x:.0f} chars<br>Reviews: %{customdata[0]}<br>Median: %{customdata[1]:.0f} chars<extra></extra>'
+    )
+    fig.update_layout(
+        xaxis=dict(title='Average Review Length (characters)'),
+        yaxis=dict(title=None, autorange="reversed"),
+        coloraxis_showscale=False
+    )
+    return fig
+
+
+@timed('figures')
+def language_rating_figure(language_scores, min_reviews=10):
+    """
+    Bars of the average rating of the languages with at least `min_reviews` reviews.
+
+    Args:
+        language_scores: Result of mean_score(cube, by='language')
+    """
+    lang_ratings = language_scores.reset_index().rename(columns={'mean': 'avg_rating'})
+    lang_ratings = lang_ratings.sort_values('avg_rating', ascending=False)
+    lang_ratings = lang_ratings[lang_ratings['count'] >= min_reviews]
+    if len(lang_ratings) == 0:
+        return None
+
+    fig = px.bar(
+        lang_ratings,
+        x='language',
+        y='avg_rating',
+        color='avg_rating',
+        color_continuous_scale='RdYlGn',
+        range_color=[1, 5],
+        labels={'language': 'Language', 'avg_rating': 'Average Rating', 'count': 'Number of Reviews'},
+        hover_data=['count'],
+        height=400
+    )
+    fig = format_plotly_fig(fig)
+    fig.update_traces(
+        texttemplate='%{y:.2f}',
+        textposition='outside',
+        cliponaxis=False,
+        hovertemplate='%{x}: %{y:.2f} avg rating<br>Based on %{customdata[0]:,} reviews<extra></extra>'
+    )
+    fig.update_layout(
+        xaxis_title='Language',
+        yaxis_title='Average Rating',
+        yaxis=dict(range=[0, 5.5]),
+        coloraxis_showscale=False
+    )
+    return fig
+
+
+@timed('figures')
+def language_topics_figure(language_counts, language_topic_counts):
+    """
+    Grouped bars of the 5 most mentioned topics of the 5 languages with most reviews.
+
+    Args:
+        language_counts: Reviews per language, e.g. count_by(cube, 'language')
+        language_topic_counts: Topic mentions per language and topic, e.g.
+            count_by(topic_cube, ['language', 'topic'])
+    """
+    language_counts = language_counts.sort_values(ascending=False, kind='stable')
+    top_languages = language_counts[language_counts > 0].head(5).index.tolist()
+
+    plot_data = []
+    for language in top_languages:
+        if language not in language_topic_counts.index.get_level_values('language'):
+            continue
+        topic_counts = language_topic_counts.xs(language, level='language')
+        for topic, count in topic_counts.sort_values(ascending=False, kind='stable').head(5).items():
+            plot_data.append({'language': language, 'topic': topic, 'count': count})
+    if not plot_data:
+        return None
+
+    fig = px.bar(
+        pd.DataFrame(plot_data),
+        x='language',
+        y='count',
+        color='topic',
+        barmode='group',
+        height=500,
+        labels={'language': 'Language', 'count': 'Number of Reviews', 'topic': 'Topic'}
+    )
+    fig = format_plotly_fig(fig)
+    fig.update_layout(
+        xaxis_title='Language',
+        yaxis_title='Number of Reviews',
+        legend=dict(title='Topic', **TOP_LEGEND)
+    )
+    return fig
+
+
+@timed('figures')
+def language_topic_ratings_figure(ratings_matrix):
+    """Heatmap of the average rating per topic and language (from language_topic_ratings)"""
+    fig = px.imshow(
+        ratings_matrix,
+        labels=dict(x="Language", y="Topic", color="Average Rating"),
+        x=ratings_matrix.columns,
+        y=ratings_matrix.index,
+        color_continuous_scale="RdYlGn",
+        range_color=[1, 5],
+        height=600,
+        aspect="auto"
+    )
+
+    # Add text annotations
+    annotations = []
+    for i, topic in enumerate(ratings_matrix.index):
+        for j, language in enumerate(ratings_matrix.columns):
+            if not pd.isna(ratings_matrix.iloc[i, j]):
+                annotations.append(
+                    dict(
+                        x=j,
+                        y=i,
+                        text=str(ratings_matrix.iloc[i, j]),
+                        showarrow=False,
+                        font=dict(color="black")
+                    )
+                )
+
+    fig = format_plotly_fig(fig)
+    fig.update_layout(annotations=annotations)
+    fig.update_layout(
+        xaxis=dict(tickangle=45),
+        coloraxis_colorbar=dict(
+            title="Avg. Rating",
+            tickvals=[1, 2, 3, 4, 5],
+            ticktext=["1", "2", "3", "4", "5"]
+        )
+    )
+    return fig
+
+
+@timed('figures')
+def version_trends_figure(version_polarity, versions):
+    """
+    Lines of the sentiment polarity of the significant topics per app version.
+
+    Args:
+        version_polarity: Result of topic_version_polarity
+        versions: Versions of the selection in version order (at least two)
+    """
+    polarity_data = {
+        topic: list(zip(group['version_str'], group['polarity']))
+        for topic, group in version_polarity.groupby('topic', sort=False)
+    }
+    if not polarity_data:
+        return None
+
+    # Sort topics by their average polarity
+    topic_avg_sentiment = {
+        topic: sum(p for _, p in data) / len(data)
+        for topic, data in polarity_data.items() if data
+    }
+    topics_to_plot = [t for t, _ in sorted(topic_avg_sentiment.items(), key=lambda x: x[1])]
+
+    # Map version strings to x positions for equal spacing
+    version_positions = {v: i for i, v in enumerate(versions)}
+
+    fig = go.Figure()
+
+    # Use a distinct color palette
+    colors = px.colors.qualitative.Plotly[:len(topics_to_plot)]
+    line_styles = ['solid', 'dash', 'dot', 'dashdot'] * 10  # Reuse line styles as needed
+
+    for i, topic in enumerate(topics_to_plot):
+        # Points of the topic in version order
+        points = sorted((version_positions[v], p, v) for v, p in polarity_data[topic])
+        fig.add_trace(go.Scatter(
+            x=[p[2] for p in points],
+            y=[p[1] for p in points],
+            mode='lines+markers',
+            name=topic,
+            line=dict(
+                color=colors[i % len(colors)],
+                dash=line_styles[i % len(line_styles)],
+                width=2
+            ),
+            marker=dict(size=8)
+        ))
+
+    # Add horizontal line at y=0
+    fig.add_shape(
+        type="line",
+        x0=versions[0],
+        y0=0,
+        x1=versions[-1],
+        y1=0,
+        line=dict(color=PLOT_SETTINGS['font_color'], width=1, dash="dash")
+    )
+
+    # Shade the positive (green) and negative (red) regions with filled area traces
+    x_range = list(versions)
+    fig.add_trace(go.Scatter(
+        x=x_range + x_range[::-1],
+        y=[0] * len(x_range) + [1] * len(x_range),
+        fill="toself",
+        fillcolor="rgba(76, 175, 80, 0.1)",
+        line=dict(width=0),
+        showlegend=False,
+        hoverinfo="skip"
+    ))
+    fig.add_trace(go.Scatter(
+        x=x_range + x_range[::-1],
+        y=[0] * len(x_range) + [-1] * len(x_range),
+        fill="toself",
+        fillcolor="rgba(244, 67, 54, 0.1)",
+        line=dict(width=0),
+        showlegend=False,
+        hoverinfo="skip"
+    ))
+
+    fig = format_plotly_fig(fig)
+    fig.update_layout(
+        title=None,
+        xaxis_title="App Version",
+        yaxis_title="Sentiment Polarity (positive-negative)/total",
+        legend=dict(
+            title="Topics",
+            yanchor="top",
+            y=0.99,
+            xanchor="left",
+            x=1.01
+        ),
+        height=600
+    )
+    return fig
+
+
+@timed('figures')
+def fix_effectiveness_figure(improvements_df):
+    """Horizontal bars of the 10 topics whose negative share fell most (from fix_effectiveness)"""
+    if len(improvements_df) == 0:
+        return None
+    top_improvements = improvements_df.head(10)
+    plot_df = top_improvements.assign(
+        version_transition=top_improvements['from_version'] + " → " + top_improvements['to_version']
+    )[['topic', 'version_transition', 'reduction_pct', 'from_neg_pct', 'to_neg_pct', 'from_reviews', 'to_reviews']]
+
+    fig = px.bar(
+        plot_df,
+        x='reduction_pct',
+        y='topic',
+        color='reduction_pct',
+        color_continuous_scale='Greens',
+        hover_data=['version_transition', 'from_neg_pct', 'to_neg_pct', 'from_reviews', 'to_reviews'],
+        height=500,
+        labels={
+            'reduction_pct': 'Negative Sentiment Reduction (%)',
+            'topic': 'Topic',
+            'version_transition': 'Version Transition',
+            'from_neg_pct': 'Initial Negative %',
+            'to_neg_pct': 'Final Negative %',
+            'from_reviews': 'Initial Reviews',
+            'to_reviews': 'Final Reviews'
+        }
+    )
+    fig = format_plotly_fig(fig)
+    fig.update_traces(
+        texttemplate='%{x:.1f}%',
+        textposition='outside',
+        cliponaxis=False,
+        hovertemplate='%{y}<br>%{customdata[0]}<br>Initial: %{customdata[1]:.1f}% → Final: %{customdata[2]:.1f}%<br>Reviews: %{customdata[3]} → %{customdata[4]}<extra></extra>'
+    )
+    fig.update_layout(
+        xaxis_title='Negative Sentiment Reduction (%)',
+        yaxis_title=None,
+        coloraxis_showscale=False
+    )
+    return fig
+
+
+@timed('figures')
+def competitor_counts_figure(mention_counts, top_n=8):
+    """Bars of the `top_n` most mentioned competitors and the others (from competitor_counts)"""
+    if len(mention_counts) == 0:
+        return None
+    top_n = min(top_n, len(mention_counts))
+    top_competitors = mention_counts.head(top_n)
+    other_competitors_count = mention_counts[top_n:].sum()
+    if other_competitors_count > 0:
+        display_data = pd.concat([
+            top_competitors,
+            pd.Series([other_competitors_count], index=["Others"])
+        ])
+    else:
+        display_data = top_competitors
+
+    # Capitalize competitor names for display
+    display_data.index = [name.title() if name != "Others" else name for name in display_data.index]
+
+    fig = px.bar(
+        x=display_data.index,
+        y=display_data.values,
+        labels={'x': 'Competitor', 'y': 'Number of Mentions'},
+        color=display_data.index,
+        color_discrete_sequence=px.colors.qualitative.Bold,
+        height=500
+    )
+    fig = format_plotly_fig(fig)
+    fig.update_layout(
+        xaxis=dict(
+            tickangle=45
+        ),
+        yaxis=dict(
+            title="Number of Mentions"
+        ),
+        showlegend=False
+    )
+    fig.update_traces(
+        texttemplate='%{y:,}',
+        textposition='outside',
+        cliponaxis=False
+    )
+    return fig
+
+
+@timed('figures')
+def competitor_sentiment_figure(sentiment_counts, top_n=8):
+    """Stacked bars of the sentiment shares of the `top_n` most mentioned competitors (from competitor_sentiment)"""
+    sentiment_counts = sentiment_counts.head(top_n)
+    sentiment_share = sentiment_counts.div(sentiment_counts.sum(axis=1), axis=0) * 100
+
+    fig = go.Figure()
+    for sentiment in ['negative', 'neutral', 'positive']:
+        fig.add_trace(go.Bar(
+            x=sentiment_share[sentiment],
+            y=[name.title() for name in sentiment_share.index],
+            orientation='h',
+            name=sentiment.capitalize(),
+            marker_color=SENTIMENT_COLORS[sentiment],
+            customdata=sentiment_counts[sentiment],
+            hovertemplate='%{x:.1f}% (%{customdata:,} mentions)<extra></extra>'
+        ))
+    fig = format_plotly_fig(fig)
+    fig.update_layout(
+        barmode='stack',
+        xaxis=dict(
+            title='Percentage of Mentions',
+            range=[0, 100]
+        ),
+        yaxis=dict(
+            title=None,
+            autorange="reversed"  # Most mentioned at top
+        ),
+        legend=dict(title='Sentiment', **TOP_LEGEND),
+        height=400
+    )
+    return fig
+
+
+@timed('figures')
+def topic_competitor_figure(topic_comp_df):
+    """Horizontal bars of the 15 topics most often mentioning competitors (from topic_competitor_rates)"""
+    if len(topic_comp_df) == 0:
+        return None
+    topic_comp_df = topic_comp_df.sort_values('competitor_mention_rate', ascending=False).head(15)
+
+    fig = px.bar(
+        topic_comp_df,
+        x='competitor_mention_rate',
+        y='topic',
+        orientation='h',
+        color='competitor_mention_rate',
+        color_continuous_scale='Oranges',
+        hover_data=['review_count', 'top_competitor'],
+        height=600
+    )
+    fig = format_plotly_fig(fig)
+
+    # Add competitor labels
+    annotations = []
+    for i, row in enumerate(topic_comp_df.itertuples()):
+        if row.top_competitor:
+            annotations.append(
+                dict(
+                    x=row.competitor_mention_rate + 0.1,
+                    y=i,
+                    text=f"({row.top_competitor})",
+                    showarrow=False,
+                    font=dict(color="black", size=10)
+                )
+            )
+    fig.update_layout(annotations=annotations)
+    fig.update_layout(
+        xaxis=dict(
+            title="Percentage of Reviews Mentioning Competitors"
+        ),
+        yaxis=dict(
+            title=None,
+            autorange="reversed"  # Highest at top
+        ),
+        coloraxis_showscale=False
+    )
+    return fig
+
+
+@timed('figures')
+def feature_request_figure(fr_df):
+    """Horizontal bars of the 15 topics with most feature requests (from topic_feature_request_rates)"""
+    if len(fr_df) == 0:
+        return None
+    fr_df = fr_df.sort_values('feature_request_pct', ascending=False).head(15)
+
+    fig = px.bar(
+        fr_df,
+        x='feature_request_pct',
+        y='topic',
+        orientation='h',
+        color='feature_request_pct',
+        color_continuous_scale='Purples',
+        hover_data=['review_count'],
+        height=600
+    )
+    fig = format_plotly_fig(fig)
+    fig.update_layout(
+        xaxis=dict(
+            title="Percentage of Reviews Containing Feature Requests",
+            range=[0, 100]
+        ),
+        yaxis=dict(
+            title=None,
+            autorange="reversed"  # Highest at top
+        ),
+        coloraxis_showscale=False
+    )
+
+    # Add count and percentage labels
+    fig.update_traces(
+        texttemplate='%{x:.1f}%<br>(%{customdata[0]:,})',
+        textposition='outside',
+        hovertemplate='%{y}: %{x:.1f}% feature requests<br>Based on %{customdata[0]:,} reviews<extra></extra>'
+    )
+    return fig
+
+
+@timed('figures')
+def feature_request_timeline_figure(timeline_df, feature_topics, versions):
+    """
+    Lines of the feature request share per app version of the given topics.
+
+    Args:
+        timeline_df: Result of feature_request_timeline
+        feature_topics: Topics in the order they are plotted
+        versions: All versions in version order (for the x axis order)
+    """
+    if len(timeline_df) == 0:
+        return None
+
+    fig = go.Figure()
+    colors = px.colors.qualitative.Plotly[:len(feature_topics)]
+    line_styles = ['solid', 'dash', 'dot', 'dashdot', 'longdash']
+
+    for i, topic in enumerate(feature_topics):
+        topic_data = timeline_df[timeline_df['topic'] == topic]
+
+        if len(topic_data) >= 3:  # Only plot if we have enough data points
+            fig.add_trace(go.Scatter(
+                x=topic_data['version'],
+                y=topic_data['fr_pct'],
+                mode='lines+markers',
+                name=topic,
+                line=dict(
+                    color=colors[i % len(colors)],
+                    dash=line_styles[i % len(line_styles)],
+                    width=3
+                ),
+                marker=dict(size=8),
+                customdata=np.stack((
+                    topic_data['total'],
+                    topic_data['fr_count']
+                ), axis=-1),
+                hovertemplate='%{y:.1f}% of reviews<br>%{customdata[1]} out of %{customdata[0]} reviews<extra></extra>'
+            ))
+
+    fig = format_plotly_fig(fig)
+    fig.update_layout(
+        xaxis=dict(
+            title='App Version',
+            tickangle=45,
+            categoryorder='array',
+            categoryarray=[v for v in versions if v in set(timeline_df['version'])]
+        ),
+        yaxis=dict(
+            title='Feature Request Percentage',
+            range=[0, max(timeline_df['fr_pct']) * 1.1]
+        ),
+        legend=dict(title='Topics', **TOP_LEGEND),
+        height=500
+    )
+    return fig
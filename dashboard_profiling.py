@@ -0,0 +1,193 @@
+"""
+Opt-in profiling of dashboard reruns.
+
+A RerunProfile splits a rerun into sections (data loading, filters, Overview, Key
+Insights, the selected tab, export) that are marked in order. Within each section,
+the time spent in aggregate functions (dashboard_data) and figure builders
+(dashboard_figures), which are decorated with timed(), is recorded separately; the
+remainder is rendering and other script code. Finished profiles are appended as
+JSON lines to PROFILE_LOG, which summarize_log condenses per section so that
+regressions stand out. Kept free of Streamlit like dashboard_data.
+
+Usage:
+    python dashboard_profiling.py [profile log]
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+PROFILE_LOG = os.path.join("bmw_app_analysis", "logs", "dashboard_profile.jsonl")
+
+# Kinds of work recorded by timed(); section time outside them counts as 'other'
+PHASES = ['compute', 'figures']
+
+# Profile of the rerun running on this thread (Streamlit runs each session's script on its own thread)
+_active = threading.local()
+
+_log_lock = threading.Lock()
+
+
+def timed(kind):
+    """
+    Decorator adding a function's run time to the `kind` phase of the active profile.
+
+    Calls made while another timed function is running are included in the outer
+    call, and without an active profile the function is simply called.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profile = getattr(_active, 'profile', None)
+            if profile is None or profile.busy:
+                return func(*args, **kwargs)
+            profile.busy = True
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.busy = False
+                profile.add(kind, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def frame_memory(frame, deep=False):
+    """
+    Bytes held by a DataFrame or Series (0 for other objects, e.g. a DuckDB selection).
+
+    With deep=False, strings shared with the cached dataset are not counted.
+    """
+    if isinstance(frame, pd.DataFrame):
+        return int(frame.memory_usage(index=True, deep=deep).sum())
+    if isinstance(frame, pd.Series):
+        return int(frame.memory_usage(index=True, deep=deep))
+    return 0
+
+
+class RerunProfile:
+    """Section timings of one dashboard rerun, active on the thread that created it."""
+
+    def __init__(self, cache=None):
+        """
+        Args:
+            cache: AggregateCache whose hits and misses during the rerun are recorded
+        """
+        self.cache = cache
+        self.cache_before = cache.stats() if cache is not None else None
+        self.started = time.perf_counter()
+        self.sections = []
+        self.busy = False
+        _active.profile = self
+
+    def mark(self, name):
+        """End the current section and start section `name`"""
+        now = time.perf_counter()
+        if self.sections:
+            self.sections[-1]['seconds'] = now - self.sections[-1]['start']
+        self.sections.append({'name': name, 'start': now, 'seconds': 0.0, 'calls': 0,
+                              **{phase: 0.0 for phase in PHASES}})
+
+    def add(self, kind, seconds):
+        if self.sections:
+            self.sections[-1][kind] += seconds
+            self.sections[-1]['calls'] += 1
+
+    def finish(self, **fields):
+        """
+        End the last section and deactivate the profile.
+
+        Args:
+            fields: Further values of the record (e.g. session, dataset version, memory)
+
+        Returns:
+            Record of the rerun: timestamp, total_seconds, sections (name, seconds,
+            compute, figures, other, calls), cache hits and misses and `fields`
+        """
+        now = time.perf_counter()
+        if self.sections:
+            self.sections[-1]['seconds'] = now - self.sections[-1]['start']
+        if getattr(_active, 'profile', None) is self:
+            _active.profile = None
+
+        record = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'total_seconds': now - self.started,
+            'sections': [
+                {'name': section['name'], 'seconds': section['seconds'],
+                 **{phase: section[phase] for phase in PHASES},
+                 'other': max(0.0, section['seconds'] - sum(section[phase] for phase in PHASES)),
+                 'calls': section['calls']}
+                for section in self.sections
+            ],
+        }
+        if self.cache is not None:
+            # Process-wide counters, so concurrent sessions are included
+            cache_after = self.cache.stats()
+            record['cache'] = {'hits': cache_after['hits'] - self.cache_before['hits'],
+                               'misses': cache_after['misses'] - self.cache_before['misses'],
+                               'size': cache_after['size']}
+        record.update(fields)
+        return record
+
+
+def section_table(record):
+    """Sections of a profile record as a DataFrame of milliseconds"""
+    table = pd.DataFrame(record['sections'], columns=['name', 'seconds'] + PHASES + ['other', 'calls'])
+    table = table.set_index('name').rename_axis(None)
+    table[['seconds'] + PHASES + ['other']] *= 1000
+    return table.rename(columns={'seconds': 'total_ms', 'compute': 'compute_ms', 'figures': 'figures_ms',
+                                 'other': 'other_ms'})
+
+
+def log_profile(record, path=PROFILE_LOG):
+    """Append a profile record to the JSON lines log"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    line = json.dumps(record, default=str)
+    with _log_lock:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+
+def summarize_log(path=PROFILE_LOG):
+    """
+    Per-section statistics of the logged reruns.
+
+    Returns:
+        DataFrame indexed by section with the number of reruns and the median and
+        95th percentile of the total, compute and figure milliseconds
+    """
+    sections = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                sections.extend(json.loads(line)['sections'])
+    if not sections:
+        return pd.DataFrame()
+
+    times = pd.DataFrame(sections)
+    times[['seconds'] + PHASES] *= 1000
+    grouped = times.groupby('name', sort=False)
+    summary = pd.DataFrame({'reruns': grouped.size()})
+    for column, label in [('seconds', 'total'), ('compute', 'compute'), ('figures', 'figures')]:
+        summary[f'{label}_median_ms'] = grouped[column].median()
+        summary[f'{label}_p95_ms'] = grouped[column].quantile(0.95)
+    return summary.round(1)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        print(__doc__)
+        sys.exit(1)
+    log_file = sys.argv[1] if len(sys.argv) == 2 else PROFILE_LOG
+    if not os.path.exists(log_file):
+        print(f"No profile log at {log_file}. Open the dashboard with ?profile=1 first.")
+        sys.exit(1)
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(summarize_log(log_file))
@@ -0,0 +1,555 @@
+"""
+Headless reports of the BMW app review dashboard.
+
+Renders the Overview metrics, Key Insights and section charts of the dashboard for
+the filter presets below into self-contained HTML and JSON files, computed once per
+run instead of on every dashboard visit (e.g. from a weekly cron job). The aggregates
+computed for the presets are also saved as a snapshot next to the results; the
+dashboard loads it into its aggregate cache, so selecting a preset needs no
+recomputation while the results are unchanged.
+
+Usage:
+    python dashboard_report.py [preset ...]
+"""
+
+import html
+import io
+import json
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+from dashboard_data import (
+    AGGREGATE_CACHE, build_review_cube, competitor_counts, competitor_sentiment, count_by, dataset_version,
+    feature_request_timeline, filter_mask, fix_effectiveness, improvement_index, language_topic_ratings,
+    mean_score, rating_distribution, rows_of, sentiment_by_rating, topic_competitor_rates,
+    topic_feature_request_rates, topic_polarity_change, topic_review_lengths, topic_sentiment_counts,
+    topic_version_counts, topic_version_polarity
+)
+from dashboard_figures import (
+    competitor_counts_figure, competitor_sentiment_figure, feature_request_figure, feature_request_timeline_figure,
+    fix_effectiveness_figure, language_rating_figure, language_topic_ratings_figure, language_topics_figure,
+    polarity_change_figure, rating_distribution_figure, sentiment_by_rating_figure, sentiment_distribution_figure,
+    sentiment_timeline_figure, topic_competitor_figure, topic_counts_figure, topic_length_figure, topic_polarity_figure,
+    topic_sentiment_figure, version_trends_figure
+)
+import pandas as pd
+
+from dashboard_sql import ReviewStore, use_sql_backend
+from results_store import RESULTS_DIR, ResultsDataset, latest_results_file
+
+# Folder the reports are written to
+REPORTS_DIR = os.path.join("bmw_app_analysis", "reports")
+
+# Filter presets: the last `days` days of reviews (all dates when not given) and
+# optionally a language, rating range or version; other filters are left open
+FILTER_PRESETS = {
+    'all_reviews': {'label': 'All reviews'},
+    'last_7_days': {'label': 'Last 7 days', 'days': 7},
+    'last_30_days': {'label': 'Last 30 days', 'days': 30},
+    'last_90_days': {'label': 'Last 90 days', 'days': 90},
+}
+
+
+def preset_filters(preset, cube):
+    """
+    Filter selection of a preset, as the dashboard sidebar would produce it.
+
+    Args:
+        preset: Entry of FILTER_PRESETS
+        cube: Count cube of the full dataset (for the date and rating ranges)
+
+    Returns:
+        Dict of filter_mask arguments
+    """
+    filters = {}
+    if 'date' in cube.columns:
+        min_date = cube['date'].min().date()
+        max_date = cube['date'].max().date()
+        days = preset.get('days')
+        start_date = max(min_date, max_date - timedelta(days=days - 1)) if days else min_date
+        filters['date_range'] = (start_date, max_date)
+    if 'language' in cube.columns:
+        filters['language'] = preset.get('language', 'All')
+    if 'score' in cube.columns:
+        available_scores = cube.loc[filter_mask(cube, **filters), 'score']
+        if available_scores.isna().all():
+            # Nothing matches the other filters: keep the rating range of all reviews
+            available_scores = cube['score']
+        filters['rating_range'] = preset.get('rating_range', (int(available_scores.min()), int(available_scores.max())))
+    if 'version_str' in cube.columns:
+        filters['version'] = preset.get('version', 'All')
+    return filters
+
+
+def overview_metrics(reviews, cube_view):
+    """
+    Overview metrics of a selection (None when the data is not available or the selection is empty).
+
+    Returns:
+        Dict with 'total_reviews', 'average_rating', 'positive_pct' and 'improvement_index'
+    """
+    total_reviews = int(cube_view['review_count'].sum())
+    metrics = {'total_reviews': total_reviews, 'average_rating': None, 'positive_pct': None, 'improvement_index': None}
+    if total_reviews == 0:
+        return metrics
+    if 'score' in reviews.columns:
+        metrics['average_rating'] = mean_score(cube_view)
+    if 'sentiment' in reviews.columns:
+        metrics['positive_pct'] = count_by(cube_view, 'sentiment').get('positive', 0) / total_reviews * 100
+    if 'sentiment' in reviews.columns and 'appVersion' in reviews.columns and 'version_str' in reviews.columns:
+        # Share of positive reviews in recent vs earlier versions
+        metrics['improvement_index'] = improvement_index(cube_view)
+    return metrics
+
+
+def _key_insight_charts(sel):
+    columns = sel['columns']
+    charts = []
+    if 'score' in columns:
+        charts.append(("Rating Distribution",
+                       rating_distribution_figure(rating_distribution(sel['cube_view'], cache_key=sel['cache_key']))))
+    if {'topics', 'sentiment', 'version_str'} <= columns:
+        polarity_df = topic_polarity_change(sel['reviews'], cache_key=sel['cache_key'])
+        charts.append(("Topic Sentiment by Version", polarity_change_figure(polarity_df.head(8))))
+    return charts
+
+
+def _sentiment_charts(sel):
+    columns, cube_view = sel['columns'], sel['cube_view']
+    charts = []
+    if 'sentiment' in columns:
+        charts.append(("Sentiment Distribution",
+                       sentiment_distribution_figure(count_by(cube_view, 'sentiment'), cube_view['review_count'].sum())))
+        if 'score' in columns:
+            charts.append(("Sentiment by Star Rating",
+                           sentiment_by_rating_figure(sentiment_by_rating(cube_view, cache_key=sel['cache_key']))))
+        if 'appVersion' in columns:
+            version_sentiment = count_by(cube_view, ['version_str', 'sentiment']).unstack(fill_value=0)
+            charts.append(("Sentiment Timeline", sentiment_timeline_figure(version_sentiment)))
+    return charts
+
+
+def _topic_charts(sel):
+    columns, reviews, cache_key = sel['columns'], sel['reviews'], sel['cache_key']
+    charts = []
+    if 'topics' in columns:
+        charts.append(("Most Common Topics in Reviews", topic_counts_figure(count_by(sel['topic_cube_view'], 'topic'))))
+        if 'sentiment' in columns:
+            topic_sentiment_df = topic_sentiment_counts(reviews, cache_key=cache_key)
+            charts.append(("Topic Sentiment Analysis", topic_sentiment_figure(topic_sentiment_df)))
+            charts.append(("Sentiment Polarity by Topic", topic_polarity_figure(topic_sentiment_df)))
+        if 'review_length' in columns:
+            charts.append(("Topic Complexity (Review Length Analysis)",
+                           topic_length_figure(topic_review_lengths(reviews, cache_key=cache_key))))
+    return charts
+
+
+def _language_charts(sel):
+    cube_view = sel['cube_view']
+    charts = []
+    if {'language', 'topics', 'score'} <= sel['columns']:
+        charts.append(("Average Rating by Language", language_rating_figure(mean_score(cube_view, by='language'))))
+        charts.append(("Most Discussed Topics per Language",
+                       language_topics_figure(count_by(cube_view, 'language'),
+                                              count_by(sel['topic_cube_view'], ['language', 'topic']))))
+        charts.append(("Rating by Language and Topic",
+                       language_topic_ratings_figure(language_topic_ratings(sel['reviews'], cache_key=sel['cache_key']))))
+    return charts
+
+
+def _version_charts(sel):
+    columns, reviews, cache_key = sel['columns'], sel['reviews'], sel['cache_key']
+    charts = []
+    if {'appVersion', 'topics', 'sentiment'} <= columns:
+        versions = sel['cube_view']['version_str'].dropna().cat.remove_unused_categories().cat.categories.tolist()
+        if len(versions) >= 2:
+            charts.append(("Sentiment Trends by Topic Across App Versions",
+                           version_trends_figure(topic_version_polarity(reviews, cache_key=cache_key), versions)))
+            if {'version_str', 'version_num'} <= columns:
+                counts = topic_version_counts(reviews, cache_key=cache_key)
+                charts.append(("Fix Effectiveness Analysis",
+                               fix_effectiveness_figure(fix_effectiveness(counts, versions[-2], versions[-1], cache_key=cache_key))))
+    return charts
+
+
+def _competitor_charts(sel):
+    columns, reviews, mentions, cache_key = sel['columns'], sel['reviews'], sel['mentions'], sel['cache_key']
+    charts = []
+    if 'competitor_mentioned' in columns:
+        mention_counts = competitor_counts(mentions, cache_key=cache_key)
+        if len(mention_counts) > 0:
+            charts.append(("Most Frequently Mentioned Competitors", competitor_counts_figure(mention_counts)))
+            if 'sentiment' in columns:
+                charts.append(("Sentiment of Reviews Mentioning Competitors",
+                               competitor_sentiment_figure(competitor_sentiment(reviews, mentions, cache_key=cache_key))))
+            charts.append(("Topics Associated with Competitor Mentions",
+                           topic_competitor_figure(topic_competitor_rates(reviews, mentions, cache_key=cache_key))))
+    return charts
+
+
+def _feature_request_charts(sel):
+    columns, cube_view, cache_key = sel['columns'], sel['cube_view'], sel['cache_key']
+    charts = []
+    if {'is_feature_request', 'topics'} <= columns:
+        counts = topic_version_counts(sel['reviews'], cache_key=cache_key)
+        fr_df = topic_feature_request_rates(counts, cache_key=cache_key)
+        charts.append(("Topics Most Associated with Feature Requests", feature_request_figure(fr_df)))
+        if 'appVersion' in columns and cube_view.loc[cube_view['version_num'].notna(), 'review_count'].sum() > 0:
+            feature_topics = fr_df.sort_values('feature_request_pct', ascending=False).head(5)['topic'].tolist()
+            if feature_topics:
+                timeline_df = feature_request_timeline(counts, tuple(feature_topics), cache_key=cache_key)
+                charts.append(("Feature Request Timeline",
+                               feature_request_timeline_figure(timeline_df, feature_topics, sel['cube']['version_str'].cat.categories)))
+    return charts
+
+
+# Sections of the dashboard with the function returning their (title, figure) pairs
+# for a selection (see report_charts); figures are None where nothing can be plotted
+REPORT_SECTIONS = {
+    "Key Insights": _key_insight_charts,
+    "Sentiment Analysis": _sentiment_charts,
+    "Topic Distribution": _topic_charts,
+    "Language Analysis": _language_charts,
+    "Version Trends": _version_charts,
+    "Competitors": _competitor_charts,
+    "Feature Requests": _feature_request_charts,
+}
+
+
+def report_selection(reviews, mentions, cube, cube_view, topic_cube_view, cache_key=None):
+    """Selection passed to the section functions of REPORT_SECTIONS"""
+    return {
+        'reviews': reviews, 'mentions': mentions, 'cube': cube, 'cube_view': cube_view,
+        'topic_cube_view': topic_cube_view, 'cache_key': cache_key, 'columns': set(reviews.columns)
+    }
+
+
+def report_charts(reviews, mentions, cube, cube_view, topic_cube_view, cache_key=None):
+    """
+    Charts of the Key Insights and of the dashboard sections for one selection.
+
+    Charts are left out where the dashboard shows a "not available" message instead.
+
+    Args:
+        reviews: Selected reviews (DataFrame or DuckDB selection)
+        mentions: Competitor mentions of the selected reviews (see rows_of)
+        cube: Count cube of the full dataset
+        cube_view, topic_cube_view: Cube rows of the selection
+        cache_key: Aggregate cache key of the selection (dataset version and filters)
+
+    Returns:
+        Dict of section name to a list of (title, figure) pairs
+    """
+    sel = report_selection(reviews, mentions, cube, cube_view, topic_cube_view, cache_key)
+    sections = {}
+    for section, section_charts in REPORT_SECTIONS.items():
+        charts = [(title, fig) for title, fig in section_charts(sel) if fig is not None]
+        if charts:
+            sections[section] = charts
+    return sections
+
+
+def select_reviews(df, competitor_table, filters):
+    """
+    Reviews and competitor mentions of a filter selection.
+
+    Args:
+        df: Loaded reviews (DataFrame) or ReviewStore
+        competitor_table: Parsed competitor mentions, or None for a ReviewStore
+        filters: Dict of filter_mask arguments
+
+    Returns:
+        Tuple of (selected reviews or DuckDB selection, their competitor mentions)
+    """
+    if isinstance(df, ReviewStore):
+        reviews = df.select(**filters)
+    else:
+        mask = filter_mask(df, **filters)
+        reviews = df if mask.all() else df[mask]
+    # The SQL aggregates find the mentions of a selection themselves
+    mentions = rows_of(competitor_table, reviews) if competitor_table is not None else reviews
+    return reviews, mentions
+
+
+def build_report(df, cube, topic_cube, competitor_table, filters):
+    """
+    Metrics and charts of the dashboard for one filter selection.
+
+    Args:
+        df: Loaded reviews (DataFrame) or ReviewStore, with attrs['dataset_version']
+        cube, topic_cube: Count cubes of the dataset (see build_review_cube)
+        competitor_table: Parsed competitor mentions, or None for a ReviewStore
+        filters: Dict of filter_mask arguments
+
+    Returns:
+        Dict with the 'filters', 'dataset_version', 'metrics' and chart 'sections'
+    """
+    reviews, mentions = select_reviews(df, competitor_table, filters)
+    cube_view = cube[filter_mask(cube, **filters)]
+    topic_cube_view = topic_cube[filter_mask(topic_cube, **filters)]
+
+    # Same cache key as the dashboard, so the aggregates can be snapshotted for it
+    cache_key = (df.attrs['dataset_version'], tuple(sorted(filters.items())))
+    return {
+        'filters': filters,
+        'dataset_version': df.attrs['dataset_version'],
+        'metrics': overview_metrics(reviews, cube_view),
+        'sections': report_charts(reviews, mentions, cube, cube_view, topic_cube_view, cache_key)
+    }
+
+
+def describe_filters(filters):
+    """Readable summary of a filter selection"""
+    parts = []
+    if 'date_range' in filters:
+        parts.append(f"{filters['date_range'][0]} to {filters['date_range'][1]}")
+    if filters.get('language', 'All') != 'All':
+        parts.append(f"language {filters['language']}")
+    if 'rating_range' in filters:
+        parts.append(f"{filters['rating_range'][0]}-{filters['rating_range'][1]} stars")
+    if filters.get('version', 'All') != 'All':
+        parts.append(f"version {filters['version']}")
+    return ", ".join(parts)
+
+
+def _format_metrics(metrics):
+    """Overview metrics formatted like the dashboard's metric cards"""
+    def optional(value, fmt):
+        return fmt.format(value) if value is not None else "N/A"
+    improvement = metrics['improvement_index']
+    return {
+        'Total Reviews': f"{metrics['total_reviews']:,}",
+        'Average Rating': optional(metrics['average_rating'], "{:.2f}/5"),
+        'Positive Sentiment': optional(metrics['positive_pct'], "{:.1f}%"),
+        'Improvement Index': "N/A" if improvement is None else "0%" if improvement == 0 else f"{improvement:+.1f}%"
+    }
+
+
+def report_json(report, title):
+    """JSON-serialisable report with the figures as Plotly JSON"""
+    return {
+        'title': title,
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'dataset_version': report['dataset_version'],
+        'filters': {name: list(map(str, value)) if isinstance(value, tuple) else value
+                    for name, value in report['filters'].items()},
+        'metrics': report['metrics'],
+        'sections': {
+            section: [{'title': chart_title, 'figure': json.loads(fig.to_json())} for chart_title, fig in charts]
+            for section, charts in report['sections'].items()
+        }
+    }
+
+
+def report_html(report, title):
+    """Self-contained HTML page of a report (plotly.js is embedded once)"""
+    cards = "".join(
+        f'<div class="card"><div class="value">{value}</div><div class="label">{label}</div></div>'
+        for label, value in _format_metrics(report['metrics']).items()
+    )
+    body = [
+        f"<h1>{html.escape(title)}</h1>",
+        f'<p class="meta">{html.escape(describe_filters(report["filters"]))} | '
+        f'generated {datetime.now():%Y-%m-%d %H:%M}</p>',
+        "<h2>Overview</h2>",
+        f'<div class="cards">{cards}</div>'
+    ]
+    include_plotlyjs = 'inline'
+    for section, charts in report['sections'].items():
+        body.append(f"<h2>{html.escape(section)}</h2>")
+        for chart_title, fig in charts:
+            body.append(f"<h3>{html.escape(chart_title)}</h3>")
+            body.append(fig.to_html(full_html=False, include_plotlyjs=include_plotlyjs))
+            include_plotlyjs = False
+
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{html.escape(title)}</title>
+<style>
+    body {{ background-color: #0E1117; color: #FFFFFF; font-family: sans-serif; margin: 2rem auto; max-width: 1200px; }}
+    h1, h2 {{ color: #4299E1; }}
+    .meta {{ opacity: 0.7; }}
+    .cards {{ display: flex; gap: 1rem; }}
+    .card {{ flex: 1; background-color: #1E2130; border-radius: 8px; padding: 1rem; text-align: center; }}
+    .value {{ font-size: 2rem; font-weight: 700; }}
+    .label {{ opacity: 0.8; }}
+</style>
+</head>
+<body>
+{chr(10).join(body)}
+</body>
+</html>
+"""
+
+
+def write_report(report, name, title, output_dir=REPORTS_DIR):
+    """
+    Write a report as <name>.html and <name>.json.
+
+    Returns:
+        List of the written paths
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    html_file = os.path.join(output_dir, f"{name}.html")
+    with open(html_file, 'w', encoding='utf-8') as f:
+        f.write(report_html(report, title))
+    json_file = os.path.join(output_dir, f"{name}.json")
+    with open(json_file, 'w', encoding='utf-8') as f:
+        json.dump(report_json(report, title), f, indent=2, default=str)
+    return [html_file, json_file]
+
+
+def snapshot_path(csv_path):
+    """File the preset snapshot of a consolidated results CSV is saved to"""
+    return os.path.splitext(csv_path)[0] + '.snapshot.json'
+
+
+def _encode_snapshot(value):
+    """
+    JSON form of a cache key part or aggregate of the snapshot.
+
+    Tuples, dates and timestamps are tagged so keys are restored exactly; DataFrames
+    and Series use pandas' table format plus their column index, which it drops.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        frame = value.to_frame() if isinstance(value, pd.Series) else value
+        columns = frame.columns
+        table = json.loads(frame.to_json(orient='table', date_format='iso'))
+        # pandas writes at most 15 digits; floats are stored exactly (as json does) instead
+        flat = frame.reset_index()
+        for field, col in zip(table['schema']['fields'], flat.columns):
+            if pd.api.types.is_float_dtype(flat[col]):
+                for row, number in zip(table['data'], flat[col].tolist()):
+                    row[field['name']] = None if pd.isna(number) else number
+        return {
+            '__frame__': table,
+            'series': isinstance(value, pd.Series),
+            'columns_name': columns.name,
+            'columns_categories': list(columns.categories) if isinstance(columns, pd.CategoricalIndex) else None,
+        }
+    if isinstance(value, tuple):
+        return {'__tuple__': [_encode_snapshot(item) for item in value]}
+    if isinstance(value, dict):
+        return {key: _encode_snapshot(item) for key, item in value.items()}
+    if isinstance(value, datetime):
+        return {'__timestamp__': value.isoformat()}
+    if isinstance(value, date):
+        return {'__date__': value.isoformat()}
+    if hasattr(value, 'item'):
+        # numpy scalars
+        return value.item()
+    return value
+
+
+def _decode_snapshot(obj):
+    """json object_hook restoring the values tagged by _encode_snapshot"""
+    if '__frame__' in obj:
+        frame = pd.read_json(io.StringIO(json.dumps(obj['__frame__'])), orient='table', precise_float=True)
+        if obj['columns_categories'] is not None:
+            frame.columns = pd.CategoricalIndex(frame.columns, categories=obj['columns_categories'])
+        frame.columns.name = obj['columns_name']
+        return frame.iloc[:, 0] if obj['series'] else frame
+    if list(obj) == ['__tuple__']:
+        return tuple(obj['__tuple__'])
+    if list(obj) == ['__timestamp__']:
+        return pd.Timestamp(obj['__timestamp__'])
+    if list(obj) == ['__date__']:
+        return date.fromisoformat(obj['__date__'])
+    return obj
+
+
+def write_snapshot(path, source_version, version, presets):
+    """
+    Save the cached aggregates of a dataset version with the filters of the presets.
+
+    The snapshot is plain JSON, so the dashboard and the API can load it without
+    running code from the results folder.
+
+    Args:
+        path: Output file (see snapshot_path)
+        source_version: dataset_version of the results CSV the aggregates come from
+        version: Dataset version in the aggregate cache keys
+        presets: Dict of preset name to its filters
+    """
+    # Keys are stored without the dataset version, which depends on the dashboard backend
+    entries = [
+        {'key': _encode_snapshot((name, cache_key[1], args, kwargs)), 'value': _encode_snapshot(value)}
+        for (name, cache_key, args, kwargs), value in AGGREGATE_CACHE.items()
+        if isinstance(cache_key, tuple) and cache_key[0] == version
+    ]
+    snapshot = {'source_version': source_version, 'presets': _encode_snapshot(presets), 'entries': entries}
+    tmp_file = path + ".tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_file, path)
+
+
+def load_snapshot(path):
+    """Load a snapshot written by write_snapshot"""
+    with open(path, encoding='utf-8') as f:
+        snapshot = json.load(f, object_hook=_decode_snapshot)
+    snapshot['entries'] = [(entry['key'], entry['value']) for entry in snapshot['entries']]
+    return snapshot
+
+
+def snapshot_entries(snapshot, version):
+    """Aggregate cache entries of a snapshot, keyed for the dataset version `version`"""
+    return [((name, (version, filters), args, kwargs), value)
+            for (name, filters, args, kwargs), value in snapshot['entries']]
+
+
+def load_dataset(csv_path):
+    """
+    Load consolidated results like the dashboard does by default.
+
+    Returns:
+        Tuple of (reviews or ReviewStore, cube, topic cube, competitor table or None)
+    """
+    parquet_path = os.path.splitext(csv_path)[0] + '.parquet'
+    if use_sql_backend(parquet_path):
+        store = ReviewStore(parquet_path)
+        cube, topic_cube = build_review_cube(store)
+        return store, cube, topic_cube, None
+    results = ResultsDataset().refresh(csv_path)
+    return results.df, results.cube, results.topic_cube, results.competitor_table
+
+
+def generate_reports(csv_path, preset_names=None, output_dir=REPORTS_DIR):
+    """
+    Write the reports of the given presets (all by default) and the preset snapshot.
+
+    Returns:
+        List of the written paths
+    """
+    df, cube, topic_cube, competitor_table = load_dataset(csv_path)
+    written = []
+    presets = {}
+    for name in preset_names or FILTER_PRESETS:
+        preset = FILTER_PRESETS[name]
+        filters = preset_filters(preset, cube)
+        presets[name] = filters
+        report = build_report(df, cube, topic_cube, competitor_table, filters)
+        title = f"MyBMW App Review Analysis - {preset['label']}"
+        written += write_report(report, name, title, output_dir)
+
+    output_file = snapshot_path(csv_path)
+    write_snapshot(output_file, dataset_version(csv_path), df.attrs['dataset_version'], presets)
+    written.append(output_file)
+    return written
+
+
+if __name__ == "__main__":
+    unknown_presets = [name for name in sys.argv[1:] if name not in FILTER_PRESETS]
+    if unknown_presets:
+        print(__doc__)
+        print(f"Unknown presets: {', '.join(unknown_presets)} (available: {', '.join(FILTER_PRESETS)})")
+        sys.exit(1)
+    data_file = latest_results_file(RESULTS_DIR)
+    if data_file is None:
+        print("No consolidated results found. Please run classification.py first.")
+        sys.exit(1)
+    for output_file in generate_reports(data_file, sys.argv[1:]):
+        print(f"Saved {output_file}")
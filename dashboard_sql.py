@@ -0,0 +1,582 @@
+"""
+DuckDB backend for the BMW app review dashboard.
+
+Large consolidated results are converted once to Parquet (see write_parquet) and
+queried in place: sidebar filters become WHERE clauses and the section aggregates
+of dashboard_data are answered by SQL, so only aggregated rows are loaded into
+pandas. Kept free of Streamlit like dashboard_data.
+
+Usage:
+    python dashboard_sql.py bmw_app_analysis/results/bmw_reviews_consolidated_<timestamp>.csv
+"""
+
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+from dashboard_data import (
+    ALLOWED_COMPETITORS, COMPETITOR_SEPARATORS, COMPETITOR_VARIANTS, CUBE_DIMENSIONS, LABEL_COLUMNS,
+    EXPORT_FORMATS, TEXT_COLUMNS, add_cube_keys, build_review_cube, competitor_counts, competitor_sentiment,
+    dataset_version, export_reviews,
+    language_topic_ratings, mean_review_length, rating_matrix, review_page, sort_by_abs_change,
+    topic_competitor_rates, topic_polarity_change, topic_review_lengths, topic_sentiment_counts,
+    topic_version_counts, topic_version_polarity, version_polarity_table, version_sort_key
+)
+from review_search import (
+    RESULT_COLUMNS, SEARCH_COLUMNS, FieldIndex, SearchIndex, build_search_index, search_results
+)
+from review_similarity import similar_reviews
+
+# DuckDB is only needed for the SQL backend
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# Parquet files smaller than this are loaded into pandas when the backend is 'auto'
+SQL_BACKEND_MIN_BYTES = 100 * 1024 * 1024
+
+# Rows per Parquet row group; small groups let the texts of a few reviews be read
+# by review id without scanning whole columns
+PARQUET_ROW_GROUP_SIZE = 10_000
+
+# Columns of the reviews view that are not part of the exported reviews
+# (file_row_number is the review id used by the search index)
+INTERNAL_COLUMNS = ['topic_list', 'competitors', 'file_row_number']
+
+
+def _literal(value):
+    """SQL string literal"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _require_duckdb():
+    if duckdb is None:
+        raise ImportError("duckdb is required for the SQL backend (pip install duckdb)")
+
+
+def write_parquet(csv_path, parquet_path=None):
+    """
+    Convert consolidated results to a Parquet file the SQL backend can query.
+
+    The derived columns of normalize_reviews and add_derived_columns (version_str,
+    version_num, star_rating, review_length, has_allowed_competitor) are computed once
+    here, together with the split topics ('topic_list') and the canonical competitor
+    names ('competitors') of each review.
+
+    Args:
+        csv_path: Consolidated results CSV
+        parquet_path: Output file (defaults to the CSV path with a .parquet extension)
+
+    Returns:
+        Path of the written Parquet file
+    """
+    _require_duckdb()
+    if parquet_path is None:
+        parquet_path = os.path.splitext(csv_path)[0] + '.parquet'
+
+    con = duckdb.connect()
+    columns = [row[0] for row in con.execute(
+        f"DESCRIBE SELECT * FROM read_csv({_literal(csv_path)}, all_varchar = true)"
+    ).fetchall()]
+
+    # Version strings must not be read as numbers (4.10 would become 4.1) nor yes/no labels as booleans
+    text_columns = [col for col in ['reviewId', 'appVersion', 'reviewCreatedVersion', 'topics', 'competitor_mentioned']
+                    + LABEL_COLUMNS if col in columns]
+    types = ", ".join(f"{_literal(col)}: 'VARCHAR'" for col in text_columns)
+    source = f"read_csv({_literal(csv_path)}, types = {{{types}}})" if types else f"read_csv({_literal(csv_path)})"
+
+    replaced = []
+    derived = []
+    if 'date' in columns:
+        replaced.append("TRY_CAST(date AS TIMESTAMP) AS date")
+    if 'appVersion' in columns:
+        derived.append("NULLIF(regexp_extract(appVersion, '^(\\d+\\.\\d+)', 1), '') AS version_str")
+        derived.append("CAST(split_part(version_str, '.', 1) AS INTEGER)"
+                       " + CAST(split_part(version_str, '.', 2) AS INTEGER) / 1000 AS version_num")
+    if 'score' in columns:
+        derived.append("CAST(least(greatest(round_even(score, 0), 1), 5) AS INTEGER) AS star_rating")
+    if 'content' in columns:
+        derived.append("length(CAST(content AS VARCHAR)) AS review_length")
+    if 'competitor_mentioned' in columns:
+        variants = " ".join(f"WHEN {_literal(name)} THEN {_literal(canonical)}"
+                            for name, canonical in COMPETITOR_VARIANTS.items())
+        allowed = "[" + ", ".join(_literal(name) for name in ALLOWED_COMPETITORS) + "]"
+        derived.append(
+            "list_filter(list_transform("
+            f"regexp_split_to_array(lower(CAST(competitor_mentioned AS VARCHAR)), {_literal(COMPETITOR_SEPARATORS)}), "
+            f"name -> CASE trim(name) {variants} ELSE trim(name) END), "
+            f"name -> list_contains({allowed}, name)) AS competitors"
+        )
+        derived.append("coalesce(len(competitors) > 0, false) AS has_allowed_competitor")
+    if 'topics' in columns:
+        derived.append("list_transform(string_split(CAST(topics AS VARCHAR), ','), "
+                       "topic -> trim(topic, ' \t\n\r')) AS topic_list")
+
+    select = "*" + (f" REPLACE ({', '.join(replaced)})" if replaced else "")
+    # Derived columns can refer to the ones defined before them
+    query = f"SELECT {', '.join([select] + derived)} FROM {source}"
+    con.execute(f"COPY ({query}) TO {_literal(parquet_path)} (FORMAT PARQUET, ROW_GROUP_SIZE {PARQUET_ROW_GROUP_SIZE})")
+    con.close()
+    return parquet_path
+
+
+def use_sql_backend(parquet_path, backend='auto', min_bytes=SQL_BACKEND_MIN_BYTES):
+    """
+    Decide whether the dashboard should query `parquet_path` with DuckDB.
+
+    Args:
+        parquet_path: Parquet copy of the results (see write_parquet)
+        backend: 'pandas', 'duckdb' or 'auto' (DuckDB when it is installed and the
+            Parquet file exists and has at least `min_bytes`)
+    """
+    if backend == 'pandas':
+        return False
+    if backend == 'duckdb':
+        return True
+    return duckdb is not None and os.path.exists(parquet_path) and os.path.getsize(parquet_path) >= min_bytes
+
+
+def has_parquet_copy(parquet_path):
+    """Whether `parquet_path` exists and can be queried (the review texts can then be read on demand)"""
+    return duckdb is not None and os.path.exists(parquet_path)
+
+
+class ReviewStore:
+    """Reviews in a Parquet file, queried with DuckDB (the SQL counterpart of the loaded DataFrame)."""
+
+    def __init__(self, parquet_path):
+        _require_duckdb()
+        if not os.path.exists(parquet_path):
+            raise FileNotFoundError(parquet_path)
+
+        self.path = parquet_path
+        self.attrs = {'dataset_version': dataset_version(parquet_path)}
+        self._con = duckdb.connect()
+        self._con.execute(
+            f"CREATE VIEW reviews AS SELECT * FROM read_parquet({_literal(parquet_path)}, file_row_number = true)"
+        )
+        self._lock = threading.Lock()
+
+        described = self.query("DESCRIBE reviews")
+        self.column_types = dict(zip(described['column_name'], described['column_type']))
+        self.columns = pd.Index([col for col in self.column_types if col not in INTERNAL_COLUMNS])
+
+        # All versions in version order, used as categories like version_str in pandas
+        if 'version_str' in self.column_types:
+            versions = self.query("SELECT DISTINCT version_str FROM reviews WHERE version_str IS NOT NULL")
+            self.versions = sorted(versions['version_str'], key=version_sort_key)
+        else:
+            self.versions = []
+
+    def query(self, sql, params=None):
+        """Run a query and return its result as a DataFrame (safe to call from several threads)"""
+        with self._lock:
+            cursor = self._con.cursor()
+        try:
+            return cursor.execute(sql, params).df() if params else cursor.execute(sql).df()
+        finally:
+            cursor.close()
+
+    def iter_query(self, sql, chunk_size=50_000):
+        """Run a query and yield its result as DataFrames of about `chunk_size` rows"""
+        with self._lock:
+            cursor = self._con.cursor()
+        try:
+            cursor.execute(sql)
+            # DuckDB returns results in vectors of 2048 rows
+            vectors = max(1, chunk_size // 2048)
+            while True:
+                chunk = cursor.fetch_df_chunk(vectors)
+                if chunk.empty:
+                    break
+                yield chunk
+        finally:
+            cursor.close()
+
+    def rows(self, review_ids, columns):
+        """The `columns` of the reviews with the given ids, indexed by review id in the same order"""
+        review_ids = [int(review_id) for review_id in review_ids]
+        found = self.query(
+            f"SELECT file_row_number, {', '.join(columns)} FROM reviews WHERE file_row_number IN (SELECT unnest($review_ids))",
+            {'review_ids': review_ids}
+        )
+        return found.set_index('file_row_number').rename_axis(None).reindex(review_ids)
+
+    def metadata(self):
+        """All reviews without their text columns as a DataFrame indexed by review id"""
+        columns = [col for col in self.columns if col not in TEXT_COLUMNS]
+        frame = self.query(f"SELECT file_row_number, {', '.join(columns)} FROM reviews ORDER BY file_row_number")
+        # Nanosecond timestamps, as read_csv and pd.to_datetime produce
+        for col in frame.select_dtypes('datetime').columns:
+            frame[col] = frame[col].astype('datetime64[ns]')
+        return frame.set_index('file_row_number').rename_axis(None)
+
+    def select(self, date_range=None, language='All', rating_range=None, version='All'):
+        """Reviews matching the sidebar filters (same arguments as filter_mask)"""
+        return ReviewSelection(self, date_range, language, rating_range, version)
+
+    def yes_expression(self, column):
+        """SQL condition equivalent to yes_mask for a yes/no label column"""
+        if self.column_types.get(column) == 'BOOLEAN':
+            return f"coalesce({column}, false)"
+        return f"lower(CAST({column} AS VARCHAR)) = 'yes'"
+
+    def version_categorical(self, values):
+        """Major.minor version strings as an ordered categorical in version order"""
+        return pd.Categorical(values, categories=self.versions, ordered=True)
+
+
+class ReviewSelection:
+    """Reviews of a ReviewStore matching the sidebar filters (the SQL counterpart of filtered_df)."""
+
+    def __init__(self, store, date_range=None, language='All', rating_range=None, version='All'):
+        self.store = store
+        self.columns = store.columns
+
+        clauses = []
+        self.params = {}
+        if date_range is not None and 'date' in store.columns:
+            clauses.append("date >= $start_date AND date < $end_date")
+            self.params['start_date'] = pd.Timestamp(date_range[0]).to_pydatetime()
+            self.params['end_date'] = (pd.Timestamp(date_range[1]) + pd.Timedelta(days=1)).to_pydatetime()
+        if language != 'All' and 'language' in store.columns:
+            clauses.append("language = $language")
+            self.params['language'] = language
+        if rating_range is not None and 'score' in store.columns:
+            clauses.append("score BETWEEN $min_score AND $max_score")
+            self.params['min_score'], self.params['max_score'] = rating_range
+        if version != 'All' and 'version_str' in store.columns:
+            clauses.append("version_str = $version")
+            self.params['version'] = version
+        self.where = " AND ".join(clauses) if clauses else "true"
+
+    def query(self, sql, **params):
+        """Run a query in which '{where}' stands for the filter condition"""
+        return self.store.query(sql.format(where=self.where), {**self.params, **params})
+
+    def topic_counts(self):
+        """Number of mentions per topic (reviews may repeat a topic), most mentioned first"""
+        counts = self.query(
+            "SELECT topic, count(*) AS count "
+            "FROM (SELECT unnest(topic_list) AS topic FROM reviews WHERE {where}) "
+            "GROUP BY topic ORDER BY count DESC, topic"
+        )
+        return counts.set_index('topic')['count']
+
+def _direction(column='sentiment'):
+    """+1 for positive, -1 for negative and 0 for other reviews (the mean is the polarity)"""
+    return f"CASE {column} WHEN 'positive' THEN 1 WHEN 'negative' THEN -1 ELSE 0 END"
+
+
+@build_review_cube.register
+def _(store: ReviewStore):
+    dimensions = [col for col in CUBE_DIMENSIONS if col in store.columns]
+    keys = ", ".join("date_trunc('day', date) AS date" if col == 'date' else col for col in dimensions)
+
+    def as_pandas_cube(cube):
+        for col in dimensions:
+            if col == 'version_str':
+                cube[col] = store.version_categorical(cube[col])
+            elif col in LABEL_COLUMNS:
+                cube[col] = cube[col].astype('category')
+        if 'date' in cube.columns:
+            cube['date'] = cube['date'].astype('datetime64[ns]')
+        return add_cube_keys(cube)
+
+    cube = as_pandas_cube(store.query(f"SELECT {keys}, count(*) AS review_count FROM reviews GROUP BY ALL"))
+
+    if 'topic_list' in store.column_types:
+        topic_cube = as_pandas_cube(store.query(
+            f"SELECT {keys}, topic, count(*) AS review_count "
+            f"FROM (SELECT *, unnest(topic_list) AS topic FROM reviews) GROUP BY ALL"
+        ))
+    else:
+        topic_cube = pd.DataFrame(columns=dimensions + ['topic', 'review_count'])
+
+    return cube, topic_cube
+
+
+@topic_polarity_change.register
+def _(selection: ReviewSelection, top_n=10, min_reviews=20):
+    polarity_df = selection.query(f"""
+        WITH versioned AS (
+            SELECT topic_list, version_num, {_direction()} AS direction
+            FROM reviews WHERE {{where}} AND version_str IS NOT NULL
+        ),
+        pairs AS (SELECT unnest(list_distinct(topic_list)) AS topic, version_num, direction FROM versioned),
+        split_point AS (SELECT median(version_num) AS median_version FROM versioned),
+        top_topics AS (
+            SELECT topic, count(*) AS mentions
+            FROM (SELECT unnest(topic_list) AS topic FROM versioned)
+            GROUP BY topic ORDER BY mentions DESC, topic LIMIT $top_n
+        )
+        SELECT
+            top_topics.topic,
+            coalesce(avg(direction) FILTER (WHERE version_num >= median_version), 0) AS recent_polarity,
+            coalesce(avg(direction) FILTER (WHERE version_num < median_version), 0) AS earlier_polarity,
+            count(*) AS review_count
+        FROM top_topics
+        JOIN pairs ON pairs.topic = top_topics.topic
+        CROSS JOIN split_point
+        GROUP BY top_topics.topic, top_topics.mentions
+        HAVING count(*) >= $min_reviews
+        ORDER BY top_topics.mentions DESC, top_topics.topic
+    """, top_n=top_n, min_reviews=min_reviews)
+
+    polarity_df['change'] = polarity_df['recent_polarity'] - polarity_df['earlier_polarity']
+    polarity_df = polarity_df[['topic', 'recent_polarity', 'earlier_polarity', 'change', 'review_count']]
+    return sort_by_abs_change(polarity_df)
+
+
+@topic_version_polarity.register
+def _(selection: ReviewSelection, top_n=10, min_topic_reviews=50, min_reviews=10, min_versions=3):
+    topic_counts = selection.topic_counts()
+    significant_topics = topic_counts[topic_counts >= min_topic_reviews].head(top_n).index.tolist()
+
+    grouped = selection.query(f"""
+        SELECT topic, version_str, avg(direction) AS mean, count(*) AS size
+        FROM (
+            SELECT unnest(list_distinct(topic_list)) AS topic, version_str, version_num, {_direction()} AS direction
+            FROM reviews WHERE {{where}} AND version_str IS NOT NULL
+        )
+        WHERE list_contains($topics, topic)
+        GROUP BY topic, version_str, version_num
+        ORDER BY topic, version_num
+    """, topics=significant_topics)
+    grouped['version_str'] = selection.store.version_categorical(grouped['version_str'])
+
+    return version_polarity_table(grouped.set_index(['topic', 'version_str']), significant_topics, min_reviews, min_versions)
+
+
+@language_topic_ratings.register
+def _(selection: ReviewSelection, top_languages=10, top_topics=10):
+    language_counts = selection.query(
+        "SELECT language, count(*) AS count FROM reviews WHERE {where} AND language IS NOT NULL "
+        "GROUP BY language ORDER BY count DESC, language LIMIT $top_languages",
+        top_languages=top_languages
+    )
+    languages = language_counts['language'].tolist()
+    topics = selection.topic_counts().head(top_topics).index.tolist()
+
+    mean_ratings = selection.query("""
+        SELECT topic, language, avg(score) AS score
+        FROM (SELECT unnest(list_distinct(topic_list)) AS topic, language, score FROM reviews WHERE {where})
+        WHERE list_contains($topics, topic) AND list_contains($languages, language)
+        GROUP BY topic, language
+    """, topics=topics, languages=languages)
+
+    return rating_matrix(mean_ratings.set_index(['topic', 'language'])['score'].unstack(), topics, languages)
+
+
+@competitor_counts.register
+def _(selection: ReviewSelection):
+    counts = selection.query(
+        "SELECT competitor, count(*) AS count "
+        "FROM (SELECT unnest(competitors) AS competitor FROM reviews WHERE {where}) "
+        "GROUP BY competitor ORDER BY count DESC, list_position($allowed, competitor)",
+        allowed=ALLOWED_COMPETITORS
+    )
+    return counts.set_index('competitor')['count']
+
+
+@topic_competitor_rates.register
+def _(selection: ReviewSelection, mentions=None, min_reviews=30):
+    # Mentions are read from the 'competitors' column; `mentions` is only used by the pandas version
+    per_topic = selection.query("""
+        SELECT topic, avg(CAST(has_allowed_competitor AS DOUBLE)) * 100 AS competitor_mention_rate,
+               count(*) AS review_count
+        FROM (SELECT unnest(list_distinct(topic_list)) AS topic, has_allowed_competitor FROM reviews WHERE {where})
+        GROUP BY topic
+        HAVING count(*) >= $min_reviews AND bool_or(has_allowed_competitor)
+    """, min_reviews=min_reviews)
+
+    topic_mentions = selection.query("""
+        SELECT topic, competitor, count(*) AS mentions
+        FROM (
+            SELECT unnest(list_distinct(topic_list)) AS topic, competitors
+            FROM reviews WHERE {where} AND has_allowed_competitor
+        ), unnest(competitors) AS mentioned(competitor)
+        GROUP BY topic, competitor
+    """)
+    # Ties go to the competitor listed first in ALLOWED_COMPETITORS, as in the pandas version
+    topic_mentions['rank'] = topic_mentions['competitor'].map(ALLOWED_COMPETITORS.index)
+    top_competitor = (
+        topic_mentions.sort_values(['mentions', 'rank'], ascending=[False, True], kind='stable')
+            .drop_duplicates('topic')
+            .set_index('topic')['competitor'].str.title()
+    )
+
+    per_topic['top_competitor'] = top_competitor.reindex(per_topic['topic']).to_numpy()
+    return per_topic
+
+
+@competitor_sentiment.register
+def _(selection: ReviewSelection, mentions=None):
+    counts = selection.query(
+        "SELECT competitor, sentiment, count(*) AS count "
+        "FROM (SELECT unnest(competitors) AS competitor, sentiment FROM reviews WHERE {where} AND sentiment IS NOT NULL) "
+        "GROUP BY competitor, sentiment"
+    )
+    counts = (
+        counts.set_index(['competitor', 'sentiment'])['count']
+            .unstack(fill_value=0)
+            .reindex(columns=['positive', 'neutral', 'negative'], fill_value=0)
+    )
+    counts = counts.reindex([name for name in ALLOWED_COMPETITORS if name in counts.index])
+    return counts.loc[counts.sum(axis=1).sort_values(ascending=False, kind='stable').index]
+
+
+def _topic_matches(selection, measures, min_reviews):
+    """Aggregate `measures` over the reviews of each topic"""
+    return selection.query(f"""
+        SELECT topic, {measures}
+        FROM (SELECT *, unnest(list_distinct(topic_list)) AS topic FROM reviews WHERE {{where}})
+        GROUP BY topic
+        HAVING count(*) >= $min_reviews
+    """, min_reviews=min_reviews)
+
+
+@topic_sentiment_counts.register
+def _(selection: ReviewSelection, min_reviews=20):
+    sentiments = selection.store.query(
+        "SELECT DISTINCT sentiment FROM reviews WHERE sentiment IS NOT NULL ORDER BY sentiment"
+    )['sentiment'].tolist()
+    measures = ", ".join(
+        [f'count(*) FILTER (WHERE sentiment = {_literal(value)}) AS "{value}"' for value in sentiments]
+        or ["count(*) AS total"]
+    )
+    counts = _topic_matches(selection, measures, min_reviews).set_index('topic')[sentiments]
+    counts = counts.rename_axis(index=None, columns='sentiment')
+
+    for sentiment in ['positive', 'neutral', 'negative']:
+        if sentiment not in counts.columns:
+            counts[sentiment] = 0
+    return counts
+
+
+@topic_review_lengths.register
+def _(selection: ReviewSelection, min_reviews=20):
+    return _topic_matches(
+        selection,
+        "avg(review_length) AS avg_length, median(review_length) AS median_length, count(*) AS review_count",
+        min_reviews
+    )
+
+
+@mean_review_length.register
+def _(selection: ReviewSelection):
+    return selection.query("SELECT avg(review_length) AS mean FROM reviews WHERE {where}")['mean'].iloc[0]
+
+
+@export_reviews.register
+def _(selection: ReviewSelection, path, file_format='csv', columns=None, chunk_size=50_000):
+    # DuckDB streams the query result into the file itself; chunk_size is not needed
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {file_format}")
+    columns = ", ".join(f'"{col}"' for col in (selection.columns if columns is None else columns))
+    options = {
+        'csv': "FORMAT CSV, HEADER, COMPRESSION gzip",
+        'parquet': "FORMAT PARQUET, COMPRESSION zstd",
+        'jsonl': "FORMAT JSON, COMPRESSION gzip"
+    }[file_format]
+    selection.query(f"COPY (SELECT {columns} FROM reviews WHERE {{where}}) TO {_literal(path)} ({options})")
+
+
+@build_search_index.register
+def _(store: ReviewStore, chunk_size=50_000):
+    # Texts are streamed in chunks, so only the integer postings are kept in memory
+    def chunks(column):
+        for chunk in store.iter_query(f'SELECT file_row_number, "{column}" FROM reviews', chunk_size):
+            yield chunk['file_row_number'].to_numpy(dtype=np.int64), chunk[column]
+
+    return SearchIndex({
+        column: FieldIndex.build(chunks(column))
+        for column in SEARCH_COLUMNS if column in store.columns
+    })
+
+
+@search_results.register
+def _(selection: ReviewSelection, review_ids, page=0, page_size=20):
+    condition = "{where} AND file_row_number IN (SELECT unnest($review_ids))"
+    review_ids = [int(review_id) for review_id in review_ids]
+
+    total = selection.query(f"SELECT count(*) AS total FROM reviews WHERE {condition}", review_ids=review_ids)
+    columns = [col for col in RESULT_COLUMNS if col in selection.columns]
+    order = "date DESC, file_row_number" if 'date' in columns else "file_row_number"
+    results = selection.query(
+        f"SELECT file_row_number, {', '.join(columns)} FROM reviews WHERE {condition} "
+        f"ORDER BY {order} LIMIT $limit OFFSET $offset",
+        review_ids=review_ids, limit=page_size, offset=page * page_size
+    )
+    return int(total['total'].iloc[0]), results.set_index('file_row_number').rename_axis(None)
+
+
+@similar_reviews.register
+def _(selection: ReviewSelection, index, review_id, k=10):
+    def allowed(review_ids):
+        matching = selection.query(
+            "SELECT file_row_number FROM reviews WHERE {where} AND file_row_number IN (SELECT unnest($review_ids))",
+            review_ids=[int(review_id) for review_id in review_ids]
+        )
+        return np.isin(review_ids, matching['file_row_number'].to_numpy())
+
+    review_ids, scores = index.search(review_id, k, allowed=None if selection.where == "true" else allowed)
+    results = selection.store.rows(review_ids, [col for col in RESULT_COLUMNS if col in selection.columns])
+    results.insert(0, 'similarity', scores)
+    return results
+
+
+@review_page.register
+def _(selection: ReviewSelection, sort_by='date', ascending=False, page=0, page_size=20):
+    total = selection.query("SELECT count(*) AS total FROM reviews WHERE {where}")
+    direction = "ASC" if ascending else "DESC"
+    results = selection.query(
+        f"SELECT file_row_number, {', '.join(selection.columns)} FROM reviews WHERE {{where}} "
+        f"ORDER BY {sort_by} {direction} NULLS LAST, file_row_number LIMIT $limit OFFSET $offset",
+        limit=page_size, offset=page * page_size
+    )
+    return int(total['total'].iloc[0]), results.set_index('file_row_number').rename_axis(None)
+
+
+def with_texts(reviews, store, columns=TEXT_COLUMNS):
+    """
+    Add the text columns missing from a page of reviews, read from the Parquet copy.
+
+    Args:
+        reviews: DataFrame indexed by review id
+        store: ReviewStore of the dataset, or None when the texts are kept in memory
+        columns: Text columns to add
+    """
+    missing = [col for col in columns if col not in reviews.columns and store is not None and col in store.columns]
+    if not missing or reviews.empty:
+        return reviews
+    return reviews.join(store.rows(reviews.index, missing))
+
+
+@topic_version_counts.register
+def _(selection: ReviewSelection):
+    counts = selection.query(f"""
+        SELECT topic, version_str, count(*) AS reviews,
+               count(*) FILTER (WHERE sentiment = 'negative') AS negative,
+               count(*) FILTER (WHERE {selection.store.yes_expression('is_feature_request')}) AS feature_requests
+        FROM (
+            SELECT unnest(list_distinct(topic_list)) AS topic, version_str, version_num, sentiment, is_feature_request
+            FROM reviews WHERE {{where}}
+        )
+        GROUP BY topic, version_str, version_num
+        ORDER BY topic, version_num NULLS LAST
+    """)
+    counts['version_str'] = selection.store.version_categorical(counts['version_str'])
+    return counts.set_index(['topic', 'version_str'])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(1)
+    output_file = write_parquet(sys.argv[1])
+    print(f"Saved Parquet copy of {sys.argv[1]} to {output_file}")
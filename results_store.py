@@ -0,0 +1,412 @@
+"""
+Discovery and incremental loading of the consolidated results for the dashboard.
+
+classification.py records every consolidated results file in a manifest next to the
+results (see record_results) and the dashboard opens the latest one. A loaded file
+is fingerprinted, so when the latest results only grew (the previously loaded
+contents are an exact prefix of the file), just the new rows are parsed and folded
+into the cached frame and the indexes derived from it. Kept free of Streamlit like
+dashboard_data.
+
+While classification is running, every finished batch checkpoint is also listed in
+the manifest as a fragment of the live run (see record_fragment). Checkpoints are
+written to a temporary file and renamed, and the manifest is replaced atomically,
+so a reader only ever sees complete fragments and can follow the run with
+LiveDataset before the checkpoints are merged.
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from dashboard_data import (
+    add_derived_columns, build_competitor_table, build_review_cube, dataset_version,
+    normalize_reviews, version_sort_key
+)
+from review_sample import ReviewSample
+from review_search import SearchIndex, build_search_index
+
+# Folder of the consolidated results written by classification.py
+RESULTS_DIR = os.path.join("bmw_app_analysis", "results")
+
+# Manifest of the consolidated results files in RESULTS_DIR
+MANIFEST_FILE = "manifest.json"
+
+# Consolidated results files, used when there is no manifest (timestamps sort by name)
+RESULTS_PATTERN = "bmw_reviews_consolidated_*.csv"
+
+
+def load_manifest(results_dir=RESULTS_DIR):
+    """Load the results manifest of a folder, or an empty manifest if none was saved yet."""
+    manifest_file = os.path.join(results_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_file):
+        return {'latest': None, 'datasets': []}
+    try:
+        with open(manifest_file, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        logging.error(f"Error reading results manifest {manifest_file}: {e}")
+        return {'latest': None, 'datasets': []}
+
+
+def save_manifest(manifest, results_dir=RESULTS_DIR):
+    """Atomically write the results manifest of a folder."""
+    os.makedirs(results_dir, exist_ok=True)
+    manifest_file = os.path.join(results_dir, MANIFEST_FILE)
+    tmp_file = manifest_file + ".tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(tmp_file, manifest_file)
+
+
+def record_results(results_file, rows=None):
+    """
+    Add a consolidated results file to the manifest of its folder and make it the latest.
+
+    Args:
+        results_file: Path of the consolidated results
+        rows: Number of reviews in the file, if known
+    """
+    results_dir = os.path.dirname(results_file) or "."
+    manifest = load_manifest(results_dir)
+    name = os.path.basename(results_file)
+    manifest['datasets'] = [entry for entry in manifest['datasets'] if entry['file'] != name]
+    manifest['datasets'].append({
+        'file': name,
+        'rows': rows,
+        'created': datetime.now().isoformat(timespec='seconds')
+    })
+    manifest['latest'] = name
+    # The live run, if any, is now available as these results
+    if manifest.get('live') is not None:
+        manifest['live']['merged'] = name
+    save_manifest(manifest, results_dir)
+
+
+def _new_live_run():
+    return {'started': datetime.now().isoformat(timespec='seconds'), 'fragments': [], 'merged': None}
+
+
+def start_live_run(results_dir=RESULTS_DIR):
+    """Start a new live run in the manifest of a results folder, replacing any previous one."""
+    manifest = load_manifest(results_dir)
+    manifest['live'] = _new_live_run()
+    save_manifest(manifest, results_dir)
+
+
+def record_fragment(fragment_file, batch, rows=None, results_dir=RESULTS_DIR):
+    """
+    Add a finished batch checkpoint to the live run of a results folder.
+
+    Args:
+        fragment_file: Path of the checkpoint CSV, which must be completely written
+        batch: Batch number of the checkpoint (fragments are read in batch order)
+        rows: Number of reviews in the checkpoint, if known
+        results_dir: Folder whose manifest holds the live run
+    """
+    manifest = load_manifest(results_dir)
+    if manifest.get('live') is None:
+        manifest['live'] = _new_live_run()
+    live = manifest['live']
+    live['fragments'] = [entry for entry in live['fragments'] if entry['batch'] != batch]
+    live['fragments'].append({
+        'file': os.path.relpath(fragment_file, results_dir),
+        'batch': batch,
+        'rows': rows,
+        'created': datetime.now().isoformat(timespec='seconds')
+    })
+    live['fragments'].sort(key=lambda entry: entry['batch'])
+    save_manifest(manifest, results_dir)
+
+
+def live_fragment_files(results_dir=RESULTS_DIR):
+    """Paths of the fragments of the live run in batch order, or [] when no run is in progress"""
+    live = load_manifest(results_dir).get('live')
+    if live is None or live.get('merged'):
+        return []
+    return [os.path.normpath(os.path.join(results_dir, entry['file'])) for entry in live['fragments']]
+
+
+def fragments_version(paths):
+    """Identifier of the current contents of a list of fragment files"""
+    versions = '|'.join(dataset_version(path) for path in paths)
+    return f"live:{len(paths)}:{hashlib.sha1(versions.encode()).hexdigest()[:16]}"
+
+
+def latest_results_file(results_dir=RESULTS_DIR):
+    """
+    Path of the newest consolidated results.
+
+    Returns:
+        The manifest's latest file when it exists, otherwise the newest file matching
+        RESULTS_PATTERN, or None when there are no results
+    """
+    latest = load_manifest(results_dir).get('latest')
+    if latest and os.path.exists(os.path.join(results_dir, latest)):
+        return os.path.join(results_dir, latest)
+
+    candidates = sorted(glob.glob(os.path.join(results_dir, RESULTS_PATTERN)))
+    return candidates[-1] if candidates else None
+
+
+def _digests(path, prefix_size=None, block_size=1 << 20):
+    """SHA-1 of a file and of its first `prefix_size` bytes (None when the file is shorter)"""
+    digest = hashlib.sha1()
+    prefix_digest = None
+    read = 0
+    with open(path, 'rb') as f:
+        while True:
+            # Stop a block at the prefix boundary to take the prefix digest there
+            size = block_size if prefix_size is None or read >= prefix_size else min(block_size, prefix_size - read)
+            block = f.read(size)
+            if not block:
+                break
+            digest.update(block)
+            read += len(block)
+            if read == prefix_size:
+                prefix_digest = digest.hexdigest()
+    return digest.hexdigest(), prefix_digest
+
+
+def _align_categories(first, second):
+    """
+    Give the categorical columns of two frames the union of their categories.
+
+    Categories are sorted like a full load would sort them (version_str by version).
+    """
+    first, second = first.copy(deep=False), second.copy(deep=False)
+    for col in first.columns:
+        if not isinstance(first[col].dtype, pd.CategoricalDtype) or col not in second.columns:
+            continue
+        other = second[col]
+        other = other.cat.categories if isinstance(other.dtype, pd.CategoricalDtype) else pd.Index(other.dropna().unique())
+        categories = first[col].cat.categories.union(other)
+        categories = sorted(categories, key=version_sort_key if col == 'version_str' else None)
+        dtype = pd.CategoricalDtype(categories, ordered=first[col].cat.ordered)
+        first[col] = first[col].astype(dtype)
+        second[col] = second[col].astype(dtype)
+    return first, second
+
+
+def append_reviews(df, new_rows):
+    """Normalised reviews followed by further normalised reviews, with merged categories"""
+    df, new_rows = _align_categories(df, new_rows)
+    return pd.concat([df, new_rows])
+
+
+def merge_cubes(cube, new_cube):
+    """Count cube of the reviews counted in either of two cubes built by build_review_cube"""
+    cube, new_cube = _align_categories(cube, new_cube)
+    # The derived keys (star_rating, version_num) follow from the other dimensions, so they are kept as keys
+    keys = [col for col in cube.columns if col != 'review_count']
+    return (
+        pd.concat([cube, new_cube], ignore_index=True)
+            .groupby(keys, observed=True, dropna=False, sort=False)['review_count'].sum()
+            .reset_index()
+            [cube.columns]
+    )
+
+
+class LoadedResults:
+    """One version of the consolidated results with the indexes derived from it."""
+
+    def __init__(self, df, cube, topic_cube, competitor_table, search_index=None, review_sample=None):
+        self.df = df
+        self.cube = cube
+        self.topic_cube = topic_cube
+        self.competitor_table = competitor_table
+        self._search_index = search_index
+        self._review_sample = review_sample
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, df):
+        """Derive the cubes and the competitor table of normalised reviews"""
+        cube, topic_cube = build_review_cube(df)
+        return cls(df, cube, topic_cube, build_competitor_table(df))
+
+    def search_index(self):
+        """Full-text search index of the reviews, built on first use"""
+        with self._lock:
+            if self._search_index is None:
+                self._search_index = build_search_index(self.df)
+            return self._search_index
+
+    def review_sample(self):
+        """Stratified sample of the reviews for approximate aggregates, drawn on first use"""
+        with self._lock:
+            if self._review_sample is None:
+                self._review_sample = ReviewSample.build(self.df, self.cube)
+            return self._review_sample
+
+    def appended(self, new_rows):
+        """
+        These results followed by `new_rows`, derived incrementally.
+
+        Args:
+            new_rows: Normalised reviews whose index continues the review ids of `df`
+        """
+        cube, topic_cube = build_review_cube(new_rows)
+        # A search index that was already built is extended rather than dropped
+        search_index = self._search_index
+        if search_index is not None:
+            search_index = SearchIndex.merge(search_index, build_search_index(new_rows))
+
+        df = append_reviews(self.df, new_rows)
+        df.attrs = dict(self.df.attrs)
+        cube = merge_cubes(self.cube, cube)
+        # Likewise a drawn sample is updated from its candidates and the new rows
+        review_sample = self._review_sample
+        if review_sample is not None:
+            review_sample = review_sample.appended(df, cube, len(self.df))
+        return LoadedResults(
+            df,
+            cube,
+            merge_cubes(self.topic_cube, topic_cube),
+            pd.concat([self.competitor_table, build_competitor_table(new_rows)]),
+            search_index,
+            review_sample
+        )
+
+
+class ResultsDataset:
+    """Consolidated results kept in memory and up to date with the latest results file."""
+
+    def __init__(self):
+        self.results = None
+        self.fingerprint = None
+        self.raw_dtypes = None
+        self.last_change = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _prepare(df):
+        # Parse dates, versions and label columns once instead of in every section
+        return add_derived_columns(normalize_reviews(df))
+
+    def _load(self, path):
+        raw = pd.read_csv(path)
+        self.raw_dtypes = raw.dtypes
+        results = LoadedResults.build(self._prepare(raw))
+        self.last_change = f"loaded {len(results.df):,} reviews"
+        return results
+
+    def _text_dtypes(self):
+        # Text columns of the first read are read as text, so e.g. versions in later rows stay strings
+        return {col: str for col, dtype in self.raw_dtypes.items() if pd.api.types.is_string_dtype(dtype)}
+
+    def _append(self, path):
+        with open(path, 'rb') as f:
+            f.seek(self.fingerprint['size'])
+            new_rows = pd.read_csv(f, header=None, names=list(self.raw_dtypes.index), dtype=self._text_dtypes())
+        new_rows.index = pd.RangeIndex(len(self.results.df), len(self.results.df) + len(new_rows))
+        results = self.results.appended(self._prepare(new_rows))
+        self.last_change = f"appended {len(new_rows):,} reviews"
+        return results
+
+    def _grew(self, fingerprint):
+        """Whether the fingerprinted file starts with the contents loaded last, ending on a row"""
+        if self.fingerprint is None or fingerprint['size'] <= self.fingerprint['size']:
+            return False
+        with open(fingerprint['path'], 'rb') as f:
+            f.seek(self.fingerprint['size'] - 1)
+            if f.read(1) != b'\n':
+                return False
+        return fingerprint['prefix_sha1'] == self.fingerprint['sha1']
+
+    def refresh(self, path):
+        """
+        Bring the dataset up to date with `path` and return its current results.
+
+        The file is only read when its size or modification time changed. When it
+        starts with the previously loaded contents, only the rows after them are
+        parsed; otherwise the whole file is reloaded.
+
+        Returns:
+            LoadedResults whose df.attrs['dataset_version'] identifies the loaded contents
+        """
+        with self._lock:
+            stat = os.stat(path)
+            previous = self.fingerprint
+            if (previous is not None and previous['path'] == path and previous['size'] == stat.st_size
+                    and previous['mtime_ns'] == stat.st_mtime_ns):
+                return self.results
+
+            sha1, prefix_sha1 = _digests(path, previous['size'] if previous is not None else None)
+            fingerprint = {'path': path, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                           'sha1': sha1, 'prefix_sha1': prefix_sha1}
+
+            if previous is not None and sha1 == previous['sha1']:
+                # Same contents (e.g. a copy or a touched file): the cached aggregates stay valid
+                self.fingerprint = fingerprint
+                return self.results
+
+            if self._grew(fingerprint):
+                results = self._append(path)
+            else:
+                results = self._load(path)
+
+            # Aggregates are cached per dataset version and filter selection
+            results.df.attrs['dataset_version'] = dataset_version(path)
+            self.results = results
+            self.fingerprint = fingerprint
+            return results
+
+
+class LiveDataset(ResultsDataset):
+    """Results of a classification run in progress, kept up to date with its fragments."""
+
+    def __init__(self):
+        super().__init__()
+        self.fragments = []
+
+    def _read_fragment(self, path):
+        if self.raw_dtypes is None:
+            raw = pd.read_csv(path)
+            self.raw_dtypes = raw.dtypes
+            return raw
+        return pd.read_csv(path, dtype=self._text_dtypes())
+
+    def _read_fragments(self, paths, start):
+        new_rows = pd.concat([self._read_fragment(path) for path in paths], ignore_index=True)
+        new_rows.index = pd.RangeIndex(start, start + len(new_rows))
+        return self._prepare(new_rows)
+
+    def refresh(self, paths):
+        """
+        Bring the dataset up to date with the fragments of the live run and return its results.
+
+        Only fragments that were added after the ones loaded last are read; when a
+        loaded fragment changed or was removed (e.g. a reprocessed batch), all
+        fragments are reloaded.
+
+        Args:
+            paths: Fragment files in batch order, as returned by live_fragment_files
+
+        Returns:
+            LoadedResults whose df.attrs['dataset_version'] identifies the loaded fragments
+        """
+        with self._lock:
+            versions = [dataset_version(path) for path in paths]
+            if self.results is not None and versions == self.fragments:
+                return self.results
+
+            loaded = len(self.fragments)
+            if self.results is not None and loaded and versions[:loaded] == self.fragments:
+                results = self.results.appended(self._read_fragments(paths[loaded:], len(self.results.df)))
+                self.last_change = f"appended {len(results.df) - len(self.results.df):,} reviews"
+            else:
+                self.raw_dtypes = None
+                results = LoadedResults.build(self._read_fragments(paths, 0))
+                self.last_change = f"loaded {len(results.df):,} reviews"
+
+            results.df.attrs['dataset_version'] = fragments_version(paths)
+            self.results = results
+            self.fragments = versions
+            return results
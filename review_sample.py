@@ -0,0 +1,280 @@
+"""
+Stratified review sample for the approximate mode of the BMW app review dashboard.
+
+Sections that aggregate review rows (topic polarity, version trends, feature
+requests, ...) take time proportional to the number of reviews. In approximate
+mode they are computed on a fixed-size sample instead, so their latency stays flat
+as the results grow, and the dashboard shows confidence intervals for the
+estimates.
+
+The sample is stratified by language, star rating and app version: every stratum
+gets a share of the SAMPLE_SIZE reviews proportional to its size, so the sidebar
+filters select the same share of the sample as of all reviews. Within a stratum the
+reviews with the smallest random sampling keys are drawn (a bottom-k reservoir).
+Only reviews whose key is small enough to be drawn at the current size are kept as
+candidates, and as the threshold can only fall when reviews are appended, an
+appended sample is drawn from the kept candidates and the new reviews without
+reading the earlier reviews again. Kept free of Streamlit like dashboard_data.
+"""
+
+import inspect
+
+import numpy as np
+import pandas as pd
+
+from dashboard_data import TEXT_COLUMNS, add_derived_columns, filter_mask, normalize_reviews, review_topics
+from dashboard_sql import ReviewStore
+
+# Reviews in the sample
+SAMPLE_SIZE = 100_000
+
+# Columns whose combinations are sampled proportionally
+SAMPLE_STRATA = ['language', 'star_rating', 'version_str']
+
+# Candidates kept per sampled review, so that strata that grow can still be filled
+CANDIDATE_FACTOR = 2
+
+# z value of the 95% confidence intervals
+CONFIDENCE_Z = 1.96
+
+
+def allocate(population, size):
+    """
+    Sample size of each stratum, proportional to its number of reviews.
+
+    Args:
+        population: Series of review counts per stratum
+        size: Total sample size (all reviews are taken when there are fewer)
+
+    Returns:
+        Series of rounded sample sizes with the index of `population`
+    """
+    total = population.sum()
+    if total <= size:
+        return population.copy()
+    return (population * size / total).round().astype(int)
+
+
+class ReviewSample:
+    """Stratified random sample of the reviews with the sampling keys of its candidates."""
+
+    def __init__(self, rows, population, keys=None, size=SAMPLE_SIZE, seed=0):
+        """
+        Args:
+            rows: Sampled reviews, indexed by review id
+            population: Number of reviews the sample was drawn from
+            keys: Sampling keys of the candidate reviews (by review id), used to
+                append reviews; None for a sample that cannot be extended
+        """
+        self.rows = rows
+        self.population = population
+        self.keys = keys
+        self.size = size
+        self.seed = seed
+
+    @property
+    def fraction(self):
+        """Share of the reviews that is in the sample"""
+        return len(self.rows) / self.population if self.population else 1.0
+
+    @classmethod
+    def build(cls, df, cube, size=SAMPLE_SIZE, seed=0):
+        """
+        Draw a sample of normalised reviews.
+
+        Args:
+            df: Reviews with the SAMPLE_STRATA columns
+            cube: Count cube of `df` (see build_review_cube), which gives the stratum sizes
+        """
+        keys = pd.Series(np.random.default_rng(seed).random(len(df)), index=df.index)
+        return cls._draw(df, cube, keys, size, seed)
+
+    def appended(self, df, cube, start):
+        """
+        This sample updated for reviews appended to the results.
+
+        Args:
+            df: All reviews, the new ones starting at position `start`
+            cube: Count cube of `df`
+        """
+        # Keys of the new reviews depend on their position, so a run of appends is reproducible
+        new_keys = np.random.default_rng([self.seed, start]).random(len(df) - start)
+        keys = pd.concat([self.keys, pd.Series(new_keys, index=df.index[start:])])
+        return self._draw(df, cube, keys, self.size, self.seed)
+
+    @classmethod
+    def _draw(cls, df, cube, keys, size, seed):
+        # Reviews with larger keys cannot be drawn now, nor after more reviews are appended
+        keys = keys[keys < CANDIDATE_FACTOR * size / max(len(df), 1)]
+
+        population = cube.groupby(SAMPLE_STRATA, observed=True, dropna=False)['review_count'].sum()
+        quotas = allocate(population, size).rename('quota').reset_index()
+        candidates = df.loc[keys.index, SAMPLE_STRATA].assign(key=keys.to_numpy()).rename_axis('review_id').reset_index()
+        candidates = candidates.merge(quotas, on=SAMPLE_STRATA, how='left').sort_values('key', kind='stable')
+
+        # The reviews with the smallest keys of each stratum, up to its quota
+        rank = candidates.groupby(SAMPLE_STRATA, observed=True, dropna=False).cumcount()
+        drawn = np.sort(candidates.loc[rank < candidates['quota'], 'review_id'].to_numpy())
+        return cls(df.loc[drawn], len(df), keys, size, seed)
+
+    def select(self, **filters):
+        """Sampled reviews matching the sidebar filters (same arguments as filter_mask)"""
+        mask = filter_mask(self.rows, **filters)
+        return self.rows if mask.all() else self.rows[mask]
+
+
+def sample_store(store, size=SAMPLE_SIZE, seed=0):
+    """
+    Sampled reviews of a DuckDB ReviewStore, without their text columns.
+
+    Drawn in SQL with the same stratification and proportional allocation as
+    ReviewSample, using a hash of the review id as sampling key.
+
+    Returns:
+        DataFrame of the raw sampled reviews indexed by review id
+    """
+    columns = [col for col in store.columns if col not in TEXT_COLUMNS]
+    strata = "language, least(greatest(round(score), 1), 5), version_str"
+    sampled = store.query(
+        f"SELECT file_row_number, {', '.join(columns)} FROM ("
+        f"  SELECT *,"
+        f"    row_number() OVER (PARTITION BY {strata} ORDER BY hash(file_row_number + $seed)) AS sample_rank,"
+        f"    count(*) OVER (PARTITION BY {strata}) AS stratum_reviews"
+        f"  FROM reviews"
+        f") WHERE sample_rank <= round($size * stratum_reviews / (SELECT count(*) FROM reviews)) "
+        f"ORDER BY file_row_number",
+        {'size': size, 'seed': seed}
+    )
+    for col in sampled.select_dtypes('datetime').columns:
+        sampled[col] = sampled[col].astype('datetime64[ns]')
+    return sampled.set_index('file_row_number').rename_axis(None)
+
+
+def draw_sample(source, cube, size=SAMPLE_SIZE, seed=0):
+    """
+    Sample of the loaded reviews, or of a DuckDB ReviewStore (drawn in SQL).
+
+    Args:
+        source: Normalised reviews or a ReviewStore
+        cube: Count cube of `source`
+    """
+    if isinstance(source, ReviewStore):
+        rows = add_derived_columns(normalize_reviews(sample_store(source, size, seed)))
+        return ReviewSample(rows, int(cube['review_count'].sum()), size=size, seed=seed)
+    return ReviewSample.build(source, cube, size, seed)
+
+
+def polarity_direction(sentiment):
+    """+1 for positive, -1 for negative and 0 for other reviews (their mean is the polarity)"""
+    return (sentiment == 'positive').astype(int) - (sentiment == 'negative').astype(int)
+
+
+def mean_margins(values, groups, fraction, z=CONFIDENCE_Z):
+    """
+    Half-widths of the confidence intervals of group means estimated from a sample.
+
+    Args:
+        values: Sampled values
+        groups: Series (or list of Series) aligned with `values` to group by
+        fraction: Sampling fraction (for the finite population correction)
+
+    Returns:
+        Series of margins per group (NaN for groups of a single value)
+    """
+    stats = values.groupby(groups, observed=True).agg(['var', 'count'])
+    return z * np.sqrt(stats['var'] / stats['count'] * (1 - fraction))
+
+
+def topic_margins(reviews, values, fraction, by=None):
+    """
+    Confidence margins of the mean of `values` per topic (and `by` column) of sampled reviews.
+
+    Args:
+        reviews: Sampled reviews with a 'topics' column
+        values: Series aligned with `reviews`, e.g. polarity_direction(reviews['sentiment'])
+        by: Optional further review column to group by, e.g. 'version_str'
+
+    Returns:
+        Series of margins indexed by topic (and `by`)
+    """
+    pairs = review_topics(reviews.assign(sample_value=values), ['sample_value'] + ([by] if by else []))
+    groups = [pairs['topic']] + ([pairs[by]] if by else [])
+    return mean_margins(pairs['sample_value'], groups, fraction)
+
+
+def count_polarity_margins(sentiment_counts, fraction, z=CONFIDENCE_Z):
+    """Confidence margins of the polarity per row of sampled counts with positive, neutral and negative columns"""
+    total = sentiment_counts[['positive', 'neutral', 'negative']].sum(axis=1)
+    polarity = (sentiment_counts['positive'] - sentiment_counts['negative']) / total
+    polar_share = (sentiment_counts['positive'] + sentiment_counts['negative']) / total
+    return z * np.sqrt((polar_share - polarity ** 2).clip(lower=0) / total * (1 - fraction))
+
+
+def share_margins(share, count, fraction, z=CONFIDENCE_Z):
+    """Confidence margins of shares (between 0 and 1) estimated from `count` sampled reviews each"""
+    return z * np.sqrt(share * (1 - share) / count * (1 - fraction))
+
+
+def polarity_change_margins(reviews, topics, fraction):
+    """
+    Confidence margins of the polarity change per topic of topic_polarity_change.
+
+    The change is the difference of two independent estimates (recent and earlier
+    versions), so its variance is the sum of theirs.
+
+    Returns:
+        Series of margins indexed by `topics`
+    """
+    version_df = reviews.dropna(subset=['version_str'])
+    version_df = version_df.assign(
+        recent=version_df['version_num'] >= version_df['version_num'].median(),
+        sample_value=polarity_direction(version_df['sentiment'])
+    )
+    pairs = review_topics(version_df, ['recent', 'sample_value'])
+    pairs = pairs[pairs['topic'].isin(topics)]
+
+    halves = mean_margins(pairs['sample_value'], [pairs['topic'], pairs['recent']], fraction)
+    # Topics without both recent and earlier sampled reviews get no margin
+    halves_per_topic = halves.groupby(level=0).count()
+    margins = np.sqrt((halves ** 2).groupby(level=0).sum()).where(halves_per_topic == 2)
+    return margins.reindex(topics).astype(float)
+
+
+def estimate_counts(frame, columns, factor):
+    """Copy of `frame` with the sampled counts in `columns` scaled up by `factor` (estimated review counts)"""
+    frame = frame.copy()
+    for col in columns:
+        frame[col] = (frame[col] * factor).round().astype(int)
+    return frame
+
+
+def sample_thresholds(aggregate, factor):
+    """
+    Review count thresholds of an aggregate scaled down to a sample.
+
+    Thresholds such as min_reviews apply to the counted (sampled) reviews, so on a
+    sample they are divided by the number of reviews each sampled review stands for,
+    and the sample keeps the topics and versions the selection has enough reviews for.
+
+    Args:
+        aggregate: Aggregate function with min_...reviews keyword arguments
+        factor: Selected reviews per sampled review
+
+    Returns:
+        Dict of the scaled thresholds, to pass as keyword arguments to `aggregate`
+    """
+    parameters = inspect.signature(aggregate).parameters
+    return {
+        name: max(1, round(parameter.default / factor))
+        for name, parameter in parameters.items()
+        if name.startswith('min_') and name.endswith('reviews')
+    }
+
+
+def describe_margins(margins, quantity, digits=2, unit=""):
+    """Readable summary of confidence margins, e.g. '95% confidence intervals of the polarity: ±0.03 typically, up to ±0.08'"""
+    margins = pd.Series(margins).dropna()
+    if len(margins) == 0:
+        return f"Too few sampled reviews for confidence intervals of the {quantity}"
+    return (f"95% confidence intervals of the {quantity}: ±{margins.median():.{digits}f}{unit} typically, "
+            f"up to ±{margins.max():.{digits}f}{unit}")
@@ -0,0 +1,260 @@
+"""
+Full-text search over the review texts for the BMW app review dashboard.
+
+A positional inverted index over 'content_english' and 'content' is built once per
+dataset and answers term, phrase ("digital key") and prefix (connect*) queries.
+Matches are review ids (DataFrame index labels, or Parquet row numbers for the
+DuckDB backend) that are combined with the sidebar filters when a page of results
+is fetched. Kept free of Streamlit like dashboard_data.
+"""
+
+import functools
+import re
+
+import numpy as np
+import pandas as pd
+
+# Review text columns that are searched
+SEARCH_COLUMNS = ['content_english', 'content']
+
+# Columns shown for matching reviews
+RESULT_COLUMNS = ['date', 'language', 'score', 'sentiment', 'topics', 'content_english', 'content']
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Query parts: quoted phrases or single words (optionally ending in * for a prefix)
+QUERY_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def _unique_sorted(values):
+    """Distinct values of a sorted array (linear time, unlike np.unique)"""
+    if len(values) == 0:
+        return values
+    return values[np.concatenate(([True], values[1:] != values[:-1]))]
+
+
+def _isin_sorted(values, sorted_values):
+    """Mask of the `values` found in the sorted array `sorted_values` (binary search)"""
+    if len(sorted_values) == 0:
+        return np.zeros(len(values), dtype=bool)
+    found = np.searchsorted(sorted_values, values).clip(max=len(sorted_values) - 1)
+    return sorted_values[found] == values
+
+
+def tokenize(text):
+    """Lower-cased word tokens of a text"""
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def parse_query(query):
+    """
+    Split a search query into clauses that must all match.
+
+    Returns:
+        List of (kind, terms) tuples: ('phrase', [terms]) for quoted text or words
+        made of several tokens, ('prefix', [term]) for word* and ('term', [term])
+    """
+    clauses = []
+    for phrase, word in QUERY_PATTERN.findall(query):
+        if phrase:
+            terms = tokenize(phrase)
+            if terms:
+                clauses.append(('phrase' if len(terms) > 1 else 'term', terms))
+            continue
+
+        terms = tokenize(word)
+        if not terms:
+            continue
+        if len(terms) > 1:
+            clauses.append(('phrase', terms))
+        elif word.endswith('*'):
+            clauses.append(('prefix', terms))
+        else:
+            clauses.append(('term', terms))
+    return clauses
+
+
+class FieldIndex:
+    """Positional postings of one text column, stored as sorted integer arrays."""
+
+    def __init__(self, vocabulary, offsets, doc_ids, positions):
+        self.vocabulary = vocabulary  # sorted terms
+        self.offsets = offsets        # postings of term i are [offsets[i], offsets[i + 1])
+        self.doc_ids = doc_ids        # review ids, sorted within each term
+        self.positions = positions    # token positions, sorted within each review
+
+    @classmethod
+    def build(cls, chunks):
+        """
+        Build the index from (review ids, texts) chunks, keeping only integer arrays.
+
+        Args:
+            chunks: Iterable of (numpy array of review ids, Series of texts) pairs
+        """
+        term_ids = {}
+        codes, doc_ids, positions = [], [], []
+
+        for chunk_ids, texts in chunks:
+            tokens = texts.fillna('').astype(str).str.lower().str.findall(TOKEN_PATTERN)
+            tokens.index = chunk_ids
+            tokens = tokens.explode().dropna()
+            if tokens.empty:
+                continue
+
+            chunk_codes, terms = pd.factorize(tokens)
+            term_map = np.array([term_ids.setdefault(term, len(term_ids)) for term in terms], dtype=np.int32)
+            codes.append(term_map[chunk_codes])
+            doc_ids.append(tokens.index.to_numpy(dtype=np.int64))
+            positions.append(tokens.groupby(level=0, sort=False).cumcount().to_numpy(dtype=np.int32))
+
+        vocabulary = np.array(list(term_ids), dtype=object)
+        if not codes:
+            return cls(vocabulary, np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32))
+
+        # Renumber terms alphabetically so prefixes are contiguous ranges
+        order = np.argsort(vocabulary)
+        rank = np.empty(len(order), dtype=np.int32)
+        rank[order] = np.arange(len(order), dtype=np.int32)
+
+        codes = rank[np.concatenate(codes)]
+        doc_ids = np.concatenate(doc_ids)
+        positions = np.concatenate(positions)
+        postings = np.lexsort((positions, doc_ids, codes))
+
+        codes = codes[postings]
+        offsets = np.searchsorted(codes, np.arange(len(vocabulary) + 1))
+        return cls(vocabulary[order], offsets, doc_ids[postings], positions[postings])
+
+    @classmethod
+    def merge(cls, first, second):
+        """Index of the reviews of two indexes (the review ids of `second` must be larger)"""
+        vocabulary = np.union1d(first.vocabulary, second.vocabulary).astype(object)
+
+        def postings(index):
+            codes = np.repeat(np.searchsorted(vocabulary, index.vocabulary), np.diff(index.offsets))
+            return codes, index.doc_ids, index.positions
+
+        parts = [postings(first), postings(second)]
+        codes, doc_ids, positions = (np.concatenate(arrays) for arrays in zip(*parts))
+        # Each part is sorted by term and review, and the reviews of `second` come last
+        order = np.argsort(codes, kind='stable')
+        offsets = np.searchsorted(codes[order], np.arange(len(vocabulary) + 1))
+        return cls(vocabulary, offsets, doc_ids[order], positions[order])
+
+    def _term_range(self, term):
+        start = np.searchsorted(self.vocabulary, term, side='left')
+        if start < len(self.vocabulary) and self.vocabulary[start] == term:
+            return self.offsets[start], self.offsets[start + 1]
+        return 0, 0
+
+    def term(self, term):
+        """Ids of the reviews containing `term`"""
+        start, end = self._term_range(term)
+        return _unique_sorted(self.doc_ids[start:end])
+
+    def prefix(self, prefix):
+        """Ids of the reviews containing a term that starts with `prefix`"""
+        first = np.searchsorted(self.vocabulary, prefix, side='left')
+        last = np.searchsorted(self.vocabulary, prefix + '\uffff', side='left')
+        return np.unique(self.doc_ids[self.offsets[first]:self.offsets[last]])
+
+    def phrase(self, terms):
+        """Ids of the reviews containing `terms` as consecutive tokens"""
+        stride = np.int64(self.positions.max()) + len(terms) + 1 if len(self.positions) else 1
+        ranges = [self._term_range(term) for term in terms]
+
+        # Keys of the positions where the phrase would start, for each term (already sorted,
+        # as postings are sorted by review and position); the rarest term gives the candidates
+        def start_keys(i):
+            start, end = ranges[i]
+            doc_ids, positions = self.doc_ids[start:end], self.positions[start:end]
+            keep = positions >= i
+            return doc_ids[keep] * stride + (positions[keep] - i)
+
+        order = sorted(range(len(terms)), key=lambda i: ranges[i][1] - ranges[i][0])
+        starts = start_keys(order[0])
+        for i in order[1:]:
+            if len(starts) == 0:
+                break
+            starts = starts[_isin_sorted(starts, start_keys(i))]
+        return _unique_sorted(starts // stride)
+
+
+class SearchIndex:
+    """Inverted indexes of the searchable text columns of one dataset."""
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    @classmethod
+    def merge(cls, first, second):
+        """Index of the reviews of two indexes (the review ids of `second` must be larger)"""
+        return cls({
+            column: FieldIndex.merge(first.fields[column], second.fields[column]) if column in second.fields else field
+            for column, field in first.fields.items()
+        })
+
+    def search(self, query):
+        """
+        Ids of the reviews matching every clause of `query` in any indexed column.
+
+        Returns:
+            Sorted numpy array of review ids, empty for a query without searchable words
+        """
+        clauses = parse_query(query)
+        if not clauses or not self.fields:
+            return np.zeros(0, dtype=np.int64)
+
+        matches = None
+        for kind, terms in clauses:
+            clause_matches = [
+                field.phrase(terms) if kind == 'phrase' else
+                field.prefix(terms[0]) if kind == 'prefix' else
+                field.term(terms[0])
+                for field in self.fields.values()
+            ]
+            clause_matches = functools.reduce(np.union1d, clause_matches)
+            matches = clause_matches if matches is None else np.intersect1d(matches, clause_matches)
+            if len(matches) == 0:
+                break
+        return matches
+
+
+@functools.singledispatch
+def build_search_index(reviews, chunk_size=50_000):
+    """
+    Build the search index over the SEARCH_COLUMNS present in `reviews`.
+
+    Review ids are the index labels of `reviews`, which must be integers.
+    """
+    def chunks(column):
+        for start in range(0, len(reviews), chunk_size):
+            texts = reviews[column].iloc[start:start + chunk_size]
+            yield texts.index.to_numpy(dtype=np.int64), texts
+
+    return SearchIndex({
+        column: FieldIndex.build(chunks(column))
+        for column in SEARCH_COLUMNS if column in reviews.columns
+    })
+
+
+@functools.singledispatch
+def search_results(reviews, review_ids, page=0, page_size=20):
+    """
+    One page of the selected reviews whose ids are in `review_ids`, newest first.
+
+    Args:
+        reviews: Reviews of the current selection
+        review_ids: Matches returned by SearchIndex.search
+        page: Zero-based page number
+        page_size: Reviews per page
+
+    Returns:
+        Tuple of (number of matching selected reviews, DataFrame with RESULT_COLUMNS
+        indexed by review id)
+    """
+    matches = reviews[reviews.index.isin(review_ids)]
+    if 'date' in matches.columns:
+        matches = matches.sort_values('date', ascending=False, kind='stable')
+    columns = [col for col in RESULT_COLUMNS if col in matches.columns]
+    return len(matches), matches[columns].iloc[page * page_size:(page + 1) * page_size]
@@ -0,0 +1,267 @@
+"""
+Similar-review lookup for the BMW app review dashboard.
+
+TF-IDF vectors of 'content_english' are built once after classification and saved
+next to the consolidated results (see write_similarity_index). A lookup only scores
+the reviews sharing the most distinctive terms of the query review and ranks the
+best of those candidates by their exact cosine similarity, so its cost depends on
+how common those terms are rather than on the number of reviews.
+
+Review ids are row positions in the consolidated CSV, which are the DataFrame index
+labels of the dashboard and the Parquet row numbers of the DuckDB backend.
+
+Usage:
+    python review_similarity.py bmw_app_analysis/results/bmw_reviews_consolidated_<timestamp>.csv
+"""
+
+import functools
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from dashboard_data import dataset_version
+from review_search import RESULT_COLUMNS, TOKEN_PATTERN
+
+# Review text column the index is built from
+SIMILARITY_COLUMN = 'content_english'
+
+# Terms in fewer reviews than this, or in more than this share of the reviews, are ignored
+MIN_TERM_REVIEWS = 2
+MAX_TERM_SHARE = 0.5
+MAX_TERMS = 50_000
+
+
+def similarity_index_path(csv_path):
+    """File the similarity index of a consolidated results CSV is saved to"""
+    return os.path.splitext(csv_path)[0] + '.similar.npz'
+
+
+def _term_counts(texts, chunk_size):
+    """(row, term code, count) arrays of the distinct terms of each text, and the terms"""
+    term_ids = {}
+    rows, codes, counts = [], [], []
+
+    for start in range(0, len(texts), chunk_size):
+        tokens = texts.iloc[start:start + chunk_size].fillna('').astype(str).str.lower().str.findall(TOKEN_PATTERN)
+        tokens.index = np.arange(start, start + len(tokens))
+        tokens = tokens.explode().dropna()
+        if tokens.empty:
+            continue
+
+        chunk_codes, terms = pd.factorize(tokens)
+        term_map = np.array([term_ids.setdefault(term, len(term_ids)) for term in terms], dtype=np.int64)
+        keys, chunk_counts = np.unique(tokens.index.to_numpy(dtype=np.int64) << 32 | term_map[chunk_codes],
+                                       return_counts=True)
+        rows.append((keys >> 32).astype(np.int32))
+        codes.append((keys & 0xFFFFFFFF).astype(np.int32))
+        counts.append(chunk_counts.astype(np.float32))
+
+    if not rows:
+        return np.zeros(0, np.int32), np.zeros(0, np.int32), np.zeros(0, np.float32), []
+    return np.concatenate(rows), np.concatenate(codes), np.concatenate(counts), list(term_ids)
+
+
+def _row_sums(values, indptr):
+    """Sum of `values` over the rows of a CSR matrix (rows may be empty)"""
+    sums = np.zeros((len(indptr) - 1,) + values.shape[1:], dtype=values.dtype)
+    non_empty = np.flatnonzero(np.diff(indptr) > 0)
+    if len(non_empty):
+        sums[non_empty] = np.add.reduceat(values, indptr[non_empty], axis=0)
+    return sums
+
+
+class SimilarityIndex:
+    """TF-IDF vectors of the reviews, stored by review and by term."""
+
+    def __init__(self, vocabulary, idf, indptr, term_codes, weights, term_indptr, term_rows, term_weights,
+                 source_version=''):
+        self.vocabulary = vocabulary        # sorted terms
+        self.idf = idf                      # inverse document frequency of each term
+        self.indptr = indptr                # terms of review i are [indptr[i], indptr[i + 1])
+        self.term_codes = term_codes
+        self.weights = weights              # L2-normalised TF-IDF weights
+        self.term_indptr = term_indptr      # reviews containing term j are [term_indptr[j], term_indptr[j + 1])
+        self.term_rows = term_rows
+        self.term_weights = term_weights
+        self.source_version = source_version  # dataset_version of the indexed CSV
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    @classmethod
+    def build(cls, texts, source_version='', chunk_size=20_000):
+        """
+        Build the index from a Series of review texts (review ids are their positions).
+
+        Args:
+            texts: Series of review texts
+            source_version: dataset_version of the file the texts come from
+            chunk_size: Reviews tokenised at a time
+        """
+        n_reviews = len(texts)
+        rows, codes, counts, terms = _term_counts(texts, chunk_size)
+
+        # Keep terms that occur in at least two reviews but not in most of them
+        review_counts = np.bincount(codes, minlength=len(terms))
+        keep = (review_counts >= MIN_TERM_REVIEWS) & (review_counts <= MAX_TERM_SHARE * n_reviews)
+        if keep.sum() > MAX_TERMS:
+            keep[np.argsort(-np.where(keep, review_counts, 0), kind='stable')[MAX_TERMS:]] = False
+
+        terms = np.array(terms, dtype=str)[keep]
+        order = np.argsort(terms)
+        new_codes = np.full(len(keep), -1, dtype=np.int32)
+        new_codes[np.flatnonzero(keep)[order]] = np.arange(len(order), dtype=np.int32)
+
+        kept = new_codes[codes] >= 0
+        rows, codes, counts = rows[kept], new_codes[codes[kept]], counts[kept]
+        idf = (np.log((1 + n_reviews) / (1 + review_counts[keep][order])) + 1).astype(np.float32)
+
+        # Sublinear term frequency, normalised to unit length per review
+        weights = (1 + np.log(counts)) * idf[codes]
+        indptr = np.searchsorted(rows, np.arange(n_reviews + 1)).astype(np.int64)
+        norms = np.sqrt(_row_sums(weights ** 2, indptr))
+        weights /= np.repeat(np.where(norms > 0, norms, 1), np.diff(indptr))
+
+        # Postings by term, to find the reviews sharing a review's terms
+        by_term = np.argsort(codes, kind='stable')
+        term_indptr = np.searchsorted(codes[by_term], np.arange(len(terms) + 1)).astype(np.int64)
+
+        return cls(terms[order], idf, indptr, codes, weights, term_indptr, rows[by_term], weights[by_term],
+                   source_version)
+
+    def save(self, path):
+        """Save the index as an uncompressed .npz file"""
+        np.savez(
+            path, vocabulary=self.vocabulary, idf=self.idf, indptr=self.indptr, term_codes=self.term_codes,
+            weights=self.weights, term_indptr=self.term_indptr, term_rows=self.term_rows,
+            term_weights=self.term_weights, source_version=np.array(self.source_version)
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Load an index written by save"""
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+        arrays['source_version'] = str(arrays['source_version'])
+        return cls(**arrays)
+
+    def _cosine(self, row, candidates):
+        """Exact TF-IDF cosine similarity between review `row` and the `candidates` rows"""
+        query = np.zeros(len(self.vocabulary), dtype=np.float32)
+        lo, hi = self.indptr[row], self.indptr[row + 1]
+        query[self.term_codes[lo:hi]] = self.weights[lo:hi]
+
+        starts = self.indptr[candidates]
+        lengths = self.indptr[candidates + 1] - starts
+        groups = np.repeat(np.arange(len(candidates)), lengths)
+        positions = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + np.repeat(starts, lengths)
+        return np.bincount(groups, weights=self.weights[positions] * query[self.term_codes[positions]],
+                           minlength=len(candidates))
+
+    def search(self, review_id, k=10, allowed=None, query_terms=12, rerank=200):
+        """
+        Reviews most similar to review `review_id`.
+
+        Candidates are the reviews sharing one of the `query_terms` highest weighted
+        terms of the query review, ranked by the similarity over those terms; the
+        best `rerank` allowed candidates are then ranked by exact cosine similarity.
+
+        Args:
+            review_id: Id of the query review
+            k: Number of similar reviews to return
+            allowed: Optional function mapping an array of review ids to a boolean mask
+                of those that may be returned (e.g. the current filter selection)
+            query_terms: Number of query review terms used to find candidates
+            rerank: Number of candidates ranked by exact similarity
+
+        Returns:
+            Tuple of (review ids, cosine similarities), most similar first
+        """
+        row = int(review_id)
+        if not 0 <= row < len(self):
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        lo, hi = self.indptr[row], self.indptr[row + 1]
+        top_terms = np.argsort(-self.weights[lo:hi], kind='stable')[:query_terms]
+        codes, query_weights = self.term_codes[lo:hi][top_terms], self.weights[lo:hi][top_terms]
+
+        # Partial similarity over the top terms, accumulated from their postings
+        starts, ends = self.term_indptr[codes], self.term_indptr[codes + 1]
+        postings = np.concatenate([np.arange(start, end) for start, end in zip(starts, ends)]) \
+            if len(codes) else np.zeros(0, dtype=np.int64)
+        partial = np.bincount(self.term_rows[postings],
+                              weights=self.term_weights[postings] * np.repeat(query_weights, ends - starts),
+                              minlength=len(self))
+        partial[row] = 0
+        candidates = np.flatnonzero(partial)
+        # Candidates are in id order, so the stable sort breaks ties by id
+        candidates = candidates[np.argsort(-partial[candidates], kind='stable')]
+
+        # Take the allowed candidates in growing batches until enough are found
+        limit = max(rerank, k)
+        selected = []
+        found = start = 0
+        batch_size = limit
+        while start < len(candidates) and found < limit:
+            batch = candidates[start:start + batch_size]
+            if allowed is not None:
+                batch = batch[allowed(batch)]
+            selected.append(batch)
+            found += len(batch)
+            start += batch_size
+            batch_size *= 2
+        candidates = np.concatenate(selected)[:limit] if selected else np.zeros(0, dtype=np.int64)
+
+        scores = self._cosine(row, candidates)
+        best = np.lexsort((candidates, -scores))[:k]
+        return candidates[best], scores[best]
+
+
+def write_similarity_index(csv_path, index_path=None):
+    """
+    Build the similarity index of a consolidated results CSV and save it.
+
+    Args:
+        csv_path: Consolidated results CSV
+        index_path: Output file (defaults to similarity_index_path(csv_path))
+
+    Returns:
+        Path of the written index
+    """
+    if index_path is None:
+        index_path = similarity_index_path(csv_path)
+    texts = pd.read_csv(csv_path, usecols=[SIMILARITY_COLUMN])[SIMILARITY_COLUMN]
+    SimilarityIndex.build(texts, source_version=dataset_version(csv_path)).save(index_path)
+    return index_path
+
+
+@functools.singledispatch
+def similar_reviews(reviews, index, review_id, k=10):
+    """
+    The k selected reviews most similar to review `review_id`.
+
+    Args:
+        reviews: Reviews of the current selection (the query review need not be in it)
+        index: SimilarityIndex of the dataset
+        review_id: Id of the query review
+        k: Number of reviews to return
+
+    Returns:
+        DataFrame with a 'similarity' column and RESULT_COLUMNS, indexed by review id,
+        most similar first
+    """
+    review_ids, scores = index.search(review_id, k, allowed=lambda ids: reviews.index.get_indexer(ids) >= 0)
+    columns = [col for col in RESULT_COLUMNS if col in reviews.columns]
+    results = reviews.loc[review_ids, columns]
+    results.insert(0, 'similarity', scores)
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(1)
+    output_file = write_similarity_index(sys.argv[1])
+    print(f"Saved similar-review index of {sys.argv[1]} to {output_file}")
@@ -0,0 +1,330 @@
+# ======================================
+# BMW App Review Analysis - Incremental Play Store Scraping
+# ======================================
+import os
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+# google-play-scraper is only needed when talking to the real store
+try:
+    from google_play_scraper import Sort, reviews
+except ImportError:
+    Sort = None
+    reviews = None
+
+# Package name of the BMW app on Google Play
+APP_ID = "de.bmw.connected.mobile20.row"
+
+# Folder structure (shared with the translation/classification steps)
+BASE_DIR = "bmw_app_analysis"
+SCRAPES_DIR = os.path.join(BASE_DIR, "scrapes")
+
+# Per-language watermark of the newest review already collected
+WATERMARK_FILE = os.path.join(BASE_DIR, "scrape_watermarks.json")
+
+# Languages to fetch (language code and label used throughout the pipeline)
+LANGUAGES = [
+    ('en', 'English'),
+    ('de', 'German'),
+    ('fr', 'French'),
+    ('it', 'Italian'),
+    ('es', 'Spanish'),
+    ('nl', 'Dutch'),
+    ('sv', 'Swedish'),
+    ('da', 'Danish'),
+    ('no', 'Norwegian'),
+    ('fi', 'Finnish'),
+    ('pl', 'Polish'),
+    ('cs', 'Czech'),
+    ('pt', 'Portuguese'),
+    ('zh', 'Chinese'),
+    ('ja', 'Japanese'),
+    ('ko', 'Korean'),
+    ('ar', 'Arabic'),
+    ('tr', 'Turkish'),
+    ('ru', 'Russian'),
+    ('he', 'Hebrew'),
+    ('th', 'Thai'),
+    ('vi', 'Vietnamese'),
+    ('hi', 'Hindi'),
+    ('el', 'Greek'),
+    ('hu', 'Hungarian'),
+    ('ro', 'Romanian'),
+    ('sk', 'Slovak'),
+    ('bg', 'Bulgarian'),
+    ('hr', 'Croatian'),
+    ('sr', 'Serbian'),
+    ('uk', 'Ukrainian'),
+    ('id', 'Indonesian'),
+    ('ms', 'Malay'),
+    ('fa', 'Persian'),
+    ('ur', 'Urdu'),
+    ('bn', 'Bengali'),
+    ('ta', 'Tamil'),
+    ('te', 'Telugu'),
+    ('ml', 'Malayalam'),
+    ('et', 'Estonian'),
+    ('lv', 'Latvian'),
+    ('lt', 'Lithuanian'),
+    ('sl', 'Slovenian')
+]
+
+
+class RateLimiter:
+    """Enforce a minimum interval between requests shared by all worker threads."""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _review_time(review: Dict) -> Optional[datetime]:
+    """Return the review timestamp as a datetime (the store returns datetimes, fixtures ISO strings)."""
+    at = review.get('at')
+    if at is None or isinstance(at, datetime):
+        return at
+    try:
+        return datetime.fromisoformat(str(at))
+    except ValueError:
+        return None
+
+
+def load_watermarks(watermark_file: str = WATERMARK_FILE) -> Dict[str, Dict]:
+    """Load the per-language watermarks, or an empty dict if none were saved yet."""
+    if not os.path.exists(watermark_file):
+        return {}
+    try:
+        with open(watermark_file, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        logging.error(f"Error reading watermark file {watermark_file}: {e}")
+        return {}
+
+
+def save_watermarks(watermarks: Dict[str, Dict], watermark_file: str = WATERMARK_FILE):
+    """Atomically write the per-language watermarks."""
+    os.makedirs(os.path.dirname(watermark_file) or ".", exist_ok=True)
+    tmp_file = watermark_file + ".tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(watermarks, f, indent=4)
+    os.replace(tmp_file, watermark_file)
+
+
+def _is_known(review: Dict, watermark: Optional[Dict]) -> bool:
+    """Check whether a review is at or behind the stored watermark."""
+    if not watermark:
+        return False
+    if review.get('reviewId') == watermark.get('review_id'):
+        return True
+
+    review_at = _review_time(review)
+    watermark_at = watermark.get('at')
+    if review_at is None or not watermark_at:
+        return False
+    watermark_at = datetime.fromisoformat(watermark_at)
+
+    # Several reviews can share the newest timestamp; those already seen are listed explicitly
+    if review_at == watermark_at:
+        return review.get('reviewId') in watermark.get('boundary_ids', [])
+    return review_at < watermark_at
+
+
+def _at_boundary(review: Dict, watermark: Optional[Dict]) -> bool:
+    """Check whether a review shares the timestamp of the stored watermark."""
+    review_at = _review_time(review)
+    if not watermark or review_at is None or not watermark.get('at'):
+        return False
+    return review_at == datetime.fromisoformat(watermark['at'])
+
+
+def _next_watermark(new_reviews: List[Dict], watermark: Optional[Dict]) -> Optional[Dict]:
+    """Advance the watermark to the newest review collected in this run."""
+    if not new_reviews:
+        return watermark
+
+    newest = new_reviews[0]
+    newest_at = _review_time(newest)
+    boundary_ids = [r.get('reviewId') for r in new_reviews if _review_time(r) == newest_at]
+
+    # Keep the ids already known at the same timestamp so ties are never re-emitted
+    if watermark and newest_at is not None and watermark.get('at') == newest_at.isoformat():
+        boundary_ids = list(dict.fromkeys(boundary_ids + watermark.get('boundary_ids', [])))
+
+    return {
+        'review_id': newest.get('reviewId'),
+        'at': newest_at.isoformat() if newest_at is not None else None,
+        'boundary_ids': boundary_ids,
+        'last_scraped_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+
+def fetch_language_reviews(app_id: str, lang_code: str, watermark: Optional[Dict],
+                           fetch_page: Callable, rate_limiter: RateLimiter,
+                           page_size: int = 100) -> Tuple[List[Dict], Optional[Dict]]:
+    """
+    Page through the newest reviews of one language until the watermark is reached.
+
+    Args:
+        app_id: Play Store package name
+        lang_code: Two-letter language code passed to the store
+        watermark: Previously stored watermark for this language (None on the first run)
+        fetch_page: Callable with the signature of google_play_scraper.reviews
+        rate_limiter: Shared limiter applied before every page request
+        page_size: Number of reviews requested per page
+
+    Returns:
+        Tuple of (new reviews ordered newest first, updated watermark)
+    """
+    new_reviews = []
+    continuation_token = None
+
+    while True:
+        rate_limiter.wait()
+        result, continuation_token = fetch_page(
+            app_id,
+            lang=lang_code,
+            sort=Sort.NEWEST if Sort is not None else None,
+            count=page_size,
+            continuation_token=continuation_token
+        )
+
+        reached_watermark = False
+        for review in result:
+            if _is_known(review, watermark):
+                # Known reviews at the watermark timestamp may be listed before unseen ties
+                if _at_boundary(review, watermark):
+                    continue
+                reached_watermark = True
+                break
+            new_reviews.append(review)
+
+        # Stop at known reviews, at the end of the feed or on a short page
+        if reached_watermark or not continuation_token or len(result) < page_size:
+            break
+
+    return new_reviews, _next_watermark(new_reviews, watermark)
+
+
+def fetch_new_reviews(app_id: str = APP_ID, languages: List[Tuple[str, str]] = LANGUAGES,
+                      watermark_file: str = WATERMARK_FILE, output_dir: Optional[str] = SCRAPES_DIR,
+                      fetch_page: Optional[Callable] = None, max_workers: int = 4,
+                      min_interval: float = 1.0, page_size: int = 100) -> pd.DataFrame:
+    """
+    Fetch only the reviews published since the last run, for all languages in parallel.
+
+    Languages are fetched concurrently while a shared rate limiter keeps at most one
+    request per `min_interval` seconds. New reviews are saved to `output_dir` before
+    the watermarks are advanced, so an interrupted run never loses reviews.
+
+    Args:
+        app_id: Play Store package name
+        languages: List of (language code, language label) tuples
+        watermark_file: JSON file holding the per-language watermarks
+        output_dir: Folder for the new-review CSV of this run (None to skip saving)
+        fetch_page: Page fetcher, defaults to google_play_scraper.reviews
+        max_workers: Number of languages fetched concurrently
+        min_interval: Minimum seconds between two store requests
+        page_size: Number of reviews requested per page
+
+    Returns:
+        DataFrame with the new reviews and a 'language' label column
+    """
+    if fetch_page is None:
+        if reviews is None:
+            raise ImportError("google-play-scraper is required to fetch reviews from the Play Store")
+        fetch_page = reviews
+
+    watermarks = load_watermarks(watermark_file)
+    updated_watermarks = dict(watermarks)
+    rate_limiter = RateLimiter(min_interval)
+    all_reviews = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(fetch_language_reviews, app_id, lang_code, watermarks.get(lang_code),
+                            fetch_page, rate_limiter, page_size): (lang_code, lang_label)
+            for lang_code, lang_label in languages
+        }
+
+        for future in as_completed(futures):
+            lang_code, lang_label = futures[future]
+            try:
+                new_reviews, watermark = future.result()
+            except Exception as e:
+                logging.error(f"Fetching {lang_label} reviews failed: {e}")
+                continue
+
+            for review in new_reviews:
+                review['language'] = lang_label
+            all_reviews.extend(new_reviews)
+
+            if watermark is not None:
+                updated_watermarks[lang_code] = watermark
+            logging.info(f"{lang_label}: {len(new_reviews)} new reviews")
+
+    df = pd.DataFrame(all_reviews)
+    if df.empty:
+        df = pd.DataFrame(columns=['reviewId', 'content', 'score', 'at', 'language'])
+
+    if output_dir is not None and not df.empty:
+        os.makedirs(output_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_file = os.path.join(output_dir, f"new_reviews_{timestamp}.csv")
+        df.to_csv(output_file, index=False)
+        logging.info(f"Saved {len(df)} new reviews to {output_file}")
+
+    save_watermarks(updated_watermarks, watermark_file)
+    return df
+
+
+def fixture_fetcher(fixture_dir: str) -> Callable:
+    """
+    Build a local stand-in for google_play_scraper.reviews backed by JSON fixtures.
+
+    Each `<lang_code>.json` file in `fixture_dir` holds a list of review dicts ordered
+    newest first; pages are served with integer offsets as continuation tokens.
+
+    Args:
+        fixture_dir: Folder with one JSON file per language code
+
+    Returns:
+        Callable with the same call signature as google_play_scraper.reviews
+    """
+    def fetch_page(app_id, lang='en', sort=None, count=100, continuation_token=None, **kwargs):
+        fixture_file = os.path.join(fixture_dir, f"{lang}.json")
+        if not os.path.exists(fixture_file):
+            return [], None
+
+        with open(fixture_file, 'r', encoding='utf-8') as f:
+            all_reviews = json.load(f)
+
+        offset = continuation_token or 0
+        page = all_reviews[offset:offset + count]
+        next_offset = offset + count
+        return page, next_offset if next_offset < len(all_reviews) else None
+
+    return fetch_page
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    new_df = fetch_new_reviews()
+    print(f"Fetched {len(new_df)} new reviews")
+    if not new_df.empty:
+        print(new_df['language'].value_counts())
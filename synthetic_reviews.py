@@ -0,0 +1,235 @@
+"""
+Synthetic consolidated results for scaling tests of the BMW app review dashboard.
+
+Generates reviews with the columns of the consolidated results written by
+classification.py: topics follow a skewed popularity, scores the bimodal
+distribution of app store ratings, sentiment, pain points and feature requests
+depend on the score, app versions are released over time and reviews mostly come
+from the versions current at their date, and a small share of reviews names one or
+more competitors (including variant spellings). Review texts are assembled from
+topic phrases, so text search and review lengths behave plausibly. Rows are
+generated and written in chunks, so files of millions of reviews need little memory.
+
+Usage:
+    python synthetic_reviews.py <rows> [output csv]
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+SYNTHETIC_DIR = os.path.join("bmw_app_analysis", "synthetic")
+
+# Column order of the consolidated results
+COLUMNS = [
+    'reviewId', 'content', 'score', 'thumbsUpCount', 'appVersion', 'reviewCreatedVersion', 'date', 'language',
+    'content_english', 'sentiment', 'topics', 'vehicle_type', 'user_experience', 'usage_profile', 'is_pain_point',
+    'is_feature_request', 'competitor_mentioned'
+]
+
+# Topics of classification.py with a phrase used in review texts, most discussed first
+TOPIC_PHRASES = {
+    "performance": "the app crashes and is slow to load",
+    "connectivity": "the connection to the car keeps dropping",
+    "ui/ux": "the design is confusing to navigate",
+    "remote controls": "remote climate and door locking",
+    "vehicle status": "the vehicle status is often outdated",
+    "authentication": "I have to log in again every day",
+    "updates": "since the last update",
+    "digital key/mobile key": "the digital key on my phone",
+    "charging management": "charging schedules and the charging status",
+    "map/navigation": "sending destinations to the car",
+    "trip planning": "planning trips with charging stops",
+    "customer support": "the hotline could not help",
+    "notification management": "notifications arrive too late",
+    "data & privacy": "how my location data is used",
+    "ev-specific features": "the range and battery information",
+    "mobile features": "widgets and phone features",
+    "service & maintenance": "booking a service appointment",
+    "my garage/vehicle management": "adding a second car to my garage",
+    "smartphone integration": "Apple CarPlay and Android Auto",
+    "connected store": "the connected store subscriptions",
+    "bmw digital premium": "BMW Digital Premium features",
+    "vehicle configuration & personalization": "personalising the car settings",
+    "multimedia integration": "music and media in the car",
+    "parking solutions": "finding and paying for parking",
+    "voice assistant": "the voice assistant",
+    "localization & language": "the translation into my language",
+    "bmw connected ecosystem": "the link with other BMW apps",
+    "usage statistics": "the driving statistics",
+    "tutorial/help section": "the help section",
+    "other": "the app in general",
+}
+
+# Openers of the review texts per sentiment (in the order of SENTIMENTS)
+SENTIMENT_OPENERS = np.array([
+    ["Great app,", "Works well:", "Really happy with", "Love"],
+    ["Okay app,", "Mixed feelings about", "Not bad, but", "Average experience with"],
+    ["Very disappointed,", "Useless:", "Frustrating,", "Terrible experience with"],
+], dtype=object)
+
+# Review languages and their shares
+LANGUAGES = {
+    'German': 0.30, 'English': 0.25, 'French': 0.08, 'Italian': 0.07, 'Spanish': 0.07, 'Dutch': 0.05,
+    'Polish': 0.04, 'Japanese': 0.04, 'Korean': 0.03, 'Swedish': 0.03, 'Czech': 0.02, 'Norwegian': 0.02,
+}
+
+# Competitor mentions as written by the classifier, including variants and compound mentions
+COMPETITOR_MENTIONS = [
+    'tesla', 'mercedes', 'audi', 'volkswagen', 'vw', 'mercedes-benz', 'porsche', 'volvo', 'hyundai', 'kia',
+    'ford', 'skoda', 'tesla and audi', 'mercedes, tesla', 'audi & vw', 'apple', 'google'
+]
+
+# Share of reviews per star rating (app store ratings cluster at 1 and 5)
+SCORE_SHARES = [0.32, 0.09, 0.10, 0.14, 0.35]
+
+# Sentiment shares (positive, neutral, negative) per star rating
+SENTIMENT_BY_SCORE = np.array([
+    [0.03, 0.07, 0.90],
+    [0.06, 0.19, 0.75],
+    [0.20, 0.45, 0.35],
+    [0.65, 0.25, 0.10],
+    [0.90, 0.08, 0.02],
+])
+SENTIMENTS = np.array(['positive', 'neutral', 'negative'], dtype=object)
+
+# Share of reviews naming a competitor
+COMPETITOR_SHARE = 0.06
+
+
+def _versions(start_date, end_date):
+    """Full app versions released about every five weeks between the dates, with their release dates"""
+    release_dates = pd.date_range(start_date, end_date, freq='35D')
+    names = []
+    major, minor = 3, 0
+    for _ in release_dates:
+        names.append(f"{major}.{minor}.{len(names) % 3}")
+        minor += 1
+        if minor == 10:
+            major, minor = major + 1, 0
+    return np.array(names, dtype=object), release_dates.to_numpy()
+
+
+def generate_reviews(n_rows, seed=0, start_date='2022-01-01', end_date='2025-04-30', chunk_size=100_000):
+    """
+    Synthetic reviews in the schema of the consolidated results.
+
+    Args:
+        n_rows: Number of reviews
+        seed: Random seed (the same seed and sizes give the same reviews)
+        start_date, end_date: Range of the review dates
+        chunk_size: Reviews per yielded chunk
+
+    Yields:
+        DataFrames of up to `chunk_size` reviews with the COLUMNS
+    """
+    rng = np.random.default_rng(seed)
+    topics = np.array(list(TOPIC_PHRASES), dtype=object)
+    phrases = np.array(list(TOPIC_PHRASES.values()), dtype=object)
+    topic_weights = 1 / np.arange(1, len(topics) + 1) ** 0.9
+    topic_weights /= topic_weights.sum()
+    languages = np.array(list(LANGUAGES), dtype=object)
+    language_shares = np.array(list(LANGUAGES.values()))
+    language_shares /= language_shares.sum()
+    versions, release_dates = _versions(start_date, end_date)
+    start, end = pd.Timestamp(start_date).value, pd.Timestamp(end_date).value
+
+    for first in range(0, n_rows, chunk_size):
+        n = min(chunk_size, n_rows - first)
+
+        # Review volume grows over time
+        dates = pd.to_datetime(start + (end - start) * np.sqrt(rng.random(n))).floor('s')
+        score = rng.choice(5, size=n, p=SCORE_SHARES) + 1
+        cumulative = SENTIMENT_BY_SCORE.cumsum(axis=1)[score - 1]
+        sentiment_index = (rng.random(n)[:, None] > cumulative).sum(axis=1).clip(max=2)
+        sentiment = SENTIMENTS[sentiment_index]
+
+        # Mostly the latest version released before the review, sometimes an older one or none
+        current = np.searchsorted(release_dates, dates.to_numpy(), side='right') - 1
+        lag = rng.geometric(0.7, size=n) - 1
+        version_index = (current - lag).clip(min=0)
+        app_version = pd.Series(versions[version_index], dtype=object)
+        app_version[rng.random(n) < 0.04] = np.nan
+
+        # One to three distinct topics per review
+        topic_count = rng.choice([1, 2, 3], size=n, p=[0.55, 0.30, 0.15])
+        topic_index = np.stack([rng.choice(len(topics), size=n, p=topic_weights) for _ in range(3)], axis=1)
+        topic_index[:, 1] = np.where(topic_index[:, 1] == topic_index[:, 0], (topic_index[:, 1] + 1) % len(topics),
+                                     topic_index[:, 1])
+        repeated = (topic_index[:, 2] == topic_index[:, 0]) | (topic_index[:, 2] == topic_index[:, 1])
+        topic_index[:, 2] = np.where(repeated, -1, topic_index[:, 2])
+        review_topics = pd.Series(topics[topic_index[:, 0]], dtype=object)
+        review_texts = pd.Series(phrases[topic_index[:, 0]], dtype=object)
+        for k in (1, 2):
+            extra = (topic_count > k) & (topic_index[:, k] >= 0)
+            review_topics[extra] += ", " + topics[topic_index[extra, k]]
+            review_texts[extra] += " and " + phrases[topic_index[extra, k]]
+
+        pain_point = rng.random(n) < np.select([sentiment == 'negative', sentiment == 'neutral'], [0.75, 0.35], 0.05)
+        feature_request = rng.random(n) < np.select([sentiment == 'neutral', sentiment == 'positive'], [0.35, 0.20], 0.15)
+
+        competitor = pd.Series('none', index=range(n), dtype=object)
+        mentions = rng.random(n) < COMPETITOR_SHARE
+        competitor[mentions] = rng.choice(COMPETITOR_MENTIONS, size=mentions.sum())
+        competitor_texts = pd.Series('', index=range(n), dtype=object)
+        competitor_texts[mentions] = " The " + competitor[mentions] + " app does this better."
+
+        openers = SENTIMENT_OPENERS[sentiment_index, rng.integers(0, SENTIMENT_OPENERS.shape[1], size=n)]
+        content_english = openers + " " + review_texts + "." + competitor_texts
+        # Longer reviews repeat their complaint, as real reviews often do
+        repeats = rng.geometric(0.6, size=n)
+        content_english[repeats > 1] += " Again: " + review_texts[repeats > 1] + "!"
+
+        language = languages[rng.choice(len(languages), size=n, p=language_shares)]
+
+        yield pd.DataFrame({
+            'reviewId': pd.Series(np.arange(first, first + n)).map('synthetic-{:010d}'.format),
+            'content': content_english,
+            'score': score,
+            'thumbsUpCount': rng.geometric(0.5, size=n) - 1,
+            'appVersion': app_version,
+            'reviewCreatedVersion': app_version,
+            'date': dates,
+            'language': language,
+            'content_english': content_english,
+            'sentiment': sentiment,
+            'topics': review_topics,
+            'vehicle_type': rng.choice(['ev_hybrid', 'combustion', 'unclear'], size=n, p=[0.35, 0.40, 0.25]),
+            'user_experience': rng.choice(['new_user', 'experienced_user', 'unclear'], size=n, p=[0.25, 0.35, 0.40]),
+            'usage_profile': rng.choice(['power_user', 'casual_user', 'unclear'], size=n, p=[0.20, 0.40, 0.40]),
+            'is_pain_point': np.where(pain_point, 'yes', 'no'),
+            'is_feature_request': np.where(feature_request, 'yes', 'no'),
+            'competitor_mentioned': competitor,
+        }, columns=COLUMNS)
+
+
+def synthetic_results_path(n_rows, output_dir=SYNTHETIC_DIR):
+    """Default file of a synthetic dataset (outside the results, so the dashboard does not open it)"""
+    return os.path.join(output_dir, f"bmw_reviews_synthetic_{n_rows}.csv")
+
+
+def write_synthetic_results(path, n_rows, seed=0, chunk_size=100_000):
+    """
+    Write `n_rows` synthetic reviews as a consolidated results CSV.
+
+    Returns:
+        Path of the written file
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_file = path + ".tmp"
+    with open(tmp_file, 'w', encoding='utf-8', newline='') as f:
+        for i, chunk in enumerate(generate_reviews(n_rows, seed=seed, chunk_size=chunk_size)):
+            chunk.to_csv(f, header=(i == 0), index=False)
+    os.replace(tmp_file, path)
+    return path
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3) or not sys.argv[1].isdigit():
+        print(__doc__)
+        sys.exit(1)
+    rows = int(sys.argv[1])
+    output_file = sys.argv[2] if len(sys.argv) == 3 else synthetic_results_path(rows)
+    print(f"Saved {write_synthetic_results(output_file, rows)}")
@@ -0,0 +1,71 @@
+"""Requests to the aggregates API (dashboard_api.py) with filters that select nothing or do not exist."""
+
+import json
+import os
+import sys
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dashboard_api import HOST, AggregatesService, ApiRequestHandler  # noqa: E402
+from synthetic_reviews import write_synthetic_results  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def api_url(tmp_path_factory):
+    results_dir = tmp_path_factory.mktemp('results')
+    write_synthetic_results(str(results_dir / 'bmw_reviews_consolidated_test.csv'), 2_000, seed=1)
+
+    server = ThreadingHTTPServer((HOST, 0), ApiRequestHandler)
+    server.daemon_threads = True
+    server.service = AggregatesService(str(results_dir))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://{HOST}:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def get(url):
+    """Status and JSON body of a GET request"""
+    try:
+        with urllib.request.urlopen(url) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_unknown_version_is_rejected(api_url):
+    status, body = get(f"{api_url}/api/metrics?version=99.9")
+    assert status == 400
+    assert body['error'] == "Unknown version '99.9'"
+
+
+def test_unknown_language_is_rejected(api_url):
+    status, body = get(f"{api_url}/api/metrics?language=Klingon")
+    assert status == 400
+    assert body['error'] == "Unknown language 'Klingon'"
+
+
+def test_inverted_rating_range_is_rejected(api_url):
+    status, body = get(f"{api_url}/api/metrics?min_rating=4&max_rating=2")
+    assert status == 400
+    assert body['error'] == "min_rating must not be greater than max_rating"
+
+
+def test_empty_selection_has_no_metrics(api_url):
+    status, body = get(f"{api_url}/api/metrics?start=2030-01-01&end=2030-12-31")
+    assert status == 200
+    assert body['data'] == {'total_reviews': 0, 'average_rating': None, 'positive_pct': None, 'improvement_index': None}
+
+
+def test_known_filters_are_accepted(api_url):
+    status, body = get(f"{api_url}/api/metrics?language=German&min_rating=2&max_rating=4")
+    assert status == 200
+    assert body['filters']['language'] == 'German'
+    assert body['data']['total_reviews'] > 0
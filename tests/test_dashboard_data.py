@@ -0,0 +1,87 @@
+"""Derived columns and count cubes of the dashboard data (dashboard_data.py)."""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dashboard_data import (  # noqa: E402
+    add_derived_columns, build_review_cube, normalize_reviews, rating_distribution, topic_polarity_change, topic_review_lengths,
+    topic_sentiment_counts
+)
+from synthetic_reviews import generate_reviews  # noqa: E402
+
+
+def reviews_with_missing_scores():
+    raw = pd.concat(generate_reviews(500, seed=4), ignore_index=True)
+    raw.loc[[3, 10, 200], 'score'] = np.nan
+    return add_derived_columns(normalize_reviews(raw))
+
+
+def test_reviews_without_a_score_have_no_star_rating():
+    reviews = reviews_with_missing_scores()
+    assert list(reviews.index[reviews['star_rating'].isna()]) == [3, 10, 200]
+    rated = reviews['star_rating'].dropna()
+    assert rated.between(1, 5).all()
+    assert (rated == reviews['score'].dropna().round().clip(1, 5)).all()
+
+
+def test_cube_counts_reviews_without_a_score_separately():
+    reviews = reviews_with_missing_scores()
+    cube, topic_cube = build_review_cube(reviews)
+    assert cube['review_count'].sum() == 500
+    assert cube.loc[cube['score'].isna(), 'review_count'].sum() == 3
+    assert cube.loc[cube['score'].isna(), 'star_rating'].isna().all()
+    # Rating charts count the rated reviews only
+    assert rating_distribution(cube).sum() == 497
+
+
+def test_topic_aggregates_count_each_topic_of_a_review_once():
+    # 'Key' is part of the name 'Digital Key' but only reviews 0 and 2 are about it
+    reviews = pd.DataFrame({
+        'topics': ['Key, Digital Key', 'Digital Key', 'Key, Key', None, 'Connection'],
+        'sentiment': ['positive', 'negative', 'negative', 'positive', 'neutral'],
+        'review_length': [10, 20, 30, 40, 50],
+        'version_str': ['4.1', '4.2', '4.1', '4.2', '4.2'],
+        'version_num': [4.001, 4.002, 4.001, 4.002, 4.002],
+    })
+
+    counts = topic_sentiment_counts(reviews, min_reviews=2)
+    assert list(counts.index) == ['Key', 'Digital Key']
+    assert counts.loc['Key', ['positive', 'neutral', 'negative']].tolist() == [1, 0, 1]
+
+    lengths = topic_review_lengths(reviews, min_reviews=1).set_index('topic')
+    assert lengths['review_count'].to_dict() == {'Key': 2, 'Digital Key': 2, 'Connection': 1}
+    assert lengths.loc['Key', 'avg_length'] == 20
+
+    polarity = topic_polarity_change(reviews, min_reviews=2).set_index('topic')
+    assert list(polarity.index) == ['Digital Key', 'Key']
+    assert polarity.loc['Digital Key', ['recent_polarity', 'earlier_polarity', 'change']].tolist() == [-1, 1, -2]
+    assert polarity.loc['Key', ['recent_polarity', 'earlier_polarity', 'review_count']].tolist() == [0, 0, 2]
+
+
+def test_topic_aggregates_match_the_sql_backend(tmp_path):
+    pytest.importorskip('duckdb')
+    from dashboard_sql import ReviewStore, write_parquet
+    from results_store import ResultsDataset
+    from synthetic_reviews import write_synthetic_results
+
+    csv_path = write_synthetic_results(str(tmp_path / 'results.csv'), 3000, seed=6)
+    reviews = ResultsDataset().refresh(csv_path).df
+    selection = ReviewStore(write_parquet(csv_path)).select()
+
+    counts = topic_sentiment_counts(reviews)
+    sql_counts = topic_sentiment_counts(selection).loc[counts.index, counts.columns]
+    pd.testing.assert_frame_equal(counts, sql_counts, check_dtype=False, check_names=False)
+
+    lengths = topic_review_lengths(reviews).set_index('topic')
+    sql_lengths = topic_review_lengths(selection).set_index('topic').loc[lengths.index]
+    pd.testing.assert_frame_equal(lengths, sql_lengths, check_dtype=False)
+
+    polarity = topic_polarity_change(reviews, min_reviews=50).set_index('topic').sort_index()
+    sql_polarity = topic_polarity_change(selection, min_reviews=50).set_index('topic').sort_index()
+    pd.testing.assert_frame_equal(polarity, sql_polarity, check_dtype=False)
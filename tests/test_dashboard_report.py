@@ -0,0 +1,37 @@
+"""Preset snapshot of the headless reports (dashboard_report.py)."""
+
+import json
+import os
+import sys
+from datetime import date
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dashboard_data import AGGREGATE_CACHE  # noqa: E402
+from dashboard_report import generate_reports, load_snapshot, snapshot_entries, snapshot_path  # noqa: E402
+from synthetic_reviews import write_synthetic_results  # noqa: E402
+
+
+def test_snapshot_restores_the_cached_aggregates_exactly(tmp_path):
+    csv_path = str(tmp_path / 'bmw_reviews_consolidated_test.csv')
+    write_synthetic_results(csv_path, 2_000, seed=2)
+    AGGREGATE_CACHE.clear()
+    generate_reports(csv_path, ['all_reviews', 'last_30_days'], output_dir=str(tmp_path / 'reports'))
+    cached = dict(AGGREGATE_CACHE.items())
+    version = next(iter(cached))[1][0]
+
+    # Plain JSON, which loading cannot execute
+    with open(snapshot_path(csv_path), encoding='utf-8') as f:
+        json.load(f)
+
+    snapshot = load_snapshot(snapshot_path(csv_path))
+    assert isinstance(snapshot['presets']['last_30_days']['date_range'][0], date)
+    entries = snapshot_entries(snapshot, version)
+    assert len(entries) == len(cached)
+    for key, value in entries:
+        if isinstance(value, pd.Series):
+            pd.testing.assert_series_equal(value, cached[key], check_exact=True)
+        else:
+            pd.testing.assert_frame_equal(value, cached[key], check_exact=True)
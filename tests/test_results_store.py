@@ -0,0 +1,92 @@
+"""Incremental refreshes of the consolidated results (results_store.py)."""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from results_store import ResultsDataset  # noqa: E402
+from synthetic_reviews import write_synthetic_results  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def csv_lines(tmp_path_factory):
+    """Header and rows of a synthetic consolidated results file"""
+    path = tmp_path_factory.mktemp('source') / 'bmw_reviews_consolidated_source.csv'
+    write_synthetic_results(str(path), 3_000, seed=3)
+    with open(path, 'rb') as f:
+        return f.read().splitlines(keepends=True)
+
+
+def write_rows(path, lines, mode='wb'):
+    with open(path, mode) as f:
+        f.writelines(lines)
+
+
+def sorted_cube(cube):
+    keys = [col for col in cube.columns if col != 'review_count']
+    cube = cube.astype({col: object for col in keys})
+    return cube.sort_values(keys, key=lambda col: col.astype(str)).reset_index(drop=True)
+
+
+def test_grown_file_is_appended_like_a_full_load(csv_lines, tmp_path):
+    path = str(tmp_path / 'bmw_reviews_consolidated_test.csv')
+    write_rows(path, csv_lines[:2_001])
+    dataset = ResultsDataset()
+    first = dataset.refresh(path)
+    # Build the indexes, so they are extended rather than rebuilt
+    first.search_index()
+    first.review_sample()
+
+    write_rows(path, csv_lines[2_001:], mode='ab')
+    appended = dataset.refresh(path)
+    assert dataset.last_change == "appended 1,000 reviews"
+    assert appended.df.attrs['dataset_version'] != first.df.attrs['dataset_version']
+
+    loaded = ResultsDataset().refresh(path)
+    pd.testing.assert_frame_equal(appended.df, loaded.df, check_categorical=False)
+    pd.testing.assert_frame_equal(sorted_cube(appended.cube), sorted_cube(loaded.cube))
+    pd.testing.assert_frame_equal(sorted_cube(appended.topic_cube), sorted_cube(loaded.topic_cube))
+    for query in ['"digital key"', 'connect*', 'error']:
+        np.testing.assert_array_equal(appended.search_index().search(query), loaded.search_index().search(query))
+    assert appended.review_sample().population == 3_000
+
+
+def test_unchanged_file_is_not_read_again(csv_lines, tmp_path):
+    path = str(tmp_path / 'bmw_reviews_consolidated_test.csv')
+    write_rows(path, csv_lines)
+    dataset = ResultsDataset()
+    results = dataset.refresh(path)
+    assert dataset.refresh(path) is results
+
+    # Same contents written again: the results and their version stay
+    write_rows(path, csv_lines)
+    os.utime(path, ns=(0, 0))
+    assert dataset.refresh(path) is results
+
+
+@pytest.mark.parametrize('rewrite', ['changed_row', 'partial_row'])
+def test_file_not_grown_by_whole_rows_is_reloaded(csv_lines, tmp_path, rewrite):
+    path = str(tmp_path / 'bmw_reviews_consolidated_test.csv')
+    write_rows(path, csv_lines[:2_001])
+    dataset = ResultsDataset()
+    dataset.refresh(path)
+
+    if rewrite == 'changed_row':
+        # An earlier row was rewritten, so the loaded contents are no longer a prefix
+        write_rows(path, csv_lines[:1] + csv_lines[2:2_001] + csv_lines[2_001:])
+        expected = 2_999
+    else:
+        # The loaded contents ended within a row that was later completed
+        write_rows(path, csv_lines[:2_000] + [csv_lines[2_000].rstrip(b'\n')])
+        dataset = ResultsDataset()
+        dataset.refresh(path)
+        write_rows(path, csv_lines)
+        expected = 3_000
+    results = dataset.refresh(path)
+    assert dataset.last_change == f"loaded {expected:,} reviews"
+    assert len(results.df) == expected
@@ -0,0 +1,113 @@
+"""Stratified sample and confidence margins of the approximate mode (review_sample.py)."""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dashboard_data import add_derived_columns, build_review_cube, normalize_reviews, review_topics  # noqa: E402
+from review_sample import (  # noqa: E402
+    SAMPLE_STRATA, ReviewSample, allocate, polarity_change_margins, polarity_direction, sample_thresholds,
+    topic_margins
+)
+from synthetic_reviews import generate_reviews  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def reviews():
+    return add_derived_columns(normalize_reviews(pd.concat(generate_reviews(20_000, seed=11), ignore_index=True)))
+
+
+@pytest.fixture(scope='module')
+def cube(reviews):
+    return build_review_cube(reviews)[0]
+
+
+def test_allocation_is_proportional_to_the_strata():
+    population = pd.Series([600, 300, 100])
+    assert list(allocate(population, 100)) == [60, 30, 10]
+    # Strata are taken whole when the sample would not be smaller
+    assert list(allocate(population, 5_000)) == [600, 300, 100]
+
+
+def test_sample_keeps_the_share_of_every_stratum(reviews, cube):
+    sample = ReviewSample.build(reviews, cube, size=2_000)
+    strata = reviews.groupby(SAMPLE_STRATA, observed=True, dropna=False).size()
+    # Strata are filled up to their rounded quotas, except small ones short of candidates
+    quotas = allocate(strata, 2_000)
+    drawn = sample.rows.groupby(SAMPLE_STRATA, observed=True, dropna=False).size().reindex(quotas.index, fill_value=0)
+    assert (drawn <= quotas).all()
+    assert drawn.sum() >= 0.9 * quotas.sum()
+    population_shares = strata / len(reviews)
+    sample_shares = sample.rows.groupby(SAMPLE_STRATA, observed=True, dropna=False).size() / len(sample.rows)
+    shares = pd.concat([population_shares, sample_shares], axis=1).fillna(0)
+    assert (shares[0] - shares[1]).abs().max() < 0.005
+    assert sample.fraction == len(sample.rows) / 20_000
+
+
+def test_appended_sample_matches_a_draw_over_all_keys(reviews):
+    start = 15_000
+    first = reviews.iloc[:start]
+    sample = ReviewSample.build(first, build_review_cube(first)[0], size=2_000, seed=5)
+    cube = build_review_cube(reviews)[0]
+    appended = sample.appended(reviews, cube, start)
+
+    # The keys of all reviews, including those dropped as candidates before the append
+    keys = pd.Series(np.concatenate([
+        np.random.default_rng(5).random(start),
+        np.random.default_rng([5, start]).random(len(reviews) - start)
+    ]), index=reviews.index)
+    redrawn = ReviewSample._draw(reviews, cube, keys, 2_000, 5)
+    pd.testing.assert_index_equal(appended.rows.index, redrawn.rows.index)
+    assert appended.population == len(reviews)
+
+
+def test_topic_margins_cover_the_true_polarity(reviews, cube):
+    direction = polarity_direction(reviews['sentiment'])
+    pairs = review_topics(reviews.assign(value=direction), ['value'])
+    true_polarity = pairs.groupby('topic')['value'].mean()
+
+    covered = []
+    for seed in range(20):
+        sample = ReviewSample.build(reviews, cube, size=2_000, seed=seed)
+        rows = sample.rows
+        margins = topic_margins(rows, polarity_direction(rows['sentiment']), sample.fraction)
+        sampled_pairs = review_topics(rows.assign(value=polarity_direction(rows['sentiment'])), ['value'])
+        estimates = sampled_pairs.groupby('topic')['value'].agg(['mean', 'size'])
+        # Topics with enough sampled reviews for a normal approximation
+        estimates = estimates[estimates['size'] >= 30]
+        errors = (estimates['mean'] - true_polarity.reindex(estimates.index)).abs()
+        covered.extend(errors <= margins.reindex(estimates.index))
+    # 95% intervals, with some slack for the small number of repetitions
+    assert np.mean(covered) >= 0.9
+
+
+def test_polarity_change_margins_use_whole_topics():
+    reviews = pd.DataFrame({
+        'topics': ['app', 'app', 'app performance', 'app performance', 'app', 'app'],
+        'sentiment': ['positive', 'negative', 'positive', 'positive', 'negative', 'positive'],
+        'version_str': ['1.0', '1.0', '1.0', '2.0', '2.0', '2.0'],
+        'version_num': [1.0, 1.0, 1.0, 2.0, 2.0, 2.0],
+    })
+    margins = polarity_change_margins(reviews, ['app', 'app performance', 'maps'], 0.1)
+    assert list(margins.index) == ['app', 'app performance', 'maps']
+    # 'app performance' is not counted for 'app', whose two halves have two reviews each
+    app = reviews[reviews['topics'] == 'app']
+    recent = app['version_num'] >= 2.0
+    halves = [polarity_direction(app.loc[part, 'sentiment']).var() / 2 * 0.9 for part in [recent, ~recent]]
+    assert margins['app'] == pytest.approx(1.96 * np.sqrt(sum(halves)))
+    # One review per half has no variance estimate, and an unknown topic has no reviews
+    assert np.isnan(margins['app performance'])
+    assert np.isnan(margins['maps'])
+
+
+def test_thresholds_are_scaled_to_the_sample():
+    def aggregate(reviews, top_n=10, min_topic_reviews=50, min_reviews=10, min_versions=3):
+        pass
+
+    assert sample_thresholds(aggregate, 4.0) == {'min_topic_reviews': 12, 'min_reviews': 2}
+    assert sample_thresholds(aggregate, 100.0) == {'min_topic_reviews': 1, 'min_reviews': 1}
@@ -0,0 +1,67 @@
+"""Queries of the review text search (review_search.py)."""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from review_search import SearchIndex, build_search_index, parse_query, search_results  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def reviews():
+    return pd.DataFrame({
+        'date': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-03']),
+        'content_english': ['The digital key stopped working', 'Key digital settings are hidden', 'Connection lost again'],
+        'content': ['Digitaler Schlüssel geht nicht', 'Einstellungen versteckt', 'Verbindung verloren'],
+    })
+
+
+@pytest.mark.parametrize('query', ['!!!', '*', '-', '""'])
+def test_query_without_words_matches_nothing(reviews, query):
+    assert parse_query(query) == []
+    review_ids = build_search_index(reviews).search(query)
+    assert len(review_ids) == 0
+    total, page = search_results(reviews, review_ids)
+    assert total == 0
+    assert len(page) == 0
+
+
+def test_phrase_matches_consecutive_words_in_order(reviews):
+    index = build_search_index(reviews)
+    assert list(index.search('"digital key"')) == [0]
+    assert list(index.search('"key digital"')) == [1]
+    # Without quotes the words may appear anywhere
+    assert list(index.search('digital key')) == [0, 1]
+
+
+def test_prefix_matches_words_starting_with_it(reviews):
+    index = build_search_index(reviews)
+    assert list(index.search('connect*')) == [2]
+    assert list(index.search('connect')) == []
+    # 'digitaler' in the original text of review 0 also starts with 'digital'
+    assert list(index.search('digitale*')) == [0]
+
+
+def test_clauses_must_all_match_in_any_column(reviews):
+    index = build_search_index(reviews)
+    # 'schlüssel' is only in the original text, 'stopped' only in the translation
+    assert list(index.search('schlüssel stopped')) == [0]
+    assert list(index.search('schlüssel hidden')) == []
+
+
+def test_merged_index_matches_index_of_all_reviews(reviews):
+    merged = SearchIndex.merge(build_search_index(reviews.iloc[:2]), build_search_index(reviews.iloc[2:]))
+    full = build_search_index(reviews)
+    for query in ['"digital key"', 'connect*', 'verbindung', 'key', 'digital*']:
+        assert list(merged.search(query)) == list(full.search(query))
+
+
+def test_results_are_newest_first_and_paged(reviews):
+    review_ids = build_search_index(reviews).search('digital*')
+    total, page = search_results(reviews, review_ids, page=0, page_size=1)
+    assert total == 2
+    assert list(page.index) == [1]
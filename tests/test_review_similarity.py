@@ -0,0 +1,97 @@
+"""Similar-review lookups (review_similarity.py) against brute-force cosine similarity."""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from review_similarity import SimilarityIndex, similar_reviews  # noqa: E402
+from synthetic_reviews import generate_reviews  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def texts():
+    return pd.concat(generate_reviews(2_000, seed=7), ignore_index=True)['content_english']
+
+
+@pytest.fixture(scope='module')
+def index(texts):
+    return SimilarityIndex.build(texts)
+
+
+@pytest.fixture(scope='module')
+def cosine(index):
+    """Dense matrix of the exact cosine similarities between all reviews"""
+    vectors = np.zeros((len(index), len(index.vocabulary)))
+    rows = np.repeat(np.arange(len(index)), np.diff(index.indptr))
+    vectors[rows, index.term_codes] = index.weights
+    return vectors @ vectors.T
+
+
+def brute_force(cosine, review_id, k, allowed=None):
+    """Ids of the k reviews with the highest non-zero cosine similarity, ties by id"""
+    scores = cosine[review_id].copy()
+    scores[review_id] = 0
+    if allowed is not None:
+        scores[~allowed] = 0
+    candidates = np.flatnonzero(scores > 1e-6)
+    return candidates[np.lexsort((candidates, -scores[candidates]))][:k]
+
+
+def test_scores_are_exact_cosine_similarities(index, cosine):
+    for review_id in range(0, 2_000, 97):
+        review_ids, scores = index.search(review_id, k=10)
+        np.testing.assert_allclose(scores, cosine[review_id, review_ids], rtol=1e-4, atol=1e-6)
+        assert list(scores) == sorted(scores, reverse=True)
+        assert review_id not in review_ids
+
+
+def test_without_pruning_results_match_brute_force(index, cosine):
+    for review_id in range(0, 2_000, 97):
+        review_ids, _ = index.search(review_id, k=10, query_terms=len(index.vocabulary), rerank=len(index))
+        expected = brute_force(cosine, review_id, 10)
+        np.testing.assert_allclose(cosine[review_id, review_ids], cosine[review_id, expected], rtol=1e-4, atol=1e-6)
+
+
+def test_pruned_search_finds_most_of_the_true_neighbours(index, cosine):
+    recalls = []
+    for review_id in range(0, 2_000, 23):
+        review_ids, scores = index.search(review_id, k=10)
+        expected = brute_force(cosine, review_id, 10)
+        if len(expected):
+            # Reviews tied with the 10th best count as found
+            recalls.append(np.mean(cosine[review_id, review_ids] >= cosine[review_id, expected].min() - 1e-6))
+    assert np.mean(recalls) >= 0.9
+
+
+def test_only_allowed_reviews_are_returned(index, cosine, texts):
+    selection = texts.to_frame().iloc[::3]
+    allowed = np.zeros(len(index), dtype=bool)
+    allowed[selection.index] = True
+    for review_id in range(1, 2_000, 97):
+        results = similar_reviews(selection, index, review_id, k=5)
+        assert allowed[results.index].all()
+        np.testing.assert_allclose(results['similarity'], cosine[review_id, results.index], rtol=1e-4, atol=1e-6)
+
+        review_ids, _ = index.search(review_id, k=5, allowed=lambda ids: allowed[ids],
+                                     query_terms=len(index.vocabulary), rerank=len(index))
+        expected = brute_force(cosine, review_id, 5, allowed)
+        np.testing.assert_allclose(cosine[review_id, review_ids], cosine[review_id, expected], rtol=1e-4, atol=1e-6)
+
+
+def test_saved_index_answers_like_the_built_one(index, tmp_path):
+    path = str(tmp_path / 'index.npz')
+    index.save(path)
+    loaded = SimilarityIndex.load(path)
+    for review_id in [0, 500, 1999]:
+        np.testing.assert_array_equal(loaded.search(review_id)[0], index.search(review_id)[0])
+
+
+def test_unknown_review_has_no_similar_reviews(index):
+    review_ids, scores = index.search(len(index) + 5)
+    assert len(review_ids) == 0
+    assert len(scores) == 0
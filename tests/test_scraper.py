@@ -0,0 +1,112 @@
+"""Incremental scraping (scraper.py) against local JSON fixtures instead of the Play Store."""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper import fetch_new_reviews, fixture_fetcher, load_watermarks  # noqa: E402
+
+LANGUAGES = [('en', 'English'), ('de', 'German')]
+
+
+def review(review_id, at):
+    return {'reviewId': review_id, 'content': f"Review {review_id}", 'score': 4, 'at': at}
+
+
+def write_fixture(fixture_dir, lang_code, reviews):
+    """Store reviews (newest first) as the feed of one language"""
+    with open(os.path.join(fixture_dir, f"{lang_code}.json"), 'w', encoding='utf-8') as f:
+        json.dump(reviews, f)
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Fixture folder, watermark file and a fetcher that records the pages it served"""
+    fixture_dir = tmp_path / 'fixtures'
+    fixture_dir.mkdir()
+    fetch_page = fixture_fetcher(str(fixture_dir))
+    pages = []
+
+    def recording_fetch_page(app_id, lang='en', continuation_token=None, **kwargs):
+        pages.append((lang, continuation_token or 0))
+        return fetch_page(app_id, lang=lang, continuation_token=continuation_token, **kwargs)
+
+    def run(languages=LANGUAGES):
+        pages.clear()
+        return fetch_new_reviews(languages=languages, watermark_file=str(tmp_path / 'watermarks.json'),
+                                 output_dir=str(tmp_path / 'scrapes'), fetch_page=recording_fetch_page,
+                                 max_workers=2, min_interval=0, page_size=2)
+
+    return str(fixture_dir), str(tmp_path / 'watermarks.json'), run, pages
+
+
+def test_first_run_emits_all_reviews_and_stores_the_watermark(store):
+    fixture_dir, watermark_file, run, _ = store
+    write_fixture(fixture_dir, 'en', [review('e3', '2024-05-03T10:00:00'), review('e2', '2024-05-03T10:00:00'),
+                                      review('e1', '2024-05-01T08:00:00')])
+    write_fixture(fixture_dir, 'de', [review('d1', '2024-05-02T09:00:00')])
+
+    new_reviews = run()
+    assert sorted(new_reviews['reviewId']) == ['d1', 'e1', 'e2', 'e3']
+    assert set(new_reviews.loc[new_reviews['reviewId'] == 'd1', 'language']) == {'German'}
+
+    watermarks = load_watermarks(watermark_file)
+    assert watermarks['en']['review_id'] == 'e3'
+    assert watermarks['en']['at'] == '2024-05-03T10:00:00'
+    # Both reviews at the newest timestamp are remembered
+    assert watermarks['en']['boundary_ids'] == ['e3', 'e2']
+
+
+def test_second_run_emits_only_new_reviews_and_stops_at_the_watermark(store):
+    fixture_dir, _, run, pages = store
+    older = [review(f"e{i}", f"2024-04-{i:02d}T12:00:00") for i in range(20, 0, -1)]
+    write_fixture(fixture_dir, 'en', older)
+    run([('en', 'English')])
+    assert len(pages) == 10
+
+    write_fixture(fixture_dir, 'en', [review('e22', '2024-05-02T12:00:00'), review('e21', '2024-05-01T12:00:00')] + older)
+    new_reviews = run([('en', 'English')])
+    assert list(new_reviews['reviewId']) == ['e22', 'e21']
+    # The page with the watermark is the last one read
+    assert pages == [('en', 0), ('en', 2)]
+
+    assert run([('en', 'English')]).empty
+
+
+def test_new_review_at_the_watermark_timestamp_is_emitted_once(store):
+    fixture_dir, watermark_file, run, _ = store
+    tied = '2024-05-03T10:00:00'
+    write_fixture(fixture_dir, 'en', [review('e2', tied), review('e1', '2024-05-01T08:00:00')])
+    run([('en', 'English')])
+
+    # A review published in the same second arrives after the first run, and the store
+    # lists it between the reviews already seen
+    write_fixture(fixture_dir, 'en', [review('e2', tied), review('e3', tied), review('e1', '2024-05-01T08:00:00')])
+    new_reviews = run([('en', 'English')])
+    assert list(new_reviews['reviewId']) == ['e3']
+    assert set(load_watermarks(watermark_file)['en']['boundary_ids']) == {'e2', 'e3'}
+
+    assert run([('en', 'English')]).empty
+
+
+def test_language_without_reviews_keeps_no_watermark(store):
+    fixture_dir, watermark_file, run, _ = store
+    write_fixture(fixture_dir, 'en', [review('e1', '2024-05-01T08:00:00')])
+    write_fixture(fixture_dir, 'de', [])
+
+    new_reviews = run([('en', 'English'), ('de', 'German'), ('fr', 'French')])
+    assert list(new_reviews['reviewId']) == ['e1']
+    assert set(load_watermarks(watermark_file)) == {'en'}
+
+
+def test_run_without_new_reviews_writes_no_scrape(store, tmp_path):
+    fixture_dir, _, run, _ = store
+    write_fixture(fixture_dir, 'en', [])
+    new_reviews = run([('en', 'English')])
+    assert new_reviews.empty
+    assert list(new_reviews.columns) == ['reviewId', 'content', 'score', 'at', 'language']
+    assert not os.path.exists(tmp_path / 'scrapes')
@@ -0,0 +1,150 @@
+"""Journaled runs of the translation evaluator (translation_evaluator.py) against a local stand-in for Ollama."""
+
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from translation_evaluator import WinRateMonitor, evaluate_translations, journal_path, load_journal, sequential_half_width  # noqa: E402
+
+
+class JudgeHandler(BaseHTTPRequestHandler):
+    """Answers like an Ollama judge that rates translations containing 'good' 5 and others 2"""
+
+    def do_GET(self):
+        self.reply({'models': []})
+
+    def do_POST(self):
+        prompt = json.loads(self.rfile.read(int(self.headers['Content-Length'])))['prompt']
+        self.server.prompts.append(prompt)
+        translations = [line.split(': ', 1)[1] for line in prompt.splitlines() if line.startswith('Translation')]
+        scores = ['5' if 'good' in translation else '2' for translation in translations]
+        answer = scores[0] if len(scores) == 1 else f"SCORE_A: {scores[0]}\nSCORE_B: {scores[1]}"
+        self.reply({'response': answer})
+
+    def reply(self, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def judge():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), JudgeHandler)
+    server.prompts = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def input_file(tmp_path):
+    path = tmp_path / 'translations.csv'
+    pd.DataFrame({
+        'content': [f"Bewertung {i}" for i in range(6)],
+        'Translation A': ['good', 'bad', 'good', 'good', 'bad', 'good'],
+        'Translation B': ['bad', 'good', 'bad', 'good', 'bad', 'bad'],
+        'language': ['German'] * 6,
+    }).to_csv(path, sep=';', index=False)
+    return str(path)
+
+
+def run(judge, input_file, output_file, max_workers=2, **kwargs):
+    base_url = f"http://127.0.0.1:{judge.server_address[1]}"
+    return evaluate_translations(input_file, output_file, max_workers=max_workers, base_url=base_url, **kwargs)
+
+
+def test_pairwise_scores_follow_the_translations_in_both_prompt_orders(judge, input_file, tmp_path):
+    results = run(judge, input_file, str(tmp_path / 'out.csv'), pairwise=True)
+    assert list(results['Winner']) == ['A', 'B', 'A', 'Tie', 'Tie', 'A']
+
+    # Rows with different translations are shown in both orders
+    first_shown = {prompt.split('Translation A: ')[1].splitlines()[0] for prompt in judge.prompts
+                   if 'good' in prompt and 'bad' in prompt}
+    assert first_shown == {'good', 'bad'}
+
+
+def test_rerun_resumes_from_the_journal(judge, input_file, tmp_path):
+    output_file = str(tmp_path / 'out.csv')
+    run(judge, input_file, output_file, model='judge-1')
+    assert len(judge.prompts) == 12
+
+    # Drop one journaled row, as if the first run had been interrupted
+    journal_file = journal_path(output_file)
+    journal = pd.read_csv(journal_file, sep=';', dtype={'row_key': str})
+    journal.iloc[:-1].to_csv(journal_file, sep=';', index=False)
+
+    results = run(judge, input_file, output_file, model='judge-1')
+    assert len(judge.prompts) == 14
+    assert list(results['Winner']) == ['A', 'B', 'A', 'Tie', 'Tie', 'A']
+    assert set(load_journal(journal_file)['model']) == {'judge-1'}
+
+
+@pytest.mark.parametrize('rerun', [{'model': 'judge-2'}, {'model': 'judge-1', 'pairwise': True}])
+def test_journal_of_another_model_or_mode_is_not_resumed(judge, input_file, tmp_path, rerun):
+    output_file = str(tmp_path / 'out.csv')
+    run(judge, input_file, output_file, model='judge-1')
+    prompts = len(judge.prompts)
+
+    assert run(judge, input_file, output_file, **rerun) is None
+    assert len(judge.prompts) == prompts
+
+
+def test_half_width_shrinks_with_more_comparisons_and_a_larger_error_budget():
+    widths = [sequential_half_width(n, 0.05) for n in [1, 10, 100, 1000]]
+    assert widths == sorted(widths, reverse=True)
+    assert sequential_half_width(100, 0.01) > sequential_half_width(100, 0.05)
+
+
+def test_monitor_settles_once_the_interval_excludes_even_odds():
+    monitor = WinRateMonitor(alpha=0.05, min_decisive=10)
+    decisions = []
+    for _ in range(30):
+        monitor.update("A")
+        # Ties and errors do not count as comparisons
+        monitor.update("Tie")
+        monitor.update("Error")
+        decisions.append(monitor.decision())
+    settled_after = decisions.index("A") + 1
+    assert decisions[:settled_after - 1] == [None] * (settled_after - 1)
+    assert monitor.n == 30
+    assert 10 <= settled_after < 30
+    assert monitor.interval()[0] > 0.5
+
+
+def test_monitor_keeps_an_even_split_open_and_falls_back_to_the_majority():
+    monitor = WinRateMonitor(alpha=0.05, margin=0.05, min_decisive=10)
+    for winner in ["A", "B"] * 50 + ["B"]:
+        monitor.update(winner)
+    assert monitor.decision() is None
+    assert monitor.final_decision() == "B"
+
+
+def test_adaptive_run_skips_rows_once_a_language_is_settled(judge, tmp_path):
+    input_file = str(tmp_path / 'translations.csv')
+    pd.DataFrame({
+        'content': [f"Bewertung {i}" for i in range(60)] + [f"Avis {i}" for i in range(5)],
+        'Translation A': ['good'] * 65,
+        'Translation B': ['bad'] * 65,
+        'language': ['German'] * 60 + ['French'] * 5,
+    }).to_csv(input_file, sep=';', index=False)
+
+    results = run(judge, input_file, str(tmp_path / 'out.csv'), max_workers=1, adaptive=True, pairwise=True)
+    german = results.loc[results['language'] == 'German', 'Winner']
+    assert 0 < (german == 'Skipped').sum() < 60
+    assert set(german) == {'A', 'Skipped'}
+    # A language that never settles is scored completely
+    assert list(results.loc[results['language'] == 'French', 'Winner']) == ['A'] * 5
@@ -7,86 +7,23 @@ Evaluate translations of app reviews by scoring on a scale of 1-5.
 
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 import time
+import random
+import math
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from tqdm import tqdm
 import os
 import re
+import hashlib
+from itertools import combinations
 
-def evaluate_translations(input_file, output_file, model='llama3.1:8b', max_retries=2, timeout=60):
-    print(f"Starting evaluation with {model}...")
-    
-    # Quick API test
-    try:
-        response = requests.get("http://localhost:11434/api/tags")
-        if response.status_code != 200:
-            print(f"⚠️ Ollama API error: {response.status_code}")
-            return
-    except Exception as e:
-        print(f"⚠️ Ollama not running: {e}")
-        return
-    
-    # Load CSV
-    try:
-        df = pd.read_csv(input_file, sep=';')
-        print(f"Loaded {len(df)} records")
-    except Exception:
-        try:
-            df = pd.read_csv(input_file, sep=None, engine='python')
-            print(f"Loaded {len(df)} records with auto-detection")
-        except Exception as e:
-            print(f"⚠️ Failed to load CSV: {e}")
-            return
-    
-    # Initialize columns
-    df['Score_A'] = None
-    df['Score_B'] = None
-    df['Winner'] = None
-    
-    def get_score(text):
-        """Extract numeric score from response, ignoring thinking sections"""
-        # Remove thinking sections
-        while "<think>" in text and "</think>" in text:
-            think_start = text.find("<think>")
-            think_end = text.find("</think>", think_start) + len("</think>")
-            if think_start >= 0 and think_end > 0:
-                text = text[:think_start] + text[think_end:]
-            else:
-                break
-        
-        # Alternative regex approach if the above doesn't work
-        text = re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL)
-        
-        # Clean up the remaining text
-        text = text.strip()
-        
-        # Look for the score (prioritize the last digit as the final answer)
-        if text:
-            # First check if the response ends with a digit
-            if text[-1] in "12345":
-                return int(text[-1])
-            
-            # Then check from the end backward
-            for i in range(len(text)-1, -1, -1):
-                if text[i] in "12345":
-                    return int(text[i])
-            
-            # Finally, check the whole text
-            for char in text:
-                if char in "12345":
-                    return int(char)
-        
-        return None
-    
-    def evaluate_single(original, translation, language, label):
-        prompt = f"""You are an expert at evaluating translations of BMW app reviews. Evaluate this translation from {language} to English:
+OLLAMA_URL = "http://localhost:11434"
 
-Original ({language}): {original}
-Translation: {translation}
+JOURNAL_COLUMNS = ['model', 'mode', 'row_key', 'Score_A', 'Score_B', 'Winner']
+JUDGE_JOURNAL_COLUMNS = ['judge', 'mode', 'row_key', 'Score_A', 'Score_B', 'Winner']
 
-CLASSIFICATION TASK:
-Rate the quality of this translation on a scale of 1-5.
-
-CONTEXT:
+SCORING_GUIDELINES = """CONTEXT:
 These are user reviews about the MyBMW mobile application, which may contain:
 - Automotive terminology and BMW-specific features
 - Technical terms related to vehicle controls, connectivity, and functionality
@@ -136,95 +73,323 @@ EXAMPLES:
 - If user sentiment about the app is preserved but grammar is awkward → score 3-4
 - If BMW-specific terminology is correctly translated but text flow is slightly unnatural → score 4
 - If the translation captures both technical content and tone perfectly → score 5
-- If the meaning is completely changed or incomprehensible → score 1
+- If the meaning is completely changed or incomprehensible → score 1"""
+
+def row_key(row):
+    """Stable identifier of a review/translation pair, used to resume from the journal"""
+    text = "\x1f".join(str(row[col]) for col in ['content', 'Translation A', 'Translation B'])
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+def journal_path(output_file):
+    """Journal file that collects results row by row next to the output file"""
+    base, _ = os.path.splitext(output_file)
+    return f"{base}_journal.csv"
+
+def load_journal(journal_file, columns=JOURNAL_COLUMNS):
+    """Load journaled results, keeping the latest entry for each row (and judge)"""
+    if not os.path.exists(journal_file):
+        return pd.DataFrame(columns=columns)
+    journal = pd.read_csv(journal_file, sep=';', dtype={'row_key': str, 'judge': str})
+    key = [col for col in ['judge', 'row_key'] if col in columns]
+    return journal.drop_duplicates(subset=key, keep='last')
+
+def append_journal(journal_file, record, columns=JOURNAL_COLUMNS):
+    """Append a single result row to the journal"""
+    write_header = not os.path.exists(journal_file) or os.path.getsize(journal_file) == 0
+    pd.DataFrame([record], columns=columns).to_csv(
+        journal_file, mode='a', header=write_header, index=False, sep=';'
+    )
+
+def journal_matches_run(journal, journal_file, **run):
+    """
+    Check that journaled results were scored like this run, so they can be resumed.
+
+    Args:
+        journal: Loaded journal
+        run: Journal columns and this run's values, e.g. model="qwen3:14b", mode="pairwise"
+
+    Returns:
+        True for an empty or matching journal; False (after printing why) when its
+        results come from another judge model or scoring mode
+    """
+    if journal.empty:
+        return True
+    for column, value in run.items():
+        # Journals written before the column was recorded cannot be matched
+        other = set(journal[column].astype(str)) - {value} if column in journal.columns else {'unknown'}
+        if other:
+            print(f"⚠️ {journal_file} holds results scored with {column} {', '.join(sorted(other))}, not {value}. "
+                  f"Use another output file, or delete the journal to start over.")
+            return False
+    return True
+
+def load_input(input_file):
+    """Load the review/translation CSV, falling back to separator auto-detection"""
+    try:
+        df = pd.read_csv(input_file, sep=';')
+        print(f"Loaded {len(df)} records")
+    except Exception:
+        try:
+            df = pd.read_csv(input_file, sep=None, engine='python')
+            print(f"Loaded {len(df)} records with auto-detection")
+        except Exception as e:
+            print(f"⚠️ Failed to load CSV: {e}")
+            return None
+    return df
+
+def check_ollama(session, base_url=OLLAMA_URL):
+    """Quick API test; returns True if the Ollama endpoint answers"""
+    try:
+        response = session.get(f"{base_url}/api/tags")
+        if response.status_code != 200:
+            print(f"⚠️ Ollama API error at {base_url}: {response.status_code}")
+            return False
+    except Exception as e:
+        print(f"⚠️ Ollama not running at {base_url}: {e}")
+        return False
+    return True
+
+def strip_thinking(text):
+    """Remove <think>...</think> sections from a model response"""
+    return re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL).strip()
+
+def get_score(text):
+    """Extract numeric score from response, ignoring thinking sections"""
+    text = strip_thinking(text)
+
+    # Look for the score (prioritize the last digit as the final answer)
+    if text:
+        # First check if the response ends with a digit
+        if text[-1] in "12345":
+            return int(text[-1])
+
+        # Then check from the end backward
+        for i in range(len(text)-1, -1, -1):
+            if text[i] in "12345":
+                return int(text[i])
+
+    return None
+
+def get_pair_scores(text):
+    """Extract (score A, score B) from a pairwise response, or None if either is missing"""
+    text = strip_thinking(text)
+
+    score_a = re.findall(r'SCORE[_ ]?A\W*([1-5])', text, flags=re.IGNORECASE)
+    score_b = re.findall(r'SCORE[_ ]?B\W*([1-5])', text, flags=re.IGNORECASE)
+    if score_a and score_b:
+        # Use the last occurrence as the final answer
+        return int(score_a[-1]), int(score_b[-1])
+
+    return None
+
+def build_prompt(original, translation, language):
+    """Prompt asking the judge to score a single translation"""
+    return f"""You are an expert at evaluating translations of BMW app reviews. Evaluate this translation from {language} to English:
+
+Original ({language}): {original}
+Translation: {translation}
+
+CLASSIFICATION TASK:
+Rate the quality of this translation on a scale of 1-5.
+
+{SCORING_GUIDELINES}
 
 Your response must be ONLY a single digit: 1, 2, 3, 4, or 5."""
 
-        for attempt in range(max_retries + 1):
-            try:
-                response = requests.post(
-                    "http://localhost:11434/api/generate",
-                    json={"model": model, "prompt": prompt, "stream": False},
-                    timeout=timeout
-                )
-                
-                if response.status_code == 200:
-                    response_text = response.json().get('response', '').strip()
-                    score = get_score(response_text)
-                    
-                    if score:
-                        return score
-                    else:
-                        print(f"⚠️ Couldn't extract score from: '{response_text[:30]}...'")
-                
-                if attempt < max_retries:
-                    time.sleep(2)
-                    
-            except Exception as e:
-                print(f"Error: {e}")
-                if attempt < max_retries:
-                    time.sleep(2)
+def build_pairwise_prompt(original, translation_a, translation_b, language):
+    """Prompt asking the judge to score Translation A and Translation B in one call"""
+    return f"""You are an expert at evaluating translations of BMW app reviews. Evaluate these two translations from {language} to English:
+
+Original ({language}): {original}
+Translation A: {translation_a}
+Translation B: {translation_b}
+
+CLASSIFICATION TASK:
+Rate the quality of EACH translation on a scale of 1-5. Judge each one on its own merits against the original; the order in which they are shown does not matter.
+
+{SCORING_GUIDELINES}
+
+Your response must be ONLY these two lines:
+SCORE_A: <1-5>
+SCORE_B: <1-5>"""
+
+def swap_pairwise_order(key):
+    """
+    Whether a row's translations are shown in swapped order in the pairwise prompt.
+
+    Half of the rows show Translation B first, chosen from the row key so that a
+    resumed run asks the same question, to cancel out the judge's position bias.
+    """
+    return int(key, 16) % 2 == 1
+
+def create_session(pool_size):
+    """HTTP session with a connection pool sized for the number of worker threads"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    """Exponential backoff with full jitter for the given retry attempt (0-based)"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+def query_judge(session, model, prompt, parse, max_retries=2, timeout=60, base_url=OLLAMA_URL):
+    """
+    Send a prompt to Ollama and parse the response, retrying with jittered backoff.
+
+    Returns the parsed value, or "ERROR" if no valid answer was obtained.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            response = session.post(
+                f"{base_url}/api/generate",
+                json={"model": model, "prompt": prompt, "stream": False},
+                timeout=timeout
+            )
+
+            if response.status_code == 200:
+                response_text = response.json().get('response', '').strip()
+                result = parse(response_text)
+
+                if result:
+                    return result
                 else:
-                    return "ERROR"
-                    
-        return "ERROR"
-    
-    # Process reviews
-    errors = 0
-    print("\nEvaluating translations:")
-    
-    for idx, row in tqdm(df.iterrows(), total=len(df), desc="Progress"):
-        lang = row['language']
-        
-        # Get scores
-        score_a = evaluate_single(row['content'], row['Translation A'], lang, "A")
-        score_b = evaluate_single(row['content'], row['Translation B'], lang, "B")
-        
-        # Determine winner
-        if isinstance(score_a, int) and isinstance(score_b, int):
-            if score_a > score_b:
-                winner = "A"
-            elif score_b > score_a:
-                winner = "B"
-            else:
-                winner = "Tie"
-        else:
-            winner = "Error"
-            errors += 1
-            
-        # Store results
-        df.at[idx, 'Score_A'] = score_a
-        df.at[idx, 'Score_B'] = score_b
-        df.at[idx, 'Winner'] = winner
-        
-        # Show just last row result in one line
-        tqdm.write(f"Row {idx+1}: {lang} - A({score_a}) vs B({score_b}) → {winner}")
-        
-        # Save progress
-        df.to_csv(output_file, index=False, sep=';')
-    
-    # Summary statistics
+                    tqdm.write(f"⚠️ Couldn't extract score from: '{response_text[:30]}...'")
+
+        except Exception as e:
+            tqdm.write(f"Error: {e}")
+
+        if attempt < max_retries:
+            time.sleep(backoff_delay(attempt))
+
+    return "ERROR"
+
+def decide_winner(score_a, score_b):
+    """Compare two scores; "Error" if either is missing"""
+    if isinstance(score_a, int) and isinstance(score_b, int):
+        if score_a > score_b:
+            return "A"
+        elif score_b > score_a:
+            return "B"
+        return "Tie"
+    return "Error"
+
+def evaluate_row(session, row, model, pairwise=False, max_retries=2, timeout=60, base_url=OLLAMA_URL):
+    """Score both translations of one row and return its journal record"""
+    lang = row['language']
+
+    if pairwise:
+        swapped = swap_pairwise_order(row['row_key'])
+        first, second = ('Translation B', 'Translation A') if swapped else ('Translation A', 'Translation B')
+        prompt = build_pairwise_prompt(row['content'], row[first], row[second], lang)
+        scores = query_judge(session, model, prompt, get_pair_scores, max_retries, timeout, base_url)
+        score_a, score_b = scores if scores != "ERROR" else ("ERROR", "ERROR")
+        if swapped:
+            # The prompt's first translation was B: map the scores back to A and B
+            score_a, score_b = score_b, score_a
+    else:
+        score_a = query_judge(session, model, build_prompt(row['content'], row['Translation A'], lang),
+                              get_score, max_retries, timeout, base_url)
+        score_b = query_judge(session, model, build_prompt(row['content'], row['Translation B'], lang),
+                              get_score, max_retries, timeout, base_url)
+
+    return {
+        'row_key': row['row_key'],
+        'Score_A': score_a,
+        'Score_B': score_b,
+        'Winner': decide_winner(score_a, score_b)
+    }
+
+def sequential_half_width(n, alpha):
+    """
+    Half-width of a time-uniform confidence interval for a win rate after n comparisons.
+
+    Hoeffding bound with the error budget alpha spread over all looks (alpha / (n(n+1))),
+    so the interval stays valid however often it is checked.
+    """
+    alpha_n = alpha / (n * (n + 1))
+    return math.sqrt(math.log(2 / alpha_n) / (2 * n))
+
+class WinRateMonitor:
+    """
+    Sequential test on P(A beats B) for one language, ignoring ties and errors.
+
+    The decision is settled as soon as the confidence interval excludes 0.5 ("A" or "B"),
+    or lies entirely within 0.5 ± margin ("Tie").
+    """
+
+    def __init__(self, alpha=0.05, margin=0.05, min_decisive=10):
+        self.alpha = alpha
+        self.margin = margin
+        self.min_decisive = min_decisive
+        self.a_wins = 0
+        self.b_wins = 0
+
+    def update(self, winner):
+        if winner == "A":
+            self.a_wins += 1
+        elif winner == "B":
+            self.b_wins += 1
+
+    @property
+    def n(self):
+        return self.a_wins + self.b_wins
+
+    def interval(self):
+        if self.n == 0:
+            return 0.0, 1.0
+        rate = self.a_wins / self.n
+        half_width = sequential_half_width(self.n, self.alpha)
+        return max(0.0, rate - half_width), min(1.0, rate + half_width)
+
+    def decision(self):
+        """Settled decision, or None while the test is still running"""
+        if self.n < self.min_decisive:
+            return None
+        low, high = self.interval()
+        if low > 0.5:
+            return "A"
+        if high < 0.5:
+            return "B"
+        if low >= 0.5 - self.margin and high <= 0.5 + self.margin:
+            return "Tie"
+        return None
+
+    def final_decision(self):
+        """Decision once all rows are exhausted: the settled one, else the majority of wins"""
+        settled = self.decision()
+        if settled:
+            return settled
+        if self.a_wins > self.b_wins:
+            return "A"
+        if self.b_wins > self.a_wins:
+            return "B"
+        return "Tie"
+
+def print_summary(df):
+    """Print overall and per-language win rates and average scores"""
     print("\n=== RESULTS ===")
-    
-    valid_df = df[df['Winner'] != 'Error'].copy()
+
+    valid_df = df[df['Winner'].isin(['A', 'B', 'Tie'])].copy()
     if len(valid_df) > 0:
         # Convert scores to numeric for calculations
         valid_df['Score_A'] = pd.to_numeric(valid_df['Score_A'], errors='coerce')
         valid_df['Score_B'] = pd.to_numeric(valid_df['Score_B'], errors='coerce')
-        
+
         # Overall statistics
         a_wins = (valid_df['Winner'] == 'A').sum()
         b_wins = (valid_df['Winner'] == 'B').sum()
         ties = (valid_df['Winner'] == 'Tie').sum()
         avg_score_a = valid_df['Score_A'].mean()
         avg_score_b = valid_df['Score_B'].mean()
-        
+
         print(f"Overall (n={len(valid_df)}):")
         print(f"- Win rate: A: {a_wins} ({a_wins/len(valid_df)*100:.1f}%), " +
               f"B: {b_wins} ({b_wins/len(valid_df)*100:.1f}%), " +
               f"Ties: {ties} ({ties/len(valid_df)*100:.1f}%)")
         print(f"- Average scores: A: {avg_score_a:.2f}, B: {avg_score_b:.2f}, Difference: {avg_score_a-avg_score_b:.2f}")
-        
+
         # Results by language
         print("\nBy language:")
         for lang in df['language'].unique():
@@ -233,22 +398,306 @@ Your response must be ONLY a single digit: 1, 2, 3, 4, or 5."""
                 a_lang = (lang_df['Winner'] == 'A').sum()
                 b_lang = (lang_df['Winner'] == 'B').sum()
                 t_lang = (lang_df['Winner'] == 'Tie').sum()
-                
+
                 lang_avg_a = lang_df['Score_A'].mean()
                 lang_avg_b = lang_df['Score_B'].mean()
-                
+
                 print(f"{lang} (n={len(lang_df)}):")
                 print(f"- Win rate: A: {a_lang} ({a_lang/len(lang_df)*100:.1f}%), " +
                       f"B: {b_lang} ({b_lang/len(lang_df)*100:.1f}%), " +
                       f"Ties: {t_lang} ({t_lang/len(lang_df)*100:.1f}%)")
                 print(f"- Average scores: A: {lang_avg_a:.2f}, B: {lang_avg_b:.2f}, Diff: {lang_avg_a-lang_avg_b:.2f}")
-    
+
+def run_adaptive(executor, session, df, pending_df, journal, model, pairwise, max_retries, timeout,
+                 max_workers, report, alpha, margin, min_decisive, random_state, base_url=OLLAMA_URL):
+    """
+    Score rows language by language in random order until each language's winner is settled.
+
+    Returns a dict of WinRateMonitor per language.
+    """
+    monitors = {lang: WinRateMonitor(alpha, margin, min_decisive) for lang in df['language'].unique()}
+
+    # Results from previous runs count towards the test
+    previous = journal.merge(df[['row_key', 'language']].drop_duplicates('row_key'), on='row_key')
+    for lang, winner in zip(previous['language'], previous['Winner']):
+        monitors[lang].update(winner)
+
+    # Stratified random order: one shuffled queue of pending rows per language
+    shuffled = pending_df.sample(frac=1, random_state=random_state)
+    queues = {lang: list(group.iterrows()) for lang, group in shuffled.groupby('language', sort=False)}
+
+    in_flight = {}
+    progress = tqdm(total=len(pending_df), desc="Progress")
+
+    def open_languages():
+        return [lang for lang, queue in queues.items() if queue and monitors[lang].decision() is None]
+
+    while True:
+        # Keep the pool busy, taking rows round-robin from languages still undecided
+        languages = open_languages()
+        while len(in_flight) < max_workers and languages:
+            for lang in languages:
+                if len(in_flight) >= max_workers or not queues[lang]:
+                    continue
+                idx, row = queues[lang].pop(0)
+                future = executor.submit(evaluate_row, session, row, model, pairwise, max_retries, timeout, base_url)
+                in_flight[future] = (idx, lang)
+            languages = open_languages()
+
+        if not in_flight:
+            break
+
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            idx, lang = in_flight.pop(future)
+            record = future.result()
+            report(idx, lang, record)
+            progress.update(1)
+
+            was_open = monitors[lang].decision() is None
+            monitors[lang].update(record['Winner'])
+            if was_open and monitors[lang].decision() is not None:
+                skipped = len(queues[lang])
+                progress.total -= skipped
+                tqdm.write(f"✓ {lang} settled: {monitors[lang].decision()} after {monitors[lang].n} decisive rows, "
+                           f"skipping {skipped} remaining rows")
+
+    progress.close()
+    return monitors
+
+def evaluate_translations(input_file, output_file, model='llama3.1:8b', max_retries=2, timeout=60,
+                          max_workers=4, pairwise=False, adaptive=False, alpha=0.05, margin=0.05,
+                          min_decisive=10, random_state=42, base_url=OLLAMA_URL):
+    """
+    Score Translation A and B of every row with an Ollama judge model.
+
+    Rows are evaluated concurrently by `max_workers` threads sharing a pooled HTTP
+    session. With `pairwise=True` a single prompt scores both translations, halving
+    the number of judge calls per row; half of the rows show B first (see
+    swap_pairwise_order).
+
+    Each scored row is journaled next to `output_file`, so a rerun resumes where the
+    last one stopped; a journal of another judge model or scoring mode is not resumed.
+
+    With `adaptive=True` rows are drawn in random order, stratified by language, and a
+    sequential test on the A-vs-B win rate stops scoring a language once its winner is
+    settled at error budget `alpha` (or both are within `margin` of a 50% win rate).
+    Unscored rows are marked "Skipped".
+    """
+    mode = "pairwise" if pairwise else "independent"
+    print(f"Starting evaluation with {model} ({mode} scoring, {max_workers} workers)...")
+
+    session = create_session(max_workers)
+
+    # Quick API test
+    if not check_ollama(session, base_url):
+        return
+
+    # Load CSV
+    df = load_input(input_file)
+    if df is None:
+        return
+
+    # Initialize columns
+    df['Score_A'] = None
+    df['Score_B'] = None
+    df['Winner'] = None
+    df['row_key'] = df.apply(row_key, axis=1)
+
+    # Resume: rows already scored in a previous run are skipped
+    journal_file = journal_path(output_file)
+    journal = load_journal(journal_file)
+    if not journal_matches_run(journal, journal_file, model=model, mode=mode):
+        return
+    done_keys = set(journal.loc[journal['Winner'] != 'Error', 'row_key'])
+    if done_keys:
+        print(f"Resuming: {df['row_key'].isin(done_keys).sum()} rows already evaluated in {journal_file}")
+
+    # Process reviews
+    print("\nEvaluating translations:")
+
+    pending_df = df[~df['row_key'].isin(done_keys)].drop_duplicates(subset='row_key')
+
+    def report(idx, lang, record):
+        # Show just last row result in one line
+        tqdm.write(f"Row {idx+1}: {lang} - A({record['Score_A']}) vs B({record['Score_B']}) → {record['Winner']}")
+
+        # Save progress by appending this row to the journal
+        append_journal(journal_file, dict(record, model=model, mode=mode))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        if adaptive:
+            monitors = run_adaptive(executor, session, df, pending_df, journal, model, pairwise,
+                                    max_retries, timeout, max_workers, report,
+                                    alpha, margin, min_decisive, random_state, base_url)
+        else:
+            futures = {
+                executor.submit(evaluate_row, session, row, model, pairwise, max_retries, timeout, base_url): (idx, row['language'])
+                for idx, row in pending_df.iterrows()
+            }
+
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Progress"):
+                idx, lang = futures[future]
+                report(idx, lang, future.result())
+
+    # Build the final results from the journal and write the output once
+    journal = load_journal(journal_file).set_index('row_key')
+    for col in ['Score_A', 'Score_B', 'Winner']:
+        df[col] = df['row_key'].map(journal[col])
+    df['Winner'] = df['Winner'].fillna('Skipped' if adaptive else 'Error')
+    df = df.drop(columns='row_key')
+    df.to_csv(output_file, index=False, sep=';')
+
+    # Summary statistics
+    print_summary(df)
+
+    if adaptive:
+        print("\nSequential decisions by language:")
+        for lang, monitor in monitors.items():
+            settled = monitor.decision()
+            low, high = monitor.interval()
+            scored = df.loc[df['language'] == lang, 'Winner'].isin(['A', 'B', 'Tie', 'Error']).sum()
+            status = "settled early" if settled else "all rows used"
+            print(f"{lang}: winner {monitor.final_decision()} ({status}, {scored}/{(df['language'] == lang).sum()} rows scored, "
+                  f"P(A beats B) in [{low:.2f}, {high:.2f}])")
+
     print(f"\nComplete! Results saved to {output_file}")
     return df
 
+def fleiss_kappa(labels):
+    """
+    Fleiss' kappa for a (rows x judges) frame of categorical labels.
+
+    Rows with a missing label from any judge are ignored.
+    """
+    labels = labels.dropna()
+    n_judges = labels.shape[1]
+    if len(labels) == 0 or n_judges < 2:
+        return float('nan')
+
+    counts = labels.apply(lambda col: col.astype(str)).stack().groupby(level=0).value_counts().unstack(fill_value=0)
+    per_row = ((counts ** 2).sum(axis=1) - n_judges) / (n_judges * (n_judges - 1))
+    p_observed = per_row.mean()
+    category_share = counts.sum(axis=0) / (len(labels) * n_judges)
+    p_expected = (category_share ** 2).sum()
+    if p_expected == 1:
+        return 1.0
+    return (p_observed - p_expected) / (1 - p_expected)
+
+def print_agreement(results, judges):
+    """Print pairwise winner agreement, Fleiss' kappa and score correlations between judges"""
+    print("\n=== INTER-JUDGE AGREEMENT ===")
+
+    winners = results[[f"Winner_{judge}" for judge in judges]]
+    winners = winners.where(winners.isin(['A', 'B', 'Tie']))
+    winners.columns = judges
+
+    for judge_1, judge_2 in combinations(judges, 2):
+        both = winners[[judge_1, judge_2]].dropna()
+        if len(both) == 0:
+            continue
+        agreement = (both[judge_1] == both[judge_2]).mean() * 100
+        correlations = {}
+        for score in ['Score_A', 'Score_B']:
+            score_cols = [f"{score}_{judge_1}", f"{score}_{judge_2}"]
+            scores = results[score_cols].apply(pd.to_numeric, errors='coerce').dropna()
+            correlations[score] = scores[score_cols[0]].corr(scores[score_cols[1]]) if len(scores) > 1 else float('nan')
+        print(f"{judge_1} vs {judge_2}: winner agreement {agreement:.1f}% (n={len(both)}), "
+              f"Score A correlation {correlations['Score_A']:.2f}, Score B correlation {correlations['Score_B']:.2f}")
+
+    print(f"Fleiss' kappa on winners: {fleiss_kappa(winners):.3f}")
+
+def evaluate_with_judges(input_file, output_file, judges, endpoints=None, workers_per_endpoint=2,
+                         pairwise=False, max_retries=2, timeout=60):
+    """
+    Score every row with several judge models in parallel and report their agreement.
+
+    Each judge is pinned to one endpoint (round-robin over `endpoints`) so an Ollama
+    server does not swap models back and forth; every endpoint gets its own pool of
+    `workers_per_endpoint` threads. Per-(judge, row) scores are cached in a journal,
+    so a rerun only scores the rows a judge has not covered yet.
+
+    Returns the input rows with Score_A/Score_B/Winner columns per judge and a
+    majority-vote Consensus column.
+    """
+    endpoints = endpoints or [OLLAMA_URL]
+    print(f"Starting multi-judge evaluation with {len(judges)} judges on {len(endpoints)} endpoints...")
+
+    sessions = {url: create_session(workers_per_endpoint) for url in endpoints}
+    endpoints = [url for url in endpoints if check_ollama(sessions[url], url)]
+    if not endpoints:
+        return
+    judge_endpoints = {judge: endpoints[i % len(endpoints)] for i, judge in enumerate(judges)}
+
+    df = load_input(input_file)
+    if df is None:
+        return
+    df['row_key'] = df.apply(row_key, axis=1)
+
+    # Cached (judge, row) scores from previous runs
+    base, _ = os.path.splitext(output_file)
+    journal_file = f"{base}_judges_journal.csv"
+    journal = load_journal(journal_file, JUDGE_JOURNAL_COLUMNS)
+    mode = "pairwise" if pairwise else "independent"
+    if not journal_matches_run(journal, journal_file, mode=mode):
+        return
+    done = set(zip(journal.loc[journal['Winner'] != 'Error', 'judge'],
+                   journal.loc[journal['Winner'] != 'Error', 'row_key']))
+
+    rows = df.drop_duplicates(subset='row_key')
+    tasks = [(judge, idx, row) for judge in judges for idx, row in rows.iterrows()
+             if (judge, row['row_key']) not in done]
+    print(f"{len(rows) * len(judges) - len(tasks)} (judge, row) scores cached, {len(tasks)} to evaluate")
+
+    executors = {url: ThreadPoolExecutor(max_workers=workers_per_endpoint) for url in endpoints}
+    try:
+        futures = {}
+        for judge, idx, row in tasks:
+            url = judge_endpoints[judge]
+            future = executors[url].submit(evaluate_row, sessions[url], row, judge, pairwise,
+                                           max_retries, timeout, url)
+            futures[future] = (judge, idx, row['language'])
+
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Progress"):
+            judge, idx, lang = futures[future]
+            record = dict(future.result(), judge=judge, mode=mode)
+            tqdm.write(f"[{judge}] Row {idx+1}: {lang} - A({record['Score_A']}) vs B({record['Score_B']}) → {record['Winner']}")
+            append_journal(journal_file, record, JUDGE_JOURNAL_COLUMNS)
+    finally:
+        for executor in executors.values():
+            executor.shutdown()
+
+    # Wide result table: one block of columns per judge
+    journal = load_journal(journal_file, JUDGE_JOURNAL_COLUMNS)
+    results = df.copy()
+    for judge in judges:
+        judge_scores = journal[journal['judge'] == judge].set_index('row_key')
+        for col in ['Score_A', 'Score_B', 'Winner']:
+            results[f"{col}_{judge}"] = results['row_key'].map(judge_scores[col])
+
+    # Majority vote across judges (more than half of all judges must agree)
+    winner_cols = [f"Winner_{judge}" for judge in judges]
+    votes = pd.concat([(results[winner_cols] == label).sum(axis=1).rename(label) for label in ['A', 'B', 'Tie']], axis=1)
+    results['Consensus'] = votes.idxmax(axis=1).where(votes.max(axis=1) > len(judges) / 2, 'No majority')
+
+    results = results.drop(columns='row_key')
+    results.to_csv(output_file, index=False, sep=';')
+
+    # Per-judge and consensus summaries
+    for judge in judges:
+        print(f"\n##### Judge: {judge}")
+        print_summary(results.rename(columns={f"Score_A_{judge}": 'Score_A', f"Score_B_{judge}": 'Score_B',
+                                              f"Winner_{judge}": 'Winner'}))
+    print_agreement(results, judges)
+
+    consensus = results['Consensus'].value_counts()
+    print("\nConsensus winners: " + ", ".join(f"{k}: {v}" for k, v in consensus.items()))
+    print(f"\nComplete! Results saved to {output_file}")
+    return results
+
 if __name__ == "__main__":
     evaluate_translations(
         input_file="bmw_app_analysis/translations/bmw_reviews_sampledHE.csv",
         output_file="bmw_app_analysis/translations/bmw_reviews_evaluated_1to5.csv",
         model="qwen3:14b"
-    ) 
\ No newline at end of file
+    )